@@ -0,0 +1,48 @@
+"""Import time of labelled_numerics, measured in fresh interpreters.
+
+    python benchmarks/bench_import.py --repeat 20 --max-ms 50
+
+The interpreter start up (python -c "pass") is subtracted, the median of the repeats is reported.
+With --max-ms the script exits with 1 if the import takes longer, e.g. to guard the import time in CI.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def time_command(code: str, repeat: int) -> list:
+    """Wall clock times in ms of running code in a fresh interpreter"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    # warm up, compiles the byte code once
+    time_command("import labelled_numerics", 1)
+    interpreter = statistics.median(time_command("pass", args.repeat))
+    total = statistics.median(time_command("import labelled_numerics", args.repeat))
+    import_ms = total - interpreter
+    print(f"interpreter start up: {interpreter:8.2f} ms")
+    print(f"import labelled_numerics: {import_ms:8.2f} ms (median of {args.repeat})")
+    if args.max_ms is not None and import_ms > args.max_ms:
+        print(f"import takes longer than {args.max_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Throughput of the conversion server with and without micro-batching, clients and server on localhost.
+
+    python benchmarks/bench_server.py --clients 20 --requests 2000 --batch-sizes 1 64 256
+
+Every client opens a connection and sends its requests pipelined (without waiting for the responses). The server runs
+in its own process, batch size 1 is the server without batching.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+
+from labelled_numerics.server import ConversionServer  # noqa: E402
+
+
+def serve(batch_size: int, max_wait: float, ready):
+    async def run():
+        server = ConversionServer(batch_size, max_wait)
+        await server.start()
+        ready.send(server.address)
+        await server.serve_forever()
+
+    asyncio.run(run())
+
+
+async def client(address, requests: int, op: str) -> int:
+    reader, writer = await asyncio.open_connection(*address)
+    values = [
+        f"C{number % 30 + 1}H{number % 60 + 1}O" if op == "mass" else number % 4000
+        for number in range(requests)
+    ]
+    writer.write(
+        b"".join(
+            json.dumps({"id": index, "op": op, "value": value}).encode() + b"\n"
+            for index, value in enumerate(values)
+        )
+    )
+    await writer.drain()
+    for _ in range(requests):
+        await reader.readline()
+    writer.close()
+    return requests
+
+
+async def load(address, clients: int, requests: int, op: str) -> float:
+    start = time.perf_counter()
+    done = await asyncio.gather(
+        *(client(address, requests, op) for _ in range(clients))
+    )
+    return sum(done) / (time.perf_counter() - start)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument(
+        "--requests", type=int, default=2000, help="requests per client"
+    )
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 256])
+    parser.add_argument("--max-wait", type=float, default=2, help="in milliseconds")
+    parser.add_argument("--op", default="arab2roman", choices=["arab2roman", "mass"])
+    args = parser.parse_args(argv)
+
+    for batch_size in args.batch_sizes:
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(
+            target=serve, args=(batch_size, args.max_wait / 1000, sender), daemon=True
+        )
+        process.start()
+        address = receiver.recv()
+        asyncio.run(load(address, 1, 100, args.op))  # warm up
+        rate = asyncio.run(load(address, args.clients, args.requests, args.op))
+        print(f"batch size {batch_size:>5}: {rate:>10,.0f} requests/s")
+        process.terminate()
+        process.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Scaling of conversions with threads: map_convert with more workers, and many I/O-bound caller threads.
+
+    python benchmarks/bench_threads.py --threads 1 2 4 8
+
+cpu: one map_convert call converting --values numbers with 1, 2, 4, ... worker threads. Scales with the number of cores
+on free-threaded builds of CPython (python3.13t, see "GIL" in the output), with the GIL it stays flat.
+io: every caller thread waits --io-ms (like a request handler waiting for a database or socket) and then converts a
+batch of --batch values. Waiting threads release the GIL, so this scales on regular builds as well.
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+
+from labelled_numerics import RomanNumbers, disable_cache, map_convert  # noqa: E402
+
+
+def cpu_bound(numbers: list, workers: int) -> float:
+    start = time.perf_counter()
+    map_convert(
+        numbers,
+        "num2label",
+        workers=workers,
+        chunk_size=256,
+        conversion_dict=RomanNumbers.conversion_dict,
+        sep=" ",
+    )
+    return len(numbers) / (time.perf_counter() - start)
+
+
+def io_bound(numbers: list, threads: int, rounds: int, io_ms: float) -> float:
+    def handler():
+        for _ in range(rounds):
+            time.sleep(io_ms / 1000)
+            map_convert(numbers, "roman2arab")
+
+    workers = [threading.Thread(target=handler) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return threads * rounds * len(numbers) / (time.perf_counter() - start)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--values", type=int, default=50000)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--io-ms", type=float, default=2)
+    args = parser.parse_args(argv)
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}")
+    disable_cache()  # time the conversions, not the cache
+    rng = random.Random(0)
+    numbers = rng.choices(range(4000), k=args.values)
+    numerals = RomanNumbers.arab2roman_batch(
+        rng.choices(range(4000), k=args.batch)
+    ).tolist()
+    map_convert(numerals, "roman2arab")  # warm up, builds the lookup tables
+    base_cpu = base_io = None
+    for threads in args.threads:
+        cpu = cpu_bound(numbers, threads)
+        io = io_bound(numerals, threads, args.rounds, args.io_ms)
+        base_cpu = base_cpu or cpu
+        base_io = base_io or io
+        print(
+            f"{threads:>3} threads   cpu {cpu:>12,.0f} values/s ({cpu / base_cpu:4.1f}x)"
+            f"   io {io:>12,.0f} values/s ({io / base_io:4.1f}x)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Run the benchmark suite, save baselines and compare against them.
+
+    python benchmarks/run.py                                # run all cases and print the timings
+    python benchmarks/run.py -k roman --sizes 100           # only cases containing "roman", only size 100
+    python benchmarks/run.py --save baselines/local.json    # save the timings as a baseline
+    python benchmarks/run.py --compare baselines/local.json # regression report against a baseline
+
+Timings are the best time per call over --repeat rounds, every round runs the case as often as needed to take at
+least --min-time seconds. With --compare the script exits with 1 if a case got slower by more than --threshold,
+e.g. 0.1 for 10 %. Baselines are machine specific, compare only timings taken on the same machine
+(baselines/initial.json was taken on the code before the caching and lookup table work, see "machine" in the file).
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+# run against the checkout, not an installed version
+sys.path.insert(0, str(HERE.parent))
+
+from suite import CASES  # noqa: E402
+
+import labelled_numerics  # noqa: E402
+
+
+def measure(function, repeat: int = 5, min_time: float = 0.2) -> float:
+    """Best time per call in seconds"""
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    number = max(1, round(number * min_time / elapsed))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(
+    keyword: str = "", sizes: list = None, repeat: int = 5, min_time: float = 0.2
+) -> dict:
+    """Timings of all selected cases, keyed by "name[size]"
+    :param keyword: only run cases whose name contains keyword, defaults to ""
+    :type keyword: str, optional
+    :param sizes: only run these sizes, defaults to None (all sizes of a case)
+    :type sizes: list[int], optional
+    :return: seconds per call
+    :rtype: dict[str, float]
+    """
+    # memoization would only time the cache (older versions have no cache)
+    if hasattr(labelled_numerics, "disable_cache"):
+        labelled_numerics.disable_cache()
+    results = {}
+    for name, (factory, case_sizes) in CASES.items():
+        if keyword not in name:
+            continue
+        for size in case_sizes:
+            if sizes and size not in sizes:
+                continue
+            key = f"{name}[{size}]"
+            try:
+                function = factory(size)
+            except ImportError as error:  # case of a newer version than the checkout
+                print(f"{key:<36}{'skipped':>12}  ({error})", flush=True)
+                continue
+            results[key] = measure(function, repeat, min_time)
+            print(f"{key:<36}{format_time(results[key]):>12}", flush=True)
+    return results
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def save(results: dict, path: Path):
+    baseline = {
+        "version": labelled_numerics.__version__,
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(baseline, indent=2) + "\n")
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.1) -> list:
+    """Print a report of the timings relative to the baseline.
+    :return: keys of the cases that got slower by more than threshold
+    :rtype: list[str]
+    """
+    print(
+        f"\ncompared to baseline of version {baseline['version']} ({baseline['created']}, python {baseline['python']})"
+    )
+    print(f"{'case':<36}{'baseline':>12}{'now':>12}{'ratio':>9}")
+    regressions = []
+    for key, seconds in results.items():
+        before = baseline["results"].get(key)
+        if before is None:
+            print(f"{key:<36}{'-':>12}{format_time(seconds):>12}{'new':>9}")
+            continue
+        ratio = seconds / before
+        if ratio > 1 + threshold:
+            status = "  slower"
+            regressions.append(key)
+        elif ratio < 1 / (1 + threshold):
+            status = "  faster"
+        else:
+            status = ""
+        print(
+            f"{key:<36}{format_time(before):>12}{format_time(seconds):>12}{ratio:>8.2f}x{status}"
+        )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-k", "--keyword", default="", help="only cases containing this"
+    )
+    parser.add_argument("--sizes", type=int, nargs="*", help="only these input sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--save", type=Path, help="save the timings to this json file")
+    parser.add_argument("--compare", type=Path, help="baseline json file to compare to")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    results = run(args.keyword, args.sizes, args.repeat, args.min_time)
+    if args.save:
+        save(results, args.save)
+    if args.compare:
+        regressions = compare(
+            results, json.loads(args.compare.read_text()), args.threshold
+        )
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""Benchmark cases of the conversion and search hot paths.
+
+Every case is a factory taking the input size and returning the function to time, one call of that function is one
+benchmark iteration. Inputs are built in the factory, so only the work on them is measured. Factories of cases using
+newer parts of the package import them themselves, on older checkouts they raise ImportError and the case is skipped.
+"""
+import random
+import tempfile
+from pathlib import Path
+
+from labelled_numerics import LabelledNumerics, RomanNumbers
+
+ORGANIC_ATOMS = {
+    "H": 1,
+    "C": 12,
+    "N": 14,
+    "O": 16,
+    "F": 19,
+    "P": 31,
+    "S": 32,
+    "Cl": 35,
+    "Br": 80,
+    "I": 127,
+}
+
+# name -> (factory, sizes)
+CASES = {}
+
+
+def case(name: str, sizes: list):
+    """Register a benchmark factory under name, run once for every size"""
+
+    def register(factory):
+        CASES[name] = (factory, sizes)
+        return factory
+
+    return register
+
+
+def _newer(owner, name: str):
+    """Attribute of a newer version of the package, ImportError (the case is skipped) on older checkouts"""
+    try:
+        return getattr(owner, name)
+    except AttributeError:
+        raise ImportError(f"{owner.__name__}.{name} is not available") from None
+
+
+def _numbers(size: int) -> list:
+    # fixed seed, runs are comparable
+    return random.Random(size).choices(range(1, 4000), k=size)
+
+
+def _formula(size: int) -> str:
+    rng = random.Random(size)
+    return "".join(
+        rng.choice(list(ORGANIC_ATOMS)) + str(rng.randint(1, 12)) for _ in range(size)
+    )
+
+
+def _sorted_formula(size: int) -> str:
+    # labels in descending order of their values, the input formate_chunky expects when sorted_inv is True
+    rng = random.Random(size)
+    atoms = sorted(ORGANIC_ATOMS, key=ORGANIC_ATOMS.get, reverse=True)
+    return "".join(atom * rng.randint(1, size) for atom in atoms)
+
+
+@case("roman_construct", [10, 100, 1000])
+def roman_construct(size: int):
+    labels = [RomanNumbers.arab2roman(number) for number in _numbers(size)]
+    return lambda: [RomanNumbers(label) for label in labels]
+
+
+@case("roman_from_int", [10, 100, 1000])
+def roman_from_int(size: int):
+    from_int = _newer(RomanNumbers, "from_int")
+    numbers = _numbers(size)
+    return lambda: [from_int(number).nice_label for number in numbers]
+
+
+@case("roman_accumulate", [10, 100, 1000])
+def roman_accumulate(size: int):
+    if not isinstance(RomanNumbers("I") + RomanNumbers("I"), RomanNumbers):
+        raise ImportError(
+            "arithmetic on RomanNumbers returning Roman numbers is not available"
+        )
+    numbers = [RomanNumbers(label) for label in ("I", "II", "III", "I")] * (
+        size // 4 + 1
+    )
+    numbers = numbers[:size]
+
+    def accumulate():
+        total = RomanNumbers("zero")
+        for number in numbers:
+            total = total + number
+        return total.nice_label
+
+    return accumulate
+
+
+@case("arab2roman", [10, 100, 1000])
+def arab2roman(size: int):
+    numbers = _numbers(size)
+    return lambda: [RomanNumbers.arab2roman(number) for number in numbers]
+
+
+@case("roman2arab", [10, 100, 1000])
+def roman2arab(size: int):
+    labels = [RomanNumbers.arab2roman(number) for number in _numbers(size)]
+    return lambda: [RomanNumbers.roman2arab(label) for label in labels]
+
+
+@case("formate_chunky_sorted", [10, 100, 1000])
+def formate_chunky_sorted(size: int):
+    text = _sorted_formula(size)
+    return lambda: LabelledNumerics.formate_chunky(text, ORGANIC_ATOMS)
+
+
+@case("formate_chunky_long_numeral", [100, 1000, 3000])
+def formate_chunky_long_numeral(size: int):
+    # one long Roman numeral, e.g. "MMM...CMXCIX"
+    codec = _newer(RomanNumbers, "codec")
+    text = "M" * size + "CMXCIX"
+    return lambda: LabelledNumerics.formate_chunky(text, codec)
+
+
+@case("formate_chunky_unsorted", [10, 100, 1000])
+def formate_chunky_unsorted(size: int):
+    text = LabelledNumerics.convert_formula(_formula(size))
+    return lambda: LabelledNumerics.formate_chunky(
+        text, ORGANIC_ATOMS, sorted_inv=False
+    )
+
+
+@case("convert_formula", [10, 100, 1000])
+def convert_formula(size: int):
+    formula = _formula(size)
+    return lambda: LabelledNumerics.convert_formula(formula)
+
+
+@case("formula_counts", [10, 100, 1000])
+def formula_counts(size: int):
+    counts = _newer(LabelledNumerics, "formula_counts")
+    formula = _formula(size)
+    return lambda: counts(formula)
+
+
+@case("condensed_name", [10, 100, 1000])
+def condensed_name(size: int):
+    # a new molecule per call, the condensed name is cached per instance
+    name = LabelledNumerics.formate_chunky(
+        LabelledNumerics.convert_formula(_formula(size)),
+        ORGANIC_ATOMS,
+        sorted_inv=False,
+    )
+    return lambda: LabelledNumerics(name, ORGANIC_ATOMS).condensed_name
+
+
+@case("replace_all_arabs", [10, 100, 1000])
+def replace_all_arabs(size: int):
+    text = " ".join(
+        f"In {number} there were {number % 97} ships." for number in _numbers(size)
+    )
+    return lambda: RomanNumbers.replace_all_arabs(text)
+
+
+@case("get_combinations", [50, 100, 150, 200])
+def get_combinations(mass: int):
+    return lambda: LabelledNumerics.get_combinations(mass, ORGANIC_ATOMS)
+
+
+@case("labelled_array", [100, 150, 200])
+def labelled_array(mass: int):
+    from labelled_numerics import LabelledArray
+
+    combinations = LabelledNumerics.get_combinations(mass, ORGANIC_ATOMS)
+
+    def process():
+        array = LabelledArray.from_combinations(combinations, ORGANIC_ATOMS)
+        return array.filter(array.n_labels < 30).sort_by_value().condensed_names()
+
+    return process
+
+
+@case("composition_index", [100, 150, 200])
+def composition_index(mass: int):
+    from labelled_numerics import CompositionIndex
+
+    # the same compositions as get_combinations, read from an index built here instead of searched.
+    # The directory lives as long as the timed function, it is removed when the function is gone
+    directory = tempfile.TemporaryDirectory()
+    index = CompositionIndex.build(
+        Path(directory.name) / "organic.idx", mass, ORGANIC_ATOMS
+    )
+
+    def lookup(directory=directory):
+        return index.lookup_range(mass - 0.5, mass + 0.5).condensed_names()
+
+    return lookup
@@ -1,9 +1,26 @@
+from .parallel import map_convert
 from .roman_numbers import RomanNumbers
+from .utils.cache import cache_info, clear_cache, disable_cache, enable_cache
+from .utils.codec import LabelCodec, compile_dictionary
+from .utils.composition_index import CompositionIndex
+from .utils.labelled_array import LabelledArray
 from .utils.labelled_numerics import LabelledNumerics
+from .utils.metrics import Collector, collect
 
 __all__ = [
+    "Collector",
+    "CompositionIndex",
+    "LabelCodec",
+    "LabelledArray",
     "LabelledNumerics",
     "RomanNumbers",
+    "cache_info",
+    "clear_cache",
+    "collect",
+    "compile_dictionary",
+    "disable_cache",
+    "enable_cache",
+    "map_convert",
 ]  # API
 
 __version__ = "0.8.0"  # version of package
@@ -0,0 +1,5 @@
+import sys
+
+from labelled_numerics.cli import main
+
+sys.exit(main())
@@ -0,0 +1,425 @@
+"""Command line interface for bulk conversions of streamed values.
+
+    labelled-numerics arab2roman numbers.txt                          # one value per line, result per line
+    labelled-numerics roman2arab --csv --column numeral data.csv -o converted.csv
+    labelled-numerics mass --csv --column formula molecules.csv --workers 4
+    cat masses.txt | labelled-numerics count --keys C H N O
+
+Input is read from the files (or stdin) in chunks of --chunk-size rows, each chunk goes through the batch conversion
+paths and is written before the next chunk is read, so memory stays bounded for inputs of any size. With --workers
+the chunks are converted in a process pool (at most two chunks per worker in flight), the output keeps the input order.
+In csv mode the result is appended as a new column (or replaces the converted column with --replace).
+Empty values give empty results. Rows per second are reported on stderr at the end (unless --quiet).
+"""
+from __future__ import annotations
+
+import argparse
+import collections
+import concurrent.futures
+import csv
+import functools
+import itertools
+import json
+import os
+import sys
+import time
+
+from labelled_numerics.roman_numbers import RomanNumbers
+from labelled_numerics.utils.formula import parse_formula
+from labelled_numerics.utils.labelled_numerics import LabelledNumerics
+
+# default dictionary of mass and count (integer masses of the common atoms of organic molecules)
+ORGANIC_ATOMS = {
+    "H": 1,
+    "C": 12,
+    "N": 14,
+    "O": 16,
+    "F": 19,
+    "P": 31,
+    "S": 32,
+    "Cl": 35,
+    "Br": 80,
+    "I": 127,
+}
+
+# errors of invalid values, e.g. "IIII" for roman2arab or "Xy2" for mass
+_CONVERSION_ERRORS = (ValueError, TypeError, KeyError, IndexError, OverflowError)
+
+
+@functools.lru_cache(maxsize=None)
+def _compact_labels():
+    # "MCMXCIX" instead of "M CM XC IX", "zero" stays
+    import numpy as np
+
+    labels = RomanNumbers._get_tables(force=True).nice_labels
+    return np.array([labels[0]] + [label.replace(" ", "") for label in labels[1:]])
+
+
+def _arab2roman(values: list, nice: bool = False, **options) -> list:
+    import numpy as np
+
+    numbers = np.array([int(value) for value in values], dtype=np.int64)
+    labels = RomanNumbers.arab2roman_batch(numbers, nice=True)  # checks the range
+    return (labels if nice else _compact_labels()[numbers]).tolist()
+
+
+def _roman2arab(values: list, **options) -> list:
+    return [str(number) for number in RomanNumbers.roman2arab_batch(values).tolist()]
+
+
+def _mass(values: list, dictionary: dict = None, **options) -> list:
+    # formulas repeat a lot in bulk data, each distinct formula is converted once
+    masses = {
+        formula: str(
+            sum(
+                dictionary[label] * count
+                for label, count in parse_formula(formula, dictionary).items()
+            )
+        )
+        for formula in set(values)
+    }
+    return [masses[formula] for formula in values]
+
+
+# (dictionary items, keys) -> counts of all masses up to len - 1, kept per process over all chunks
+_count_tables = {}
+
+
+def _count(
+    values: list,
+    dictionary: dict = None,
+    keys: list = None,
+    max_mass: int = None,
+    **options,
+) -> list:
+    masses = [int(value) for value in values]
+    cache_key = (tuple(dictionary.items()), None if keys is None else tuple(keys))
+    table = _count_tables.get(cache_key)
+    largest = max(max(masses, default=0), 0)  # negative masses have no compositions
+    if max_mass is not None and largest > max_mass:
+        # the table holds every mass up to the largest, one huge mass would take all memory
+        raise ValueError(f"mass {largest} exceeds the maximum {max_mass}")
+    if table is None or largest >= len(table):
+        # grow at least by doubling (up to max_mass), a slowly rising mass column does not rebuild the table every chunk
+        size = largest if table is None else max(largest, 2 * (len(table) - 1))
+        if max_mass is not None:
+            size = min(size, max_mass)
+        table = LabelledNumerics.count_combinations_range(
+            size, dictionary, selected_keys=keys, dtype=object
+        )
+        _count_tables[cache_key] = table
+    return [str(table[mass]) if mass >= 0 else "0" for mass in masses]
+
+
+# command -> (conversion of a list of values, default name of the result column)
+COMMANDS = {
+    "arab2roman": (_arab2roman, "roman"),
+    "roman2arab": (_roman2arab, "arab"),
+    "mass": (_mass, "mass"),
+    "count": (_count, "count"),
+}
+
+
+def convert_chunk(command: str, options: dict, values: list) -> tuple[list, list]:
+    """Convert one chunk of values (runs in the worker processes with --workers).
+    :param command: name of the conversion, key of COMMANDS
+    :type command: str
+    :param options: keyword arguments of the conversion, e.g. {"nice": True}
+    :type options: dict
+    :param values: values of the chunk
+    :type values: list[str]
+    :return: results (None for invalid values) and (index, message) of the invalid values
+    :rtype: tuple[list[str], list[tuple[int, str]]]
+    """
+    conversion = COMMANDS[command][0]
+    values = [value.strip() for value in values]
+    filled = [index for index, value in enumerate(values) if value]
+    results = [""] * len(values)
+    try:
+        converted = conversion([values[index] for index in filled], **options)
+    except _CONVERSION_ERRORS:
+        converted = None
+    if converted is not None:
+        for index, result in zip(filled, converted):
+            results[index] = result
+        return results, []
+    # at least one invalid value, convert one by one to find it (only chunks with errors pay for this)
+    errors = []
+    for index in filled:
+        try:
+            results[index] = conversion([values[index]], **options)[0]
+        except _CONVERSION_ERRORS as error:
+            results[index] = None
+            errors.append((index, f"invalid value {values[index]!r} ({error!r})"))
+    return results, errors
+
+
+def _open_inputs(paths: list):
+    for path in paths or ["-"]:
+        if path == "-":
+            yield sys.stdin
+        else:
+            with open(path, newline="") as file:
+                yield file
+
+
+def _read_lines(paths: list):
+    for file in _open_inputs(paths):
+        for line in file:
+            yield line.rstrip("\r\n")
+
+
+def _read_csv(paths: list, delimiter: str):
+    """Header of the first input, then the rows of all inputs (headers of further inputs are skipped)"""
+    if "-" in (paths or ["-"]) and hasattr(sys.stdin, "reconfigure"):
+        # newline="" as for the files, the csv module handles line endings (and newlines inside quoted cells) itself
+        sys.stdin.reconfigure(newline="")
+    header = None
+    for file in _open_inputs(paths):
+        reader = csv.reader(file, delimiter=delimiter)
+        first = next(reader, None)
+        if header is None:
+            header = first
+            yield header
+        yield from reader
+
+
+def _column_index(header: list, column: str) -> int:
+    if column in header:
+        return header.index(column)
+    try:
+        index = int(column)
+    except ValueError:
+        raise ValueError(f"column {column!r} is not in the header {header}") from None
+    if not -len(header) <= index < len(header):
+        raise ValueError(
+            f"column index {index} is out of range ({len(header)} columns)"
+        )
+    return index
+
+
+def _chunks(rows, size: int):
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _converted_chunks(chunks, convert, workers: int = None):
+    """(chunk, results, errors) in input order, with workers at most 2 chunks per worker are in flight"""
+    if workers is None or workers <= 1:
+        for chunk, values in chunks:
+            yield (chunk, *convert(values))
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        for chunk, values in chunks:
+            pending.append((chunk, pool.submit(convert, values)))
+            if len(pending) >= 2 * workers:
+                chunk, future = pending.popleft()
+                yield (chunk, *future.result())
+        while pending:
+            chunk, future = pending.popleft()
+            yield (chunk, *future.result())
+
+
+def load_dictionary(path: str) -> dict:
+    with open(path) as file:
+        dictionary = json.load(file)
+    if not isinstance(dictionary, dict) or not all(
+        isinstance(value, int) for value in dictionary.values()
+    ):
+        raise ValueError(f"{path} must contain a json object of label: int")
+    return dictionary
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="labelled-numerics",
+        description=__doc__.splitlines()[0],
+        epilog=__doc__.split("\n\n", 1)[1],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "command",
+        choices=list(COMMANDS),
+        help="arabic to Roman numbers, Roman to arabic numbers, formula to mass, mass to number of compositions",
+    )
+    parser.add_argument(
+        "inputs", nargs="*", help="input files, defaults to stdin (also -)"
+    )
+    parser.add_argument("-o", "--output", help="output file, defaults to stdout")
+    parser.add_argument(
+        "--csv", action="store_true", help="inputs are csv files with a header"
+    )
+    parser.add_argument(
+        "--column",
+        default="0",
+        help="csv column to convert (name or index), defaults to 0",
+    )
+    parser.add_argument("--delimiter", default=",", help="csv delimiter, defaults to ,")
+    parser.add_argument(
+        "--replace",
+        action="store_true",
+        help="replace the csv column instead of adding one",
+    )
+    parser.add_argument(
+        "--output-column",
+        help="name of the added csv column, defaults to the kind of result",
+    )
+    parser.add_argument(
+        "--nice",
+        action="store_true",
+        help="arab2roman: write 'M CM XC IX' instead of 'MCMXCIX'",
+    )
+    parser.add_argument(
+        "--dictionary",
+        help="mass, count: json file of label -> int value, defaults to ORGANIC_ATOMS (H, C, N, O, ...)",
+    )
+    parser.add_argument(
+        "--keys", nargs="+", help="count: only use these labels of the dictionary"
+    )
+    parser.add_argument(
+        "--max-mass",
+        type=int,
+        default=100_000,
+        help="count: largest mass, larger masses are invalid values, defaults to 100000",
+    )
+    parser.add_argument(
+        "--on-error",
+        choices=["fail", "skip", "blank"],
+        default="fail",
+        help="invalid values stop the run (fail), drop the row (skip) or give an empty result (blank)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=10000,
+        help="rows per chunk, defaults to 10000",
+    )
+    parser.add_argument(
+        "--workers", type=int, help="number of worker processes, defaults to none"
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="do not report rows per second"
+    )
+    return parser
+
+
+def run(args: argparse.Namespace, output) -> int:
+    """Convert the inputs of args and write to output.
+    :return: number of converted rows
+    :rtype: int
+    """
+    options = {"nice": args.nice}
+    if args.command in ("mass", "count"):
+        options["dictionary"] = (
+            ORGANIC_ATOMS
+            if args.dictionary is None
+            else load_dictionary(args.dictionary)
+        )
+        options["keys"] = args.keys
+    if args.command == "count":
+        options["max_mass"] = args.max_mass
+    convert = functools.partial(convert_chunk, args.command, options)
+
+    if args.csv:
+        rows = _read_csv(args.inputs, args.delimiter)
+        header = next(rows, None)
+        if header is None:
+            return 0
+        column = _column_index(header, args.column)
+        writer = csv.writer(output, delimiter=args.delimiter, lineterminator="\n")
+        if not args.replace:
+            header = header + [args.output_column or COMMANDS[args.command][1]]
+        writer.writerow(header)
+        chunks = (
+            (chunk, [_cell(row, column) for row in chunk])
+            for chunk in _chunks(rows, args.chunk_size)
+        )
+    else:
+        chunks = (
+            (chunk, chunk)
+            for chunk in _chunks(_read_lines(args.inputs), args.chunk_size)
+        )
+
+    row_count = 0
+    for chunk, results, errors in _converted_chunks(chunks, convert, args.workers):
+        if errors and args.on_error == "fail":
+            index, message = errors[0]
+            raise ValueError(f"row {row_count + index + 1}: {message}")
+        if args.on_error == "skip":
+            kept = [
+                (row, result)
+                for row, result in zip(chunk, results)
+                if result is not None
+            ]
+        else:
+            kept = [
+                (row, "" if result is None else result)
+                for row, result in zip(chunk, results)
+            ]
+        if not args.csv:
+            output.writelines(result + "\n" for _, result in kept)
+        elif args.replace:
+            writer.writerows(_replaced(row, column, result) for row, result in kept)
+        else:
+            writer.writerows(row + [result] for row, result in kept)
+        row_count += len(chunk)
+    return row_count
+
+
+def _cell(row: list, column: int) -> str:
+    # short rows (missing trailing cells) count as empty values
+    try:
+        return row[column]
+    except IndexError:
+        return ""
+
+
+def _replaced(row: list, column: int, result: str) -> list:
+    row = list(row)
+    if column >= len(row):
+        row.extend([""] * (column + 1 - len(row)))
+    row[column] = result
+    return row
+
+
+def main(argv: list = None) -> int:
+    parser = build_parser()
+    args = parser.parse_intermixed_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be >= 1")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be >= 1")
+
+    start = time.perf_counter()
+    output = sys.stdout
+    try:
+        if args.output is not None:
+            output = open(args.output, "w", newline="")
+        row_count = run(args, output)
+    except BrokenPipeError:
+        # output closed early, e.g. piped into head, python would fail again flushing stdout at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (ValueError, OSError) as error:
+        print(f"labelled-numerics {args.command}: {error}", file=sys.stderr)
+        return 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - start
+    if not args.quiet:
+        print(
+            f"labelled-numerics {args.command}: {row_count} rows in {elapsed:.2f} s "
+            f"({row_count / elapsed if elapsed else 0:,.0f} rows/s)",
+            file=sys.stderr,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
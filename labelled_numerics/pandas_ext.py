@@ -0,0 +1,664 @@
+"""pandas extension dtypes for Roman numbers and compositions of labelled numerics.
+
+Importing this module (needs pandas) registers the dtypes, e.g.
+
+    import labelled_numerics.pandas_ext
+    numbers = pd.Series([1999, 4, 1050], dtype="roman")
+    molecules = pd.Series(["H H O", "C O O"], dtype=CompositionDtype(organic_atoms))
+
+Roman numbers are stored as int64 values, compositions as count matrix (one row per composition, see LabelledArray).
+Construction, formatting, comparisons, arithmetic, sorting and grouping work on these arrays, elements are only
+turned into RomanNumbers / LabelledNumerics objects when they are accessed one by one.
+"""
+from __future__ import annotations
+
+import abc
+import numbers
+import operator
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import (
+    ExtensionArray,
+    ExtensionDtype,
+    register_extension_dtype,
+    take,
+)
+
+from labelled_numerics.roman_numbers import RomanNumbers
+from labelled_numerics.utils.codec import LabelCodec
+from labelled_numerics.utils.labelled_array import LabelledArray
+from labelled_numerics.utils.labelled_numerics import LabelledNumerics
+
+
+def _is_na(value) -> bool:
+    return (
+        value is None
+        or value is pd.NA
+        or (isinstance(value, float) and np.isnan(value))
+    )
+
+
+def _as_array(values, dtype, copy: bool) -> np.ndarray:
+    return np.array(values, dtype=dtype) if copy else np.asarray(values, dtype=dtype)
+
+
+class _MaskedArray(ExtensionArray, abc.ABC):
+    """Shared part of the arrays: values stored in self._data (first axis = elements) and a missing value mask"""
+
+    _data: np.ndarray
+    _mask: np.ndarray
+
+    @abc.abstractmethod
+    def _new(self, data: np.ndarray, mask: np.ndarray):
+        """Array of the same dtype holding data and mask (not copied, not checked)"""
+
+    def __len__(self) -> int:
+        return len(self._mask)
+
+    def isna(self) -> np.ndarray:
+        return self._mask.copy()
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes + self._mask.nbytes
+
+    def copy(self):
+        return self._new(self._data.copy(), self._mask.copy())
+
+    def take(self, indices, *, allow_fill: bool = False, fill_value=None):
+        if allow_fill and fill_value is not None and not _is_na(fill_value):
+            raise ValueError(
+                f"{type(self).__name__} can only be filled with missing values"
+            )
+        data = take(self._data, indices, allow_fill=allow_fill, fill_value=0, axis=0)
+        mask = take(self._mask, indices, allow_fill=allow_fill, fill_value=True)
+        return self._new(data, mask)
+
+    @classmethod
+    def _concat_same_type(cls, to_concat):
+        first = to_concat[0]
+        return first._new(
+            np.concatenate([array._data for array in to_concat]),
+            np.concatenate([array._mask for array in to_concat]),
+        )
+
+    def __setitem__(self, key, value):
+        other = self._from_sequence(
+            [value]
+            if np.ndim(value) == 0 or isinstance(value, LabelledNumerics)
+            else value,
+            dtype=self.dtype,
+        )
+        if len(other) == 1:
+            self._data[key] = other._data[0]
+            self._mask[key] = other._mask[0]
+        else:
+            self._data[key] = other._data
+            self._mask[key] = other._mask
+
+    @abc.abstractmethod
+    def _scalar(self, data):
+        """Element of the array (not missing) from its stored data"""
+
+    def __getitem__(self, item):
+        if isinstance(item, numbers.Integral):
+            return pd.NA if self._mask[item] else self._scalar(self._data[item])
+        item = pd.api.indexers.check_array_indexer(self, item)
+        return self._new(self._data[item], self._mask[item])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    # duplicates and counts from the factorized values, the elements are never compared as objects
+
+    def duplicated(self, keep="first") -> np.ndarray:
+        codes, _ = self.factorize()  # missing values are -1, one more value here
+        return pd.Series(codes).duplicated(keep=keep).to_numpy()
+
+    def unique(self):
+        return self[~self.duplicated()]
+
+    def value_counts(self, dropna: bool = True) -> pd.Series:
+        codes, uniques = self.factorize()
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        if not dropna and self._mask.any():
+            uniques = uniques._concat_same_type([uniques, self[self._mask][:1]])
+            counts = np.append(counts, self._mask.sum())
+        return pd.Series(counts, index=pd.Index(uniques), name="count")
+
+    def _boolean_result(self, result: np.ndarray, mask: np.ndarray):
+        return pd.arrays.BooleanArray(result, mask)
+
+
+class RomanDtype(ExtensionDtype):
+    """Dtype of Roman numbers 0-3999 stored as int64 values"""
+
+    name = "roman"
+    type = RomanNumbers
+    kind = "O"
+    na_value = pd.NA
+
+    @classmethod
+    def construct_array_type(cls):
+        return RomanArray
+
+    @property
+    def _is_numeric(self) -> bool:
+        return True
+
+
+register_extension_dtype(RomanDtype)
+
+
+class RomanArray(_MaskedArray):
+    """Roman numbers stored as int64 values (and a mask of missing values)"""
+
+    def __init__(self, values, mask=None, copy: bool = False):
+        values = _as_array(values, np.int64, copy)
+        mask = (
+            np.zeros(len(values), dtype=bool)
+            if mask is None
+            else _as_array(mask, bool, copy)
+        )
+        valid = values[~mask]
+        if valid.size and (valid.min() < 0 or valid.max() > RomanNumbers._max_value):
+            raise ValueError(
+                f"Numbers are not in valid range (0-{RomanNumbers._max_value})."
+            )
+        self._data = values
+        self._mask = mask
+
+    def _new(self, data, mask):
+        array = RomanArray.__new__(RomanArray)
+        array._data = data
+        array._mask = mask
+        return array
+
+    @property
+    def dtype(self) -> RomanDtype:
+        return RomanDtype()
+
+    @classmethod
+    def _from_sequence(cls, scalars, *, dtype=None, copy: bool = False):
+        """Roman numbers from integers, Roman numerals (str) or RomanNumbers, missing values are None, nan or pd.NA"""
+        if isinstance(scalars, RomanArray):
+            return scalars.copy() if copy else scalars
+        if isinstance(scalars, (pd.Series, pd.Index)):
+            scalars = scalars.array
+        if isinstance(scalars, np.ndarray) and scalars.dtype.kind in "iu":
+            return cls(scalars, copy=copy)
+        if isinstance(scalars, pd.arrays.IntegerArray):
+            return cls(scalars._data, scalars._mask, copy=True)
+        scalars = np.asarray(
+            list(scalars) if not isinstance(scalars, np.ndarray) else scalars,
+            dtype=object,
+        )
+        # every distinct scalar is converted once, missing values get the code -1
+        codes, uniques = pd.factorize(scalars)
+        converted = np.zeros(len(uniques) + 1, dtype=np.int64)
+        for index, scalar in enumerate(uniques):
+            if isinstance(scalar, RomanNumbers):
+                scalar = scalar.arab
+            elif isinstance(scalar, str):
+                scalar = RomanNumbers.roman2arab(scalar)
+            if not isinstance(scalar, numbers.Integral) or isinstance(scalar, bool):
+                raise TypeError(f"{scalar!r} is not an integer Roman number")
+            converted[index] = scalar
+        return cls(converted[codes], codes < 0)
+
+    @classmethod
+    def _from_sequence_of_strings(cls, strings, *, dtype=None, copy: bool = False):
+        return cls._from_sequence(strings, dtype=dtype, copy=copy)
+
+    @classmethod
+    def _from_factorized(cls, values, original):
+        return cls(values)
+
+    def _values_for_factorize(self):
+        return np.where(self._mask, -1, self._data), -1
+
+    def _values_for_argsort(self) -> np.ndarray:
+        return self._data
+
+    def _scalar(self, value) -> RomanNumbers:
+        return RomanNumbers.from_int(int(value))
+
+    def _integers(self) -> pd.arrays.IntegerArray:
+        # the same values as nullable integers (no copy), used for reductions and grouping
+        return pd.arrays.IntegerArray(self._data, self._mask)
+
+    def labels(self, nice: bool = True) -> np.ndarray:
+        """Roman numerals of all numbers (None for missing values), looked up in the tables at once"""
+        result = np.empty(len(self), dtype=object)
+        result[~self._mask] = RomanNumbers.arab2roman_batch(
+            self._data[~self._mask], nice=nice
+        )
+        return result
+
+    def _formatter(self, boxed: bool = False):
+        return lambda number: str(number) if number is pd.NA else number.nice_label
+
+    def astype(self, dtype, copy: bool = True):
+        dtype = pd.api.types.pandas_dtype(dtype)
+        if isinstance(dtype, RomanDtype):
+            return self.copy() if copy else self
+        if (
+            dtype == np.dtype(object)
+            or isinstance(dtype, pd.StringDtype)
+            or dtype.kind == "U"
+        ):
+            labels = self.labels()
+            labels[self._mask] = np.nan if dtype.kind == "U" else pd.NA
+            if isinstance(dtype, pd.StringDtype):
+                return pd.array(labels, dtype=dtype)
+            return labels.astype(dtype)
+        return self._integers().astype(dtype, copy=copy)
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is not None and np.dtype(dtype).kind in "iuf":
+            if self._mask.any():
+                raise ValueError(
+                    "cannot convert missing Roman numbers to a numpy number array"
+                )
+            return self._data.astype(dtype)
+        return np.array([self[index] for index in range(len(self))], dtype=object)
+
+    def _operand(self, other):
+        """int64 values and mask of the other operand, None if not supported"""
+        if isinstance(other, (pd.Series, pd.Index, pd.DataFrame)):
+            return None  # pandas unpacks them and calls again
+        if isinstance(other, RomanArray):
+            return other._data, other._mask
+        if isinstance(other, RomanNumbers):
+            if not isinstance(other.arab, int):
+                return None
+            return np.int64(other.arab), False
+        if isinstance(other, numbers.Integral) and not isinstance(other, bool):
+            return np.int64(other), False
+        if isinstance(other, (list, np.ndarray, ExtensionArray)):
+            other = (
+                RomanArray._from_sequence(other)
+                if not isinstance(other, np.ndarray) or other.dtype.kind not in "iu"
+                else other
+            )
+            if isinstance(other, RomanArray):
+                return other._data, other._mask
+            return other.astype(np.int64), False
+        return None
+
+    def _arithmetic(self, other, operation, reflected: bool = False):
+        operand = self._operand(other)
+        if operand is None:
+            return NotImplemented
+        values, mask = operand
+        mask = self._mask | mask
+        left, right = (values, self._data) if reflected else (self._data, values)
+        if operation in (operator.floordiv, operator.mod, operator.truediv) and np.any(
+            (right == 0) & ~mask
+        ):
+            raise ZeroDivisionError("division by zero")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = operation(left, right)
+        if operation is operator.truediv:
+            # quotients are rarely Roman numbers, plain numbers as for RomanNumbers
+            return pd.arrays.FloatingArray(np.where(mask, 0.0, result), mask)
+        result = np.where(mask, 0, result)
+        return RomanArray(result, mask)
+
+    def _compare(self, other, operation):
+        operand = self._operand(other)
+        if operand is None:
+            return NotImplemented
+        values, mask = operand
+        mask = self._mask | mask
+        return self._boolean_result(operation(self._data, values) & ~mask, mask)
+
+    def _reduce(
+        self, name: str, *, skipna: bool = True, keepdims: bool = False, **kwargs
+    ):
+        result = self._integers()._reduce(
+            name, skipna=skipna, keepdims=keepdims, **kwargs
+        )
+        # minimum and maximum are Roman numbers, sums, means, ... plain numbers (they leave the domain quickly)
+        if name in ("min", "max"):
+            if keepdims:
+                return RomanArray._from_sequence(list(result))
+            return pd.NA if result is pd.NA else RomanNumbers.from_int(int(result))
+        return result
+
+    def _groupby_op(
+        self,
+        *,
+        how: str,
+        has_dropped_na: bool,
+        min_count: int,
+        ngroups: int,
+        ids,
+        **kwargs,
+    ):
+        result = self._integers()._groupby_op(
+            how=how,
+            has_dropped_na=has_dropped_na,
+            min_count=min_count,
+            ngroups=ngroups,
+            ids=ids,
+            **kwargs,
+        )
+        if how in ("min", "max", "first", "last", "cummin", "cummax") and isinstance(
+            result, pd.arrays.IntegerArray
+        ):
+            return RomanArray(result._data, result._mask)
+        return result
+
+
+class CompositionDtype(ExtensionDtype):
+    """Dtype of compositions (e.g. molecules) of the labels of one dictionary, stored as count matrix"""
+
+    type = LabelledNumerics
+    kind = "O"
+    na_value = pd.NA
+    _metadata = ("codec",)
+
+    def __init__(self, conversion_dict: dict[str, int] | LabelCodec):
+        self.codec = LabelledNumerics._checked_codec(conversion_dict)
+
+    @property
+    def name(self) -> str:
+        return f"composition[{', '.join(self.codec.labels)}]"
+
+    @classmethod
+    def construct_from_string(cls, string: str):
+        # the labels alone do not give the values, compositions can only be created with a CompositionDtype instance
+        raise TypeError(f"Cannot construct a 'CompositionDtype' from '{string}'")
+
+    @classmethod
+    def construct_array_type(cls):
+        return CompositionArray
+
+    def __repr__(self):
+        return f"CompositionDtype({self.codec.conversion_dict!r})"
+
+
+class CompositionArray(_MaskedArray):
+    """Compositions stored as count matrix, one row per composition (and a mask of missing values)"""
+
+    def __init__(self, counts, dtype: CompositionDtype, mask=None, copy: bool = False):
+        # LabelledArray checks the shape and the counts (and always copies them)
+        self._data = LabelledArray(counts, dtype.codec)._counts
+        self._mask = (
+            np.zeros(len(self._data), dtype=bool)
+            if mask is None
+            else _as_array(mask, bool, copy)
+        )
+        self._dtype = dtype
+
+    def _new(self, data, mask):
+        array = CompositionArray.__new__(CompositionArray)
+        array._data = data
+        array._mask = mask
+        array._dtype = self._dtype
+        return array
+
+    @property
+    def dtype(self) -> CompositionDtype:
+        return self._dtype
+
+    @classmethod
+    def _from_sequence(cls, scalars, *, dtype=None, copy: bool = False):
+        """Compositions from LabelledNumerics, separator-joined names (str) or a LabelledArray,
+        missing values are None, nan or pd.NA. dtype (a CompositionDtype) is needed unless the dictionary can be
+        taken from the first LabelledNumerics or the LabelledArray.
+        """
+        if isinstance(scalars, CompositionArray):
+            return scalars.copy() if copy else scalars
+        if isinstance(scalars, LabelledArray):
+            dtype = (
+                dtype
+                if isinstance(dtype, CompositionDtype)
+                else CompositionDtype(scalars.conversion)
+            )
+            return cls(scalars._counts, dtype, copy=copy)
+        if isinstance(scalars, (pd.Series, pd.Index)):
+            scalars = scalars.array
+        scalars = list(scalars)
+        if not isinstance(dtype, CompositionDtype):
+            first = next(
+                (scalar for scalar in scalars if isinstance(scalar, LabelledNumerics)),
+                None,
+            )
+            if first is None:
+                raise TypeError(
+                    "compositions need a CompositionDtype (with the dictionary)"
+                )
+            dtype = CompositionDtype(first.conversion)
+        codec = dtype.codec
+        # every distinct scalar is converted once (names all at once), missing values get the code -1
+        objects = np.empty(len(scalars), dtype=object)
+        objects[:] = scalars
+        codes, uniques = pd.factorize(objects)
+        counts = np.zeros((len(uniques) + 1, len(codec.labels)), dtype=np.int64)
+        names = [
+            index for index, scalar in enumerate(uniques) if isinstance(scalar, str)
+        ]
+        if names:
+            counts[names] = LabelledArray.from_names(
+                [uniques[index] for index in names], codec
+            )._counts
+        for index, scalar in enumerate(uniques):
+            if isinstance(scalar, LabelledNumerics):
+                counts[index] = (
+                    scalar.counts
+                    if scalar._codec == codec
+                    else codec.count_vector(scalar._tolist())
+                )
+            elif not isinstance(scalar, str):
+                raise TypeError(f"{scalar!r} is not a composition")
+        return cls(counts[codes], dtype, codes < 0)
+
+    @classmethod
+    def _from_sequence_of_strings(cls, strings, *, dtype=None, copy: bool = False):
+        return cls._from_sequence(strings, dtype=dtype, copy=copy)
+
+    @classmethod
+    def _from_factorized(cls, values, original):
+        width = len(original._dtype.codec.labels)
+        counts = np.frombuffer(b"".join(values), dtype=np.int64).reshape(
+            len(values), width
+        )
+        return original._new(counts.copy(), np.zeros(len(values), dtype=bool))
+
+    def _values_for_factorize(self):
+        # rows as bytes, equal compositions have equal bytes
+        rows = np.ascontiguousarray(self._data).view(
+            np.dtype((np.void, self._data.shape[1] * 8))
+        )
+        values = np.array([row.tobytes() for row in rows.ravel()], dtype=object)
+        values[self._mask] = None
+        return values, None
+
+    def _values_for_argsort(self) -> np.ndarray:
+        # sorted by value
+        return self.sum_values
+
+    def _scalar(self, row) -> LabelledNumerics:
+        return LabelledNumerics.from_counts(row, self._dtype.codec.conversion_dict)
+
+    @property
+    def sum_values(self) -> np.ndarray:
+        """Sum of the values of each composition (0 for missing compositions)"""
+        return self._data @ self._dtype.codec.value_vector
+
+    def to_labelled_array(self) -> LabelledArray:
+        """Compositions (without the missing ones) as LabelledArray"""
+        return LabelledArray(self._data[~self._mask], self._dtype.codec.conversion_dict)
+
+    def condensed_names(self) -> np.ndarray:
+        """Condensed names of all compositions, e.g. "H2O" (None for missing compositions)"""
+        result = np.empty(len(self), dtype=object)
+        result[~self._mask] = LabelledArray(
+            self._data[~self._mask], self._dtype.codec
+        ).condensed_names()
+        return result
+
+    def _formatter(self, boxed: bool = False):
+        return lambda composition: (
+            str(composition) if composition is pd.NA else composition.condensed_name
+        )
+
+    def astype(self, dtype, copy: bool = True):
+        dtype = pd.api.types.pandas_dtype(dtype)
+        if dtype == self._dtype:
+            return self.copy() if copy else self
+        if (
+            dtype == np.dtype(object)
+            or isinstance(dtype, pd.StringDtype)
+            or dtype.kind == "U"
+        ):
+            names = self.condensed_names()
+            names[self._mask] = np.nan if dtype.kind == "U" else pd.NA
+            if isinstance(dtype, pd.StringDtype):
+                return pd.array(names, dtype=dtype)
+            return names.astype(dtype)
+        return super().astype(dtype, copy=copy)
+
+    def __array__(self, dtype=None, copy=None):
+        return np.array([self[index] for index in range(len(self))], dtype=object)
+
+    def _operand(self, other):
+        """count rows and mask of the other composition operand, None if not supported"""
+        if isinstance(other, (pd.Series, pd.Index, pd.DataFrame)):
+            return None
+        if isinstance(other, CompositionArray):
+            if other._dtype != self._dtype:
+                raise ValueError(
+                    "compositions of different dictionaries can not be combined"
+                )
+            return other._data, other._mask
+        if isinstance(other, LabelledNumerics):
+            return (
+                CompositionArray._from_sequence([other], dtype=self._dtype)._data[0],
+                False,
+            )
+        if isinstance(other, (list, np.ndarray, ExtensionArray)) and not (
+            isinstance(other, np.ndarray) and other.dtype.kind in "iu"
+        ):
+            other = CompositionArray._from_sequence(other, dtype=self._dtype)
+            return other._data, other._mask
+        return None
+
+    def _combine(self, other, sign: int):
+        # + joins compositions (e.g. clusters of molecules), - removes a fragment, both on the count vectors
+        operand = self._operand(other)
+        if operand is None:
+            return NotImplemented
+        counts, mask = operand
+        mask = self._mask | mask
+        result = self._data + sign * counts
+        result[mask] = 0
+        if (result < 0).any():
+            raise ValueError("removed composition is not contained")
+        return self._new(result, mask)
+
+    def __add__(self, other):
+        return self._combine(other, 1)
+
+    def __radd__(self, other):
+        return self._combine(other, 1)
+
+    def __sub__(self, other):
+        return self._combine(other, -1)
+
+    def __mul__(self, other):
+        # repeat each composition, e.g. 2 * H2O is H4O2
+        if isinstance(other, numbers.Integral) and not isinstance(other, bool):
+            factor = other
+        elif isinstance(other, np.ndarray) and other.dtype.kind in "iu":
+            factor = other[:, None]
+        else:
+            return NotImplemented
+        result = self._data * factor
+        if (result < 0).any():
+            raise ValueError(
+                "compositions can only be repeated a non-negative number of times"
+            )
+        return self._new(result, self._mask.copy())
+
+    __rmul__ = __mul__
+
+    def _compare(self, other, operation):
+        operand = self._operand(other)
+        if operand is None:
+            return NotImplemented
+        counts, mask = operand
+        mask = self._mask | mask
+        equal = (self._data == counts).all(axis=1)
+        result = equal if operation is operator.eq else ~equal
+        return self._boolean_result(result & ~mask, mask)
+
+    def _reduce(
+        self, name: str, *, skipna: bool = True, keepdims: bool = False, **kwargs
+    ):
+        if name != "sum":
+            raise TypeError(f"compositions do not support {name}")
+        if not skipna and self._mask.any():
+            return pd.NA
+        # all compositions joined into one
+        total = self._scalar(self._data[~self._mask].sum(axis=0))
+        return self._from_sequence([total], dtype=self._dtype) if keepdims else total
+
+    def _groupby_op(
+        self,
+        *,
+        how: str,
+        has_dropped_na: bool,
+        min_count: int,
+        ngroups: int,
+        ids,
+        **kwargs,
+    ):
+        if how != "sum":
+            raise TypeError(f"compositions do not support groupby {how}")
+        valid = (ids >= 0) & ~self._mask
+        counts = np.zeros((ngroups, self._data.shape[1]), dtype=np.int64)
+        np.add.at(counts, ids[valid], self._data[valid])
+        sizes = np.bincount(ids[valid], minlength=ngroups)
+        return self._new(counts, sizes < max(min_count, 0))
+
+
+def _install_operators(cls, arithmetic: dict, comparisons: tuple):
+    for name, operation in arithmetic.items():
+        setattr(
+            cls,
+            f"__{name}__",
+            lambda self, other, operation=operation: self._arithmetic(other, operation),
+        )
+        setattr(
+            cls,
+            f"__r{name}__",
+            lambda self, other, operation=operation: self._arithmetic(
+                other, operation, reflected=True
+            ),
+        )
+    for operation in comparisons:
+        setattr(
+            cls,
+            f"__{operation.__name__}__",
+            lambda self, other, operation=operation: self._compare(other, operation),
+        )
+
+
+_install_operators(
+    RomanArray,
+    {
+        "add": operator.add,
+        "sub": operator.sub,
+        "mul": operator.mul,
+        "floordiv": operator.floordiv,
+        "mod": operator.mod,
+        "truediv": operator.truediv,
+    },
+    (operator.eq, operator.ne, operator.lt, operator.le, operator.gt, operator.ge),
+)
+_install_operators(CompositionArray, {}, (operator.eq, operator.ne))
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import contextvars
+import itertools
+
+from labelled_numerics.roman_numbers import RomanNumbers
+from labelled_numerics.utils.formula import parse_formula
+from labelled_numerics.utils.labelled_numerics import LabelledNumerics
+
+
+def _arab2roman(chunk: list, nice: bool = False) -> list:
+    return RomanNumbers.arab2roman_batch(chunk, nice=nice).tolist()
+
+
+def _roman2arab(chunk: list) -> list:
+    return RomanNumbers.roman2arab_batch(chunk).tolist()
+
+
+def _num2label(
+    chunk: list, conversion_dict: dict, sep: str = "", method: str = "decimal"
+) -> list:
+    return [
+        LabelledNumerics.num2label(value, conversion_dict, sep=sep, method=method)
+        for value in chunk
+    ]
+
+
+def _label2num(chunk: list, conversion_dict: dict, sep: str = " ") -> list:
+    return [
+        LabelledNumerics.label2num(value, conversion_dict, sep=sep) for value in chunk
+    ]
+
+
+def _convert_formula(chunk: list) -> list:
+    return [LabelledNumerics.convert_formula(value) for value in chunk]
+
+
+def _mass(chunk: list, conversion_dict: dict) -> list:
+    return [
+        sum(
+            conversion_dict[label] * count
+            for label, count in parse_formula(value, conversion_dict).items()
+        )
+        for value in chunk
+    ]
+
+
+# name -> conversion of a chunk (list of values), keyword arguments as in the conversion methods
+CONVERSIONS = {
+    "arab2roman": _arab2roman,
+    "roman2arab": _roman2arab,
+    "num2label": _num2label,
+    "label2num": _label2num,
+    "convert_formula": _convert_formula,
+    "mass": _mass,
+}
+
+
+def map_convert(
+    values,
+    conversion="arab2roman",
+    workers: int = None,
+    chunk_size: int = 1024,
+    **options,
+) -> list:
+    """Convert many values on a thread pool, e.g. map_convert(numbers, "arab2roman", workers=8, nice=True).
+    The values are cut into chunks of chunk_size, every chunk goes through the batch conversion in one of the threads,
+    results keep the order of values. The conversions share no mutable state besides the locked conversion cache,
+    so any number of threads (and map_convert calls) can run at once. Threads pay off on free-threaded builds of
+    CPython and when the calling threads mostly wait for I/O, with the GIL the conversions themselves run one at a time.
+    A collect() block around the call also collects the calls of the worker threads.
+    :param values: values to convert
+    :type values: Iterable
+    :param conversion: name of the conversion (key of CONVERSIONS: "arab2roman", "roman2arab", "num2label",
+        "label2num", "convert_formula", "mass") or a function converting a single value, defaults to "arab2roman"
+    :type conversion: str | Callable
+    :param workers: number of threads, defaults to None (convert in the calling thread)
+    :type workers: int, optional
+    :param chunk_size: values per chunk, defaults to 1024
+    :type chunk_size: int, optional
+    :param options: keyword arguments of the conversion, e.g. conversion_dict for "label2num" or nice for "arab2roman"
+    :return: converted values
+    :rtype: list
+    """
+    if callable(conversion):
+        function = conversion
+
+        def convert(chunk):
+            return [function(value, **options) for value in chunk]
+
+    elif conversion in CONVERSIONS:
+        function = CONVERSIONS[conversion]
+
+        def convert(chunk):
+            return function(chunk, **options)
+
+    else:
+        raise ValueError(
+            f"conversion must be callable or one of {list(CONVERSIONS)}, not {conversion!r}"
+        )
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise ValueError(f"workers must be a positive int, not {workers}")
+    if not isinstance(chunk_size, int) or chunk_size < 1:
+        raise ValueError(f"chunk_size must be a positive int, not {chunk_size}")
+
+    values = iter(values)
+    chunks = iter(lambda: list(itertools.islice(values, chunk_size)), [])
+    if workers is None or workers == 1:
+        return [result for chunk in chunks for result in convert(chunk)]
+    from concurrent.futures import ThreadPoolExecutor
+
+    # every chunk runs in a copy of the caller's context (active collector of collect())
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        converted = executor.map(
+            lambda chunk: context.copy().run(convert, chunk), chunks
+        )
+        return [result for chunk in converted for result in chunk]
@@ -1,11 +1,78 @@
 from __future__ import annotations  # to allow self-reference in type hints
 
+import inspect
+import logging
+import operator
+import re
+import threading
+from functools import cached_property, lru_cache
+from typing import TYPE_CHECKING
+
 from labelled_numerics import setup_logger
 from labelled_numerics.utils import labelled_numerics as ln
+from labelled_numerics.utils.cache import memoize
+from labelled_numerics.utils.codec import compile_dictionary
+from labelled_numerics.utils.metrics import instrument, suspend
+
+if TYPE_CHECKING:
+    import numpy as np
 
 logger = setup_logger.logger
 
 
+@lru_cache(maxsize=None)
+def _arab_pattern() -> re.Pattern:
+    """Regex of arabic integers as whole words, not parts of decimals like 3.14 (compiled on first use)"""
+    return re.compile(r"(?<!\w)(?<![0-9]\.)[0-9]+(?!\w)(?!\.[0-9])")
+
+
+@lru_cache(maxsize=None)
+def _roman_pattern(sep: str) -> re.Pattern:
+    """Regex of canonical Roman numerals 1-3999 as whole words, sep (e.g. " ?") is allowed between the letters of
+    different chunks and between repeated letters (e.g. "M CM XC IX", "MMXX I I")
+    """
+
+    def repeated(letter):
+        return f"{letter}(?:{sep}{letter}){{0,2}}"
+
+    thousands = repeated("M")
+    hundreds = f"CM|CD|D(?:{sep}{repeated('C')})?|{repeated('C')}"
+    tens = f"XC|XL|L(?:{sep}{repeated('X')})?|{repeated('X')}"
+    units = f"IX|IV|V(?:{sep}{repeated('I')})?|{repeated('I')}"
+    return re.compile(
+        rf"(?<!\w)(?=[MDCLXVI])(?:{thousands})?(?:{sep}(?:{hundreds}))?"
+        rf"(?:{sep}(?:{tens}))?(?:{sep}(?:{units}))?(?!\w)"
+    )
+
+
+class _RomanTables:
+    """Precomputed conversions for the closed domain 0-3999 of RomanNumbers (index = number)."""
+
+    def __init__(self, labels: list[str], nice_labels: list[str]):
+        self.labels = labels  # chunked, e.g. "M CM XC I I"
+        self.nice_labels = nice_labels  # e.g. "M CM XC II"
+        # every known spelling (chunked, nice, compact) -> number
+        self.values = {}
+        for number, (label, nice_label) in enumerate(zip(labels, nice_labels)):
+            self.values[label] = number
+            self.values[nice_label] = number
+            self.values.setdefault(label.replace(" ", ""), number)
+
+    # object arrays used by the batch conversions, built on their first use (scalar conversions do not import numpy)
+
+    @cached_property
+    def label_array(self) -> np.ndarray:
+        import numpy as np
+
+        return np.array(self.labels, dtype=object)
+
+    @cached_property
+    def nice_label_array(self) -> np.ndarray:
+        import numpy as np
+
+        return np.array(self.nice_labels, dtype=object)
+
+
 class RomanNumbers(ln.LabelledNumerics):
     """Class for Roman numbers. Inherits from abstract class LabelledNumerics meaning that each 'sillabus' of the roman number is a label with a corresponding value.
     Combinations of this labels correspond to a total number which is the sum of its labels.
@@ -28,31 +95,217 @@ class RomanNumbers(ln.LabelledNumerics):
         "M": 1000,
     }
 
+    # compiled once for the class, used by all conversions below
+    codec = compile_dictionary(conversion_dict)
+
     _max_value = 3999
 
+    # lookup tables for the whole domain, built on first conversion (set to False to always compute)
+    use_tables = True
+    _tables = None
+    _tables_lock = threading.Lock()
+
+    # value and precision of instances created from numbers (from_int, arithmetic), unset for parsed instances
+    __slots__ = ("_value", "_digits")
+
     def __init__(self, label):
         # string preprocessing/chunking if e.g. formate is MMMCMXCIX instead of M M M CM XC IX
         # can not work for floats, because of the ambiguity after the dot, e.g. .3 -> .III and .111 -> .I I I
         if "." not in label:
-            label = ln.LabelledNumerics.formate_chunky(
-                label, RomanNumbers.conversion_dict, sep=" "
-            )
-        super().__init__(label, RomanNumbers.conversion_dict)
-        if (
-            "." in self.name
-        ):  # whatever comes after the dot is not converted and estimated to be a chunked properly, e.g. .3 -> .III and .1 -> .I I I (ambiguous otherwise)
-            part_int = RomanNumbers.formate_chunky(
-                self.name.split(".")[0].strip(), RomanNumbers.conversion_dict, sep=" "
-            )
-            part_past_comma = self.name.split(".")[1].strip()
-            self.label = part_int + " . " + part_past_comma
-            self.nice_label = (
-                RomanNumbers.formate_nice_roman(part_int) + " . " + part_past_comma
+            tables = RomanNumbers._get_tables()
+            number = tables.values.get(label) if tables is not None else None
+            if number is not None:
+                # known spelling, no need to chunk the string
+                label = tables.labels[number]
+            else:
+                label = ln.LabelledNumerics.formate_chunky(
+                    label, RomanNumbers.codec, sep=" "
+                )
+                # unknown spelling, parsed once so invalid labels fail here (KeyError) and not on first use
+                RomanNumbers.label2num(label, RomanNumbers.codec, sep=" ")
+        # same as LabelledNumerics.__init__, the class codec is already checked
+        self.conversion = RomanNumbers.conversion_dict
+        self.sep = " "
+        self._codec = RomanNumbers.codec
+        self.name = label
+        # label, nice_label and arab are derived from the name when they are asked for
+
+    @classmethod
+    def from_int(cls, number: int) -> RomanNumbers:
+        """Create a Roman number from an integer. Nothing is converted, name, label and nice_label are only rendered
+        when they are asked for (by lookup in the tables), so this is about as cheap as creating an object.
+        :param number: integer in range 0-3999
+        :type number: int
+        :return: Roman number
+        :rtype: RomanNumbers
+        """
+        if not isinstance(number, int) or isinstance(number, bool):
+            raise TypeError(f"Number {number} is not a valid number (int).")
+        return cls._from_value(number)
+
+    @classmethod
+    def _from_value(cls, value: int | float, digits: int = 0) -> RomanNumbers:
+        """Roman number backed by its value, the name and labels are only rendered when they are asked for.
+        :param value: value in range 0-3999
+        :type value: int, float
+        :param digits: number of digits after the dot of a float value, defaults to 0
+        :type digits: int, optional
+        :return: Roman number
+        :rtype: RomanNumbers
+        """
+        if value < 0 or value > RomanNumbers._max_value:
+            raise ValueError(
+                f"Number {value} is not in valid range (0-{RomanNumbers._max_value})."
             )
+        instance = cls.__new__(cls)
+        instance.conversion = RomanNumbers.conversion_dict
+        instance.sep = " "
+        instance._codec = RomanNumbers.codec
+        instance._name = None
+        instance._counts = None
+        instance._derived = None
+        instance._value = value
+        instance._digits = digits
+        return instance
+
+    # integers are looked up in the tables every time instead of being cached, so most instances never need
+    # the dictionary of derived values
+
+    @property
+    def _rendered_name(self) -> str:
+        tables = RomanNumbers._get_tables()
+        if tables is not None and isinstance(self._value, int):
+            return tables.labels[self._value]
+        return self._converted_name
+
+    @ln._cached
+    def _converted_name(self) -> str:
+        return RomanNumbers.arab2roman(self._value)
+
+    def _table_value(self) -> int:
+        # value of a known spelling of the name (None if unknown or the tables are switched off)
+        tables = RomanNumbers._get_tables()
+        return None if tables is None else tables.values.get(self.name)
+
+    @property
+    def arab(self) -> int | float:
+        """Value of the Roman number"""
+        if self._name is None:
+            return self._value
+        number = self._table_value()
+        return self._parsed_value if number is None else number
+
+    @ln._cached
+    def _parsed_value(self) -> int | float:
+        return RomanNumbers.roman2arab(self.name)
+
+    @property
+    def label(self) -> str:
+        """Roman number chunked into labels, e.g. "M CM XC IX" """
+        if "." not in self.name:
+            return self.name
+        part_int, part_past_comma = self._dot_parts
+        return part_int + " . " + part_past_comma
+
+    @property
+    def nice_label(self) -> str:
+        """Nicely formatted Roman number, e.g. "M CM XC I" instead of "M CM XC I I I" """
+        if "." not in self.name:
+            number = self._table_value()
+            if number is not None:
+                return RomanNumbers._tables.nice_labels[number]
+            return self._nice_name
+        part_int, part_past_comma = self._dot_parts
+        return RomanNumbers.formate_nice_roman(part_int) + " . " + part_past_comma
+
+    @ln._cached
+    def _nice_name(self) -> str:
+        return RomanNumbers.formate_nice_roman(self.name)
+
+    @ln._cached
+    def _dot_parts(self) -> tuple[str, str]:
+        # whatever comes after the dot is not converted and estimated to be a chunked properly, e.g. .3 -> .III and .1 -> .I I I (ambiguous otherwise)
+        part_int = RomanNumbers.formate_chunky(
+            self.name.split(".")[0].strip(), RomanNumbers.codec, sep=" "
+        )
+        return part_int, self.name.split(".")[1].strip()
+
+    def _fraction_digits(self) -> int:
+        # precision of the number: one digit per word after the dot, e.g. "V . VI VII" has 2
+        if self._name is None:
+            return self._digits
+        if "." not in self._name:
+            return 0
+        return len(self._name.split(".")[1].split())
+
+    @staticmethod
+    def _operand(other):
+        """Value and number of fractional digits of an operand (Roman number or int), None if not supported"""
+        if isinstance(other, RomanNumbers):
+            return other.arab, other._fraction_digits()
+        if isinstance(other, int) and not isinstance(other, bool):
+            return other, 0
+        return None
+
+    def _arithmetic(self, other, operation, reflected: bool = False):
+        """Apply operation to the values and return the result as Roman number, no labels are parsed or rendered"""
+        operand = RomanNumbers._operand(other)
+        if operand is None:
+            return NotImplemented
+        value, other_digits = operand
+        digits = self._fraction_digits()
+        left, right = (value, self.arab) if reflected else (self.arab, value)
+        result = operation(left, right)
+        if operation is operator.mul:
+            digits += other_digits
+        elif operation is operator.floordiv:
+            result, digits = int(result), 0
         else:
-            self.label = self.name
-            self.nice_label = RomanNumbers.formate_nice_roman(self.name)
-        self.arab = RomanNumbers.roman2arab(self.name)
+            digits = max(digits, other_digits)
+        if digits:
+            # round to the precision of the operands, e.g. against 0.1 + 0.2 = 0.30000000000000004
+            result = round(result, ndigits=digits)
+        return type(self)._from_value(result, digits)
+
+    def __add__(self, other):
+        return self._arithmetic(other, operator.add)
+
+    def __radd__(self, other):
+        return self._arithmetic(other, operator.add, reflected=True)
+
+    def __sub__(self, other):
+        return self._arithmetic(other, operator.sub)
+
+    def __rsub__(self, other):
+        return self._arithmetic(other, operator.sub, reflected=True)
+
+    def __mul__(self, other):
+        return self._arithmetic(other, operator.mul)
+
+    def __rmul__(self, other):
+        return self._arithmetic(other, operator.mul, reflected=True)
+
+    def __floordiv__(self, other):
+        return self._arithmetic(other, operator.floordiv)
+
+    def __mod__(self, other):
+        return self._arithmetic(other, operator.mod)
+
+    def __truediv__(self, other):
+        # quotients are rarely Roman numbers, plain number as for LabelledNumerics
+        operand = RomanNumbers._operand(other)
+        if operand is None:
+            return NotImplemented
+        return self.arab / operand[0]
+
+    def __eq__(self, other):
+        operand = RomanNumbers._operand(other)
+        if operand is None:
+            return NotImplemented
+        return self.arab == operand[0]
+
+    def __hash__(self):
+        return hash(self.arab)
 
     def add_to(self, other: RomanNumbers):
         """Adds two Roman numerals.
@@ -61,30 +314,14 @@ class RomanNumbers(ln.LabelledNumerics):
         :return: sum of two Roman numerals as Roman numeral string
         :rtype: str
         """
-        # get values
-
         if not isinstance(other, RomanNumbers):
             raise TypeError(
                 f"Other {other} is not a valid Roman number instance (RomanNumbers)."
             )
-        else:
-            result = self.arab + other.arab
-            # round to precision of the larger number  #this expects that the other number can be determined with same precision to make sense!
-            digits = max(
-                [
-                    len(str(num).split(".")[1]) if isinstance(num, float) else 0
-                    for num in [self.arab, other.arab]
-                ]
-            )
-            result = round(result, ndigits=digits)
-            if isinstance(result, int):
-                return RomanNumbers.formate_nice_roman(
-                    RomanNumbers.formate_chunky(
-                        RomanNumbers.arab2roman(result), RomanNumbers.conversion_dict
-                    )
-                )
-            elif isinstance(result, float):
-                return RomanNumbers.arab2roman(result)
+        result = self + other
+        if isinstance(result.arab, int):
+            return result.nice_label
+        return result.label
 
     @staticmethod
     def arab2roman(number):
@@ -98,17 +335,19 @@ class RomanNumbers(ln.LabelledNumerics):
         if number < 0 or number > RomanNumbers._max_value:
             raise ValueError(f"Number {number} is not in valid range (1-3999).")
 
-        if "0" in str(number):
-            # warning message
-            logger.warning(msg='Number {number} contains zero, replacement "zero"')
+        if logger.isEnabledFor(logging.DEBUG) and "0" in str(number):
+            logger.debug('Number %s contains zero, replacement "zero"', number)
 
         if isinstance(number, int):
+            tables = RomanNumbers._get_tables()
+            if tables is not None:
+                return tables.labels[number]
             return RomanNumbers.num2label(
-                number, RomanNumbers.conversion_dict, sep=" ", method="decimal"
+                number, RomanNumbers.codec, sep=" ", method="decimal"
             )
         elif isinstance(number, float):
             return RomanNumbers.num2label(
-                number, RomanNumbers.conversion_dict, sep=" ", method="decimal_float"
+                number, RomanNumbers.codec, sep=" ", method="decimal_float"
             )
         else:
             raise TypeError(f"Number {number} is not a valid number (int, float).")
@@ -122,28 +361,125 @@ class RomanNumbers(ln.LabelledNumerics):
         :rtype: int
         """
         if isinstance(number, str):
+            tables = RomanNumbers._get_tables()
+            if tables is not None and number in tables.values:
+                return tables.values[number]
             if "." in number:
                 # if float, split at dot
                 digits = 0  # to round properly to prevent float errors
                 result = RomanNumbers.label2num(
-                    number.split(".")[0].strip(), RomanNumbers.conversion_dict, sep=" "
+                    number.split(".")[0].strip(), RomanNumbers.codec, sep=" "
                 )
                 for exponent, word in enumerate(number.split(".")[1].strip().split()):
                     digits += 1
                     result += RomanNumbers.label2num(
-                        RomanNumbers.formate_chunky(word, RomanNumbers.conversion_dict),
-                        RomanNumbers.conversion_dict,
+                        RomanNumbers.formate_chunky(word, RomanNumbers.codec),
+                        RomanNumbers.codec,
                         sep=" ",
                     ) / 10 ** (exponent + 1)
                 return round(result, ndigits=digits)
-            else:
-                return RomanNumbers.label2num(
-                    number, RomanNumbers.conversion_dict, sep=" "
+            try:
+                return RomanNumbers.label2num(number, RomanNumbers.codec, sep=" ")
+            except KeyError:
+                # the other spellings of the tables (compact "MCMXCIX", nice "M CM XC II") without the tables
+                value = RomanNumbers.label2num(
+                    RomanNumbers.formate_chunky(number, RomanNumbers.codec, sep=" "),
+                    RomanNumbers.codec,
+                    sep=" ",
+                )
+                label = RomanNumbers.num2label(
+                    value, RomanNumbers.codec, sep=" ", method="decimal"
                 )
+                if number not in (
+                    label.replace(" ", ""),
+                    RomanNumbers.formate_nice_roman(label),
+                ):
+                    raise
+                return value
         else:
             raise TypeError(f"Number {number} is not a valid number (str).")
 
     @staticmethod
+    def _get_tables(force: bool = False):
+        """Return the lookup tables of the domain 0-3999, building them on first use.
+        Returns None if tables are switched off (RomanNumbers.use_tables = False) and not forced.
+        """
+        if not (RomanNumbers.use_tables or force):
+            return None
+        if RomanNumbers._tables is None:
+            with RomanNumbers._tables_lock:
+                # built once, threads arriving meanwhile wait and use the same tables
+                if RomanNumbers._tables is None:
+                    # from the internals, the build must not fill the conversion cache or show up in collect()
+                    nice = inspect.unwrap(RomanNumbers.formate_nice_roman)
+                    with suspend():
+                        labels = [
+                            RomanNumbers._convert_to_str_decimal(
+                                number, RomanNumbers.codec, sep=" "
+                            )
+                            for number in range(RomanNumbers._max_value + 1)
+                        ]
+                    nice_labels = [nice(label) for label in labels]
+                    RomanNumbers._tables = _RomanTables(labels, nice_labels)
+        return RomanNumbers._tables
+
+    @staticmethod
+    @instrument
+    def arab2roman_batch(numbers, nice: bool = False) -> np.ndarray:
+        """Converts an array of integers to Roman numerals at once. Type and range are checked once for the whole array.
+        :param numbers: integers in range 0-3999
+        :type numbers: np.ndarray, list[int]
+        :param nice: if True return nicely formatted numerals (e.g. "III" instead of "I I I"), defaults to False
+        :type nice: bool, optional
+        :return: Roman numerals (same shape as numbers)
+        :rtype: np.ndarray (dtype object)
+        """
+        import numpy as np
+
+        numbers = np.asarray(numbers)
+        if numbers.dtype.kind not in "iu":
+            raise TypeError(
+                f"numbers must be an integer array, not dtype {numbers.dtype}."
+            )
+        if numbers.size and (
+            numbers.min() < 0 or numbers.max() > RomanNumbers._max_value
+        ):
+            raise ValueError(
+                f"Numbers are not in valid range (0-{RomanNumbers._max_value})."
+            )
+        # batch conversion always uses the tables
+        tables = RomanNumbers._get_tables(force=True)
+        return (tables.nice_label_array if nice else tables.label_array)[numbers]
+
+    @staticmethod
+    @instrument
+    def roman2arab_batch(numbers) -> np.ndarray:
+        """Converts a sequence of Roman numerals (format as for roman2arab) to arabian numbers at once.
+        Each distinct numeral is validated and converted only once.
+        :param numbers: Roman numerals
+        :type numbers: np.ndarray, list[str]
+        :return: arabian numbers (int64, or float64 if any numeral has a fractional part)
+        :rtype: np.ndarray
+        """
+        import numpy as np
+
+        numbers = np.asarray(numbers, dtype=object)
+        converted = {
+            label: RomanNumbers.roman2arab(label) for label in set(numbers.flat)
+        }
+        dtype = (
+            np.float64
+            if any(isinstance(value, float) for value in converted.values())
+            else np.int64
+        )
+        result = np.fromiter(
+            map(converted.__getitem__, numbers.flat), dtype=dtype, count=numbers.size
+        )
+        return result.reshape(numbers.shape)
+
+    @staticmethod
+    @instrument
+    @memoize
     def formate_nice_roman(roman_number: str) -> str:
         """Format roman number to be used in conversion_dict
         :param roman_no: roman number
@@ -169,6 +505,7 @@ class RomanNumbers(ln.LabelledNumerics):
         return rom_no_out.strip()
 
     @staticmethod
+    @instrument
     def replace_all_arabs(text: str) -> str:
         """Replace all arabic numbers in text by roman numbers.
         :param text: text to be scanned
@@ -177,21 +514,60 @@ class RomanNumbers(ln.LabelledNumerics):
         :rtype: str
         """
         # replace all arabic numbers in text by roman numbers
-        text_out = ""
+        words_out = []
         for word in text.split():
             if word.isdigit():
-                if "." in word:
-                    text_out += RomanNumbers.arab2roman(word) + " "
-                else:
-                    text_out += (
-                        RomanNumbers.formate_nice_roman(
-                            RomanNumbers.arab2roman(int(word))
-                        )
-                        + " "
-                    )
+                words_out.append(
+                    RomanNumbers.formate_nice_roman(RomanNumbers.arab2roman(int(word)))
+                )
             else:
-                text_out += word + " "
-        return text_out.strip()
+                words_out.append(word)
+        return " ".join(words_out)
+
+    @staticmethod
+    def replace_stream(lines, direction: str = "arab2roman", compact: bool = True):
+        """Replace numbers in a stream of text line by line, e.g. to rewrite files that do not fit into memory.
+        Each line is scanned once by a compiled regular expression.
+        "arab2roman": arabic integers 0-3999 (whole words, not parts of decimals) are replaced by Roman numerals,
+        "roman2arab": canonical Roman numerals (whole words) are replaced by arabic integers.
+        Note that words like "I", "MIX" or "CD" are Roman numerals as well, "zero" is not converted back.
+        :param lines: lines of text, e.g. an open text file
+        :type lines: Iterable[str]
+        :param direction: "arab2roman" or "roman2arab", defaults to "arab2roman"
+        :type direction: str, optional
+        :param compact: write (arab2roman) or accept only (roman2arab) numerals without spaces, e.g. "MCMXCIX".
+            If False write nicely formatted numerals ("M CM XC IX") and accept spaces between the chunks, defaults to True
+        :type compact: bool, optional
+        :yield: line with replaced numbers
+        :rtype: str
+        """
+        tables = RomanNumbers._get_tables(force=True)
+        if direction == "arab2roman":
+            pattern = _arab_pattern()
+            labels = tables.nice_labels
+            if compact:
+                labels = [label.replace(" ", "") for label in labels]
+                labels[0] = tables.nice_labels[0]  # "zero"
+
+            def replacement(match):
+                number = int(match.group())
+                if number > RomanNumbers._max_value:
+                    return match.group()
+                return labels[number]
+
+        elif direction == "roman2arab":
+            pattern = _roman_pattern("" if compact else " ?")
+            values = tables.values
+
+            def replacement(match):
+                return str(values[match.group().replace(" ", "")])
+
+        else:
+            raise ValueError(
+                f"direction must be 'arab2roman' or 'roman2arab', not {direction}"
+            )
+        for line in lines:
+            yield pattern.sub(replacement, line)
 
 
 if __name__ == "__main__":
@@ -243,7 +619,7 @@ if __name__ == "__main__":
         f"Some implemented operations: If you add two roman numbers with add_to this also works for floats: {instans[0].add_to(instans[1])} with value {instans[0].arab + instans[1].arab}."
     )
     print(
-        f"Only in the integer case this will be equal to the sum of the instances: {instans[0] + instans[1]}"
+        f"The sum of the instances is a Roman number again: {(instans[0] + instans[1]).nice_label}"
     )
     print(
         'To replace all arabic numbers in "bla 34 bla 56 bla" by roman numbers use RomanNumbers.replace_all_arabs("bla 34 bla 56 bla")'
@@ -0,0 +1,363 @@
+"""Conversion server: line-delimited JSON over a TCP or Unix socket, requests are answered in micro-batches.
+
+    python -m labelled_numerics.server --port 8765              # TCP on 127.0.0.1:8765
+    python -m labelled_numerics.server --unix /tmp/ln.sock      # Unix socket
+
+Every request is one line of JSON, every response one line with the same "id":
+
+    {"id": 1, "op": "arab2roman", "value": 1999}        ->  {"id": 1, "result": "MCMXCIX"}
+    {"id": 2, "op": "arab2roman", "value": 4, "nice": true}
+    {"id": 3, "op": "roman2arab", "value": "MCMXCIX"}   ->  {"id": 3, "result": 1999}
+    {"id": 4, "op": "mass", "value": "C6H12O6"}         ->  {"id": 4, "result": 180}
+    {"id": 5, "op": "count", "value": 18}               ->  {"id": 5, "result": 4}
+    {"id": 6, "op": "stats"}                            ->  {"id": 6, "result": {"requests": ..., "batches": ...}}
+    invalid requests or values                          ->  {"id": ..., "error": "..."}
+
+Masses of "count" above --max-count and formulas of "mass" longer than --max-formula-length are answered with an
+error, a line longer than the stream limit (64 KiB) with an error and the connection is closed.
+
+Clients may send many requests without waiting, responses can come in a different order than the requests.
+Requests of all connections are gathered per operation and converted together through the batch paths of the command
+line tool (labelled_numerics.cli.convert_chunk) as soon as --batch-size requests are waiting or the first of them
+waited --max-wait milliseconds. Batches are converted in the default executor of the loop, the caches stay warm for
+all clients.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import json
+import sys
+
+from labelled_numerics.cli import (
+    COMMANDS,
+    ORGANIC_ATOMS,
+    convert_chunk,
+    load_dictionary,
+)
+from labelled_numerics.setup_logger import logger
+
+# operations with numeric results (the conversions return strings)
+_NUMERIC = {"roman2arab", "mass", "count"}
+
+
+class MicroBatcher:
+    """Gathers single conversions into batches: a batch of one kind is converted when batch_size requests
+    are waiting or the first of them waited max_wait seconds, whichever comes first.
+    Batches are converted in the default executor of the loop, a slow batch does not stall the other clients.
+    """
+
+    def __init__(self, convert, batch_size: int = 64, max_wait: float = 0.002):
+        """
+        :param convert: function (key, values) -> (results, errors) converting one batch, see cli.convert_chunk
+        :type convert: Callable
+        :param batch_size: largest batch, defaults to 64
+        :type batch_size: int, optional
+        :param max_wait: longest wait of a request for its batch in seconds, defaults to 0.002
+        :type max_wait: float, optional
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, not {batch_size}")
+        if max_wait < 0:
+            raise ValueError(f"max_wait must be >= 0, not {max_wait}")
+        self.convert = convert
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.requests = 0
+        self.batches = 0
+        self._pending = {}  # key -> [(value, future)]
+        self._timers = {}
+
+    def submit(self, key, value) -> asyncio.Future:
+        """Future of the conversion of value (result, or ValueError for an invalid value)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((value, future))
+        self.requests += 1
+        if len(batch) >= self.batch_size:
+            self.flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.max_wait, self.flush, key)
+        return future
+
+    def flush(self, key):
+        """Convert the waiting requests of key now (in the default executor of the loop, the results are set when
+        the batch is done)
+        """
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if not batch:
+            return
+        self.batches += 1
+        converted = asyncio.get_running_loop().run_in_executor(
+            None, self.convert, key, [value for value, _ in batch]
+        )
+        converted.add_done_callback(functools.partial(self._resolve, batch))
+
+    @staticmethod
+    def _resolve(batch: list, converted: asyncio.Future):
+        if converted.cancelled():  # the loop is shutting down
+            for _, future in batch:
+                future.cancel()
+            return
+        error = converted.exception()
+        if error is not None:  # a bug must not leave the clients waiting forever
+            logger.error("conversion of a batch failed", exc_info=error)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        results, errors = converted.result()
+        messages = dict(errors)
+        for index, ((_, future), result) in enumerate(zip(batch, results)):
+            if future.done():
+                continue  # cancelled, e.g. the client disconnected
+            if result is None:
+                future.set_exception(ValueError(messages[index]))
+            else:
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0,
+        }
+
+
+class ConversionServer:
+    """Asyncio server answering the line-delimited JSON requests of the module docstring in micro-batches.
+
+    server = ConversionServer(batch_size=64, max_wait=0.002)
+    await server.start(port=8765)   # or path="/tmp/ln.sock"
+    await server.serve_forever()
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 64,
+        max_wait: float = 0.002,
+        conversion_dict: dict[str, int] = None,
+        max_count: int = 100_000,
+        max_formula_length: int = 1_000,
+    ):
+        """
+        :param batch_size: largest batch, defaults to 64
+        :type batch_size: int, optional
+        :param max_wait: longest wait of a request for its batch in seconds, defaults to 0.002
+        :type max_wait: float, optional
+        :param conversion_dict: dictionary of mass and count, defaults to None (cli.ORGANIC_ATOMS)
+        :type conversion_dict: dict[str, int], optional
+        :param max_count: largest mass of "count" requests (the count table grows with it), defaults to 100_000
+        :type max_count: int, optional
+        :param max_formula_length: longest formula of "mass" requests, defaults to 1_000
+        :type max_formula_length: int, optional
+        """
+        self.conversion_dict = (
+            ORGANIC_ATOMS if conversion_dict is None else conversion_dict
+        )
+        self.max_count = max_count
+        self.max_formula_length = max_formula_length
+        self.batcher = MicroBatcher(self._convert, batch_size, max_wait)
+        self.server = None
+
+    def _convert(self, key: tuple, values: list) -> tuple[list, list]:
+        op, nice = key
+        options = {"nice": nice, "dictionary": self.conversion_dict, "keys": None}
+        return convert_chunk(op, options, values)
+
+    async def start(
+        self, host: str = "127.0.0.1", port: int = 0, path: str = None
+    ) -> asyncio.AbstractServer:
+        """Start listening on host:port (port 0 picks a free port, see address) or on the Unix socket path"""
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self._handle, path=path)
+        else:
+            self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server
+
+    @property
+    def address(self):
+        """(host, port) or path the server listens on"""
+        return self.server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        pending = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (
+                    ValueError
+                ):  # line longer than the stream limit, the rest of it cannot be framed
+                    writer.write(
+                        _encode({"id": None, "error": "request line is too long"})
+                    )
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                submitted = self._submit(line)
+                if isinstance(submitted, dict):
+                    writer.write(_encode(submitted))
+                else:
+                    # answered by a callback when its batch is converted, no task per request
+                    future = submitted[2]
+                    pending.add(future)
+                    future.add_done_callback(
+                        functools.partial(self._reply, writer, pending, *submitted[:2])
+                    )
+                await writer.drain()
+            if pending:
+                await asyncio.wait(pending)
+        except ConnectionError:
+            pass
+        finally:
+            for future in pending:
+                future.cancel()
+            writer.close()
+
+    @staticmethod
+    def _reply(writer, pending: set, request_id, op: str, future: asyncio.Future):
+        pending.discard(future)
+        if not future.cancelled() and not writer.is_closing():
+            writer.write(_encode(ConversionServer._response(request_id, op, future)))
+
+    async def respond(self, line: bytes | str) -> dict:
+        """Response to one request line (without the transport, e.g. for other servers)"""
+        submitted = self._submit(line)
+        if isinstance(submitted, dict):
+            return submitted
+        request_id, op, future = submitted
+        await asyncio.wait([future])
+        return ConversionServer._response(request_id, op, future)
+
+    def _submit(self, line: bytes | str):
+        """Checks the request and submits it to the batcher: (id, op, future of the result), or the response
+        if the request is answered right away (invalid requests, stats)
+        """
+        try:
+            request = json.loads(line)
+        except ValueError:
+            request = None
+        if not isinstance(request, dict):
+            return {"id": None, "error": "request must be a json object"}
+        request_id = request.get("id")
+        op = request.get("op")
+        if op == "stats":
+            return {"id": request_id, "result": self.batcher.stats()}
+        if op not in COMMANDS:
+            return {
+                "id": request_id,
+                "error": f"unknown op {op!r}, use one of {list(COMMANDS)} or 'stats'",
+            }
+        value = request.get("value")
+        if (
+            isinstance(value, bool)
+            or not isinstance(value, (int, str))
+            or not str(value).strip()
+        ):
+            return {
+                "id": request_id,
+                "error": f"value must be a non empty str or int, not {value!r}",
+            }
+        error = self._check_limits(op, str(value).strip())
+        if error is not None:
+            return {"id": request_id, "error": error}
+        nice = bool(request.get("nice", False))
+        return request_id, op, self.batcher.submit((op, nice), str(value))
+
+    def _check_limits(self, op: str, value: str):
+        """Message if the value is too expensive to convert (None if fine), other invalid values fail in the batch"""
+        if op == "count":
+            try:
+                mass = int(value)
+            except ValueError:
+                return None
+            if mass > self.max_count:
+                return f"mass {mass} of count exceeds the maximum {self.max_count}"
+        elif op == "mass" and len(value) > self.max_formula_length:
+            return f"formula of length {len(value)} exceeds the maximum {self.max_formula_length}"
+        return None
+
+    @staticmethod
+    def _response(request_id, op: str, future: asyncio.Future) -> dict:
+        error = future.exception()
+        if error is not None:
+            return {"id": request_id, "error": str(error)}
+        result = future.result()
+        return {
+            "id": request_id,
+            "result": json.loads(result) if op in _NUMERIC else result,
+        }
+
+
+def _encode(response: dict) -> bytes:
+    return json.dumps(response).encode() + b"\n"
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m labelled_numerics.server",
+        description=__doc__.splitlines()[0],
+        epilog=__doc__.split("\n\n", 1)[1],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument(
+        "--max-wait", type=float, default=2, help="in milliseconds, defaults to 2"
+    )
+    parser.add_argument(
+        "--dictionary", help="json file of label -> int value for mass and count"
+    )
+    parser.add_argument(
+        "--max-count",
+        type=int,
+        default=100_000,
+        help="largest mass of count requests, defaults to 100000",
+    )
+    parser.add_argument(
+        "--max-formula-length",
+        type=int,
+        default=1_000,
+        help="longest formula of mass requests, defaults to 1000",
+    )
+    args = parser.parse_args(argv)
+
+    async def serve():
+        server = ConversionServer(
+            args.batch_size,
+            args.max_wait / 1000,
+            None if args.dictionary is None else load_dictionary(args.dictionary),
+            args.max_count,
+            args.max_formula_length,
+        )
+        await server.start(args.host, args.port, args.unix)
+        print(f"listening on {server.address}", file=sys.stderr)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
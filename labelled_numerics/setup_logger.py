@@ -1,4 +1,5 @@
 import logging
 
-logging.basicConfig(level=logging.DEBUG)
+# library logger, handlers and levels are left to the application (no configuration at import)
 logger = logging.getLogger("labelled_numerics")
+logger.addHandler(logging.NullHandler())
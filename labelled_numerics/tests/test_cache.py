@@ -0,0 +1,54 @@
+from labelled_numerics import (
+    LabelledNumerics,
+    cache_info,
+    clear_cache,
+    disable_cache,
+    enable_cache,
+)
+from labelled_numerics.roman_numbers import RomanNumbers
+from labelled_numerics.utils.metrics import collect
+
+organic_atoms = {"H": 1, "C": 12, "O": 16}
+
+
+def test_cache_statistics():
+    assert cache_info() is None
+    enable_cache(maxsize=2)
+    try:
+        for _ in range(3):
+            assert LabelledNumerics.label2num("C O", organic_atoms) == 28
+        assert cache_info()["hits"] == 2
+        assert cache_info()["misses"] == 1
+        # equal dictionaries share entries, argument types are kept apart
+        assert LabelledNumerics.label2num("C O", dict(organic_atoms)) == 28
+        assert LabelledNumerics.num2label(13, organic_atoms, sep=" ") == "C H"
+        assert LabelledNumerics.num2label(13.0, organic_atoms, sep=" ") == "C H"
+        info = cache_info()
+        assert info["hits"] == 3
+        assert info["size"] == 2
+        assert info["evictions"] == 1
+        clear_cache()
+        assert cache_info()["size"] == 0
+        assert RomanNumbers.formate_nice_roman("M M C I I") == "MM C II"
+        assert RomanNumbers.formate_nice_roman("M M C I I") == "MM C II"
+        assert cache_info()["hits"] == 1
+    finally:
+        disable_cache()
+    assert cache_info() is None
+
+
+def test_table_build_is_not_cached_or_collected():
+    enable_cache(maxsize=100)
+    tables = RomanNumbers._tables
+    try:
+        assert LabelledNumerics.label2num("C O", organic_atoms) == 28
+        before = cache_info()
+        RomanNumbers._tables = None  # the first conversion builds the tables
+        with collect() as metrics:
+            assert RomanNumbers("X").arab == 10
+        assert RomanNumbers._tables is not None
+        assert cache_info() == before
+        assert metrics.as_dict()["calls"] == {}
+    finally:
+        RomanNumbers._tables = tables
+        disable_cache()
@@ -0,0 +1,110 @@
+import io
+import json
+
+import pytest
+
+from labelled_numerics import LabelledNumerics
+from labelled_numerics.cli import ORGANIC_ATOMS, convert_chunk, main
+
+
+def test_convert_chunk():
+    assert convert_chunk("arab2roman", {}, ["1999", " 4", "", "0"]) == (
+        ["MCMXCIX", "IV", "", "zero"],
+        [],
+    )
+    assert convert_chunk("arab2roman", {"nice": True}, ["1999"])[0] == ["M CM XC IX"]
+    assert convert_chunk("roman2arab", {}, ["MCMXCIX", "zero"])[0] == ["1999", "0"]
+    results, errors = convert_chunk("roman2arab", {}, ["IV", "IIII", "V"])
+    assert results == ["4", None, "5"]
+    assert [index for index, _ in errors] == [1]
+    results, errors = convert_chunk("arab2roman", {}, ["4000", "12"])
+    assert results == [None, "XII"] and len(errors) == 1
+
+
+def test_mass_and_count():
+    options = {"dictionary": ORGANIC_ATOMS, "keys": None}
+    assert convert_chunk("mass", options, ["H2O", "C6H12O6", "H2O"])[0] == [
+        "18",
+        "180",
+        "18",
+    ]
+    counts = convert_chunk("count", options, ["18", "5", "-1", "100"])[0]
+    assert counts == [
+        str(LabelledNumerics.count_combinations(18, ORGANIC_ATOMS)),
+        "1",
+        "0",
+        str(LabelledNumerics.count_combinations(100, ORGANIC_ATOMS)),
+    ]
+    selected = {"dictionary": ORGANIC_ATOMS, "keys": ["H", "O"]}
+    assert convert_chunk("count", selected, ["18"])[0] == ["2"]  # H18, H2O
+
+
+def test_count_negative_first_chunk():
+    # the first chunk of a dictionary builds the count table, negative masses must not break it
+    options = {"dictionary": {"A": 2, "B": 3}, "keys": None}
+    assert convert_chunk("count", options, ["-3", "-1"]) == (["0", "0"], [])
+    assert convert_chunk("count", options, ["6", "-2"])[0] == ["2", "0"]  # A3, B2
+
+
+def test_count_max_mass(monkeypatch, capsys):
+    options = {"dictionary": ORGANIC_ATOMS, "keys": None, "max_mass": 100}
+    results, errors = convert_chunk("count", options, ["18", "10000000"])
+    assert results == ["4", None] and "maximum 100" in errors[0][1]
+    monkeypatch.setattr("sys.stdin", io.StringIO("18\n10000000\n"))
+    assert main(["count", "--max-mass", "100", "-q"]) == 1
+    assert "row 2" in capsys.readouterr().err
+
+
+def test_main_lines(tmp_path, capsys):
+    path = tmp_path / "numbers.txt"
+    path.write_text("1999\n4\n\n12\n")
+    assert main(["arab2roman", str(path), "--chunk-size", "2"]) == 0
+    out, err = capsys.readouterr()
+    assert out == "MCMXCIX\nIV\n\nXII\n"
+    assert "4 rows" in err and "rows/s" in err
+
+
+def test_main_csv(tmp_path, capsys):
+    path = tmp_path / "molecules.csv"
+    path.write_text("name,formula\nwater,H2O\nsalt,NaCl\nmethane,CH4\n")
+    assert main(["mass", "--csv", "--column", "formula", str(path), "-q"]) == 1
+    assert "row 2" in capsys.readouterr().err
+
+    output = tmp_path / "out.csv"
+    arguments = ["mass", str(path), "--csv", "--column", "formula", "-o", str(output)]
+    assert main(arguments + ["--on-error", "blank", "-q"]) == 0
+    assert output.read_text() == (
+        "name,formula,mass\nwater,H2O,18\nsalt,NaCl,\nmethane,CH4,16\n"
+    )
+    assert main(arguments + ["--on-error", "skip", "--replace", "-q"]) == 0
+    assert output.read_text() == "name,formula\nwater,18\nmethane,16\n"
+
+    dictionary = tmp_path / "dictionary.json"
+    dictionary.write_text(json.dumps({"H": 1, "C": 12, "O": 16, "Na": 23, "Cl": 35}))
+    assert main(arguments + ["--dictionary", str(dictionary), "-q"]) == 0
+    assert output.read_text().splitlines()[2] == "salt,NaCl,58"
+
+
+def test_main_output_and_stdin(tmp_path, monkeypatch, capsys):
+    assert main(["arab2roman", "-o", str(tmp_path / "missing" / "out.txt")]) == 1
+    assert "No such file or directory" in capsys.readouterr().err
+    # csv from stdin keeps the line endings inside quoted cells
+    data = b'name,formula\r\n"two\r\nlines",H2O\r\n'
+    monkeypatch.setattr("sys.stdin", io.TextIOWrapper(io.BytesIO(data)))
+    output = tmp_path / "out.csv"
+    assert main(["mass", "--csv", "--column", "formula", "-o", str(output), "-q"]) == 0
+    with open(output, newline="") as file:
+        assert file.read() == 'name,formula,mass\n"two\r\nlines",H2O,18\n'
+
+
+def test_main_workers(tmp_path, monkeypatch, capsys):
+    numbers = [str(number) for number in range(0, 4000, 7)]
+    monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(numbers) + "\n"))
+    assert main(["arab2roman", "--workers", "2", "--chunk-size", "50", "-q"]) == 0
+    out = capsys.readouterr().out.split()
+    assert convert_chunk("roman2arab", {}, out)[0] == numbers
+
+
+def test_main_usage():
+    with pytest.raises(SystemExit):
+        main(["arab2roman", "--chunk-size", "0"])
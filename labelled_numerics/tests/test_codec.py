@@ -0,0 +1,60 @@
+import pytest
+
+from labelled_numerics import LabelCodec, LabelledNumerics, compile_dictionary
+from labelled_numerics.roman_numbers import RomanNumbers
+
+organic_atoms = {"H": 1, "C": 12, "N": 14, "O": 16, "Cl": 35}
+
+
+def test_compile_is_cached():
+    assert compile_dictionary(organic_atoms) is compile_dictionary(dict(organic_atoms))
+    codec = compile_dictionary(organic_atoms)
+    assert compile_dictionary(codec) is codec
+
+
+def test_codec_orders():
+    codec = LabelCodec(RomanNumbers.conversion_dict)
+    assert codec.zero_label == "zero"
+    assert codec.by_value[0] == ("M", 1000)
+    assert all(value > 0 for _, value in codec.chunks)
+    assert codec.by_length[0] == ("zero", 0)
+    assert codec.inverse[900] == "CM"
+    assert dict(codec) == RomanNumbers.conversion_dict
+
+
+def test_codec_in_place_of_dict():
+    codec = compile_dictionary(organic_atoms)
+    assert LabelledNumerics.num2label(13, codec, sep=" ") == "C H"
+    assert LabelledNumerics.label2num("C H", codec) == 13
+    assert LabelledNumerics("H H O", codec).sum_values == 18
+
+
+def test_validation():
+    with pytest.raises(ValueError):
+        LabelledNumerics("A", {"A": 1, "B": 1})
+    with pytest.raises(ValueError):
+        LabelledNumerics("A", {"A": -1})
+
+
+def test_tokenize_value_order():
+    codec = compile_dictionary(RomanNumbers.conversion_dict)
+    assert codec.tokenize("MCMXCIX") == ["M", "CM", "XC", "IX"]
+    assert codec.tokenize("  M M CM ") == ["M", "M", "CM"]
+    # reading stops where the value order is broken
+    assert codec.tokenize("IM") == ["I"]
+    assert LabelledNumerics.formate_chunky("MMMCMXCVIII", codec) == (
+        "M M M CM XC V I I I"
+    )
+
+
+def test_tokenize_longest_match():
+    codec = compile_dictionary(organic_atoms)
+    assert codec.tokenize("HClCC C H HH", sorted_inv=False) == (
+        ["Cl", "H", "H", "H", "H", "C", "C", "C"]
+    )
+    long_formula = "CClHHON" * 5000
+    labels = LabelledNumerics.formate_chunky(
+        long_formula, organic_atoms, sorted_inv=False
+    ).split()
+    assert len(labels) == 30000
+    assert labels.count("Cl") == 5000
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+
+from labelled_numerics import LabelledNumerics
+from labelled_numerics.utils import combinations
+
+organic_atoms = {
+    "H": 1,
+    "C": 12,
+    "N": 14,
+    "O": 16,
+    "F": 19,
+    "P": 31,
+    "S": 32,
+    "Cl": 35,
+    "Br": 80,
+    "I": 127,
+}
+
+
+def test_count_combinations():
+    counts = LabelledNumerics.count_combinations_range(100, organic_atoms)
+    for mass in range(0, 101):
+        expected = len(LabelledNumerics.get_combinations(mass, organic_atoms))
+        assert counts[mass] == expected
+    assert LabelledNumerics.count_combinations(34, organic_atoms, ["H", "O"]) == 3
+    assert LabelledNumerics.count_combinations(100, organic_atoms) == counts[100]
+
+
+def test_count_combinations_overflow():
+    with pytest.raises(OverflowError):
+        LabelledNumerics.count_combinations_range(30000, organic_atoms)
+    exact = LabelledNumerics.count_combinations_range(
+        30000, organic_atoms, dtype=object
+    )
+    assert exact[-1] == LabelledNumerics.count_combinations(30000, organic_atoms)
+    assert exact[-1] > 2**63
+
+
+def test_iter_combinations():
+    all_combinations = LabelledNumerics.get_combinations(60, organic_atoms)
+    assert list(LabelledNumerics.iter_combinations(60, organic_atoms)) == (
+        all_combinations
+    )
+    assert list(
+        LabelledNumerics.iter_combinations(60, organic_atoms, limit=5, offset=10)
+    ) == (all_combinations[10:15])
+    # deeper than the recursion limit
+    deep = LabelledNumerics.iter_combinations(5000, {"H": 1, "O": 16}, limit=1)
+    assert next(deep) == [1] * 5000
+
+
+def test_parallel_combinations():
+    serial = LabelledNumerics.get_combinations(70, organic_atoms)
+    assert LabelledNumerics.get_combinations(70, organic_atoms, workers=2) == serial
+    assert (
+        LabelledNumerics.get_combinations(70, organic_atoms, workers=2, split_depth=3)
+        == serial
+    )
+    with pytest.raises(ValueError):
+        LabelledNumerics.get_combinations(70, organic_atoms, workers=0)
+
+
+def test_balanced_split():
+    candidates = list(organic_atoms.values())
+    serial = LabelledNumerics.get_combinations(160, organic_atoms)
+    groups = combinations.balanced_split(160, candidates, 8)
+    assert len(groups) == 8
+    found = []
+    sizes = []
+    for group in groups:
+        compositions = combinations._search_group(
+            (combinations.positive_candidates(candidates), group)
+        )
+        found.extend(compositions)
+        sizes.append(len(compositions))
+    assert found == serial
+    # about 1 / 8 of the compositions each, not most of them in the first group
+    assert max(sizes) < 0.2 * len(serial)
+    assert combinations.balanced_split(5, [7], 4) == []
+    with pytest.raises(ValueError):
+        combinations.split_search(160, candidates, -1)
+
+
+def test_combinations_batch():
+    targets = [18.0, 44.2, 3.4, 60, 0]
+    batch = LabelledNumerics.get_combinations_batch(
+        targets, organic_atoms, tolerance=0.5
+    )
+    assert batch[0] == LabelledNumerics.get_combinations(18, organic_atoms)
+    assert batch[1] == LabelledNumerics.get_combinations(44, organic_atoms)
+    assert batch[2] == LabelledNumerics.get_combinations(3, organic_atoms)
+    assert batch[4] == [[]]
+    wide = LabelledNumerics.get_combinations_batch([30], organic_atoms, tolerance=2)
+    assert wide[0] == [
+        combination
+        for mass in range(28, 33)
+        for combination in LabelledNumerics.get_combinations(mass, organic_atoms)
+    ]
+    counts = LabelledNumerics.get_combinations_batch(
+        targets + [30], organic_atoms, tolerance=2, counts_only=True
+    )
+    assert counts[-1] == len(wide[0])
+
+
+def test_batch_counts_large_table():
+    # every count up to mass 2000 fits int64, the prefix sums of the table do not
+    candidates = list(range(1, 11))
+    exact = combinations.count_table(2000, candidates, dtype=object)
+    assert exact.max() < 2**63 <= exact.sum()
+    counts = combinations.batch_counts([1999.5, 1000], candidates, tolerance=0.5)
+    assert counts.tolist() == [exact[1999] + exact[2000], exact[1000]]
+    with pytest.raises(OverflowError):
+        combinations.batch_counts([1000], candidates, tolerance=1000)
+    wide = combinations.batch_counts([1000], candidates, tolerance=1000, dtype=object)
+    assert wide.tolist() == [exact.sum()]
+
+
+def test_async_combinations():
+    async def chunks(mass, chunk_size):
+        return [
+            chunk
+            async for chunk in LabelledNumerics.aiter_combinations(
+                mass, organic_atoms, chunk_size=chunk_size
+            )
+        ]
+
+    for mass in (0, 1, 18, 100):
+        expected = LabelledNumerics.get_combinations(mass, organic_atoms)
+        found = asyncio.run(chunks(mass, 50))
+        assert all(0 < len(chunk) <= 50 for chunk in found)
+        assert [combination for chunk in found for combination in chunk] == expected
+    assert asyncio.run(chunks(-1, 50)) == []
+    assert asyncio.run(
+        LabelledNumerics.aget_combinations(34, organic_atoms, ["H", "O"])
+    ) == LabelledNumerics.get_combinations(34, organic_atoms, ["H", "O"])
+
+
+def test_async_combinations_cancel():
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        ticking = asyncio.ensure_future(ticker())
+        # far too many combinations to finish, the timeout stops the search
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                LabelledNumerics.aget_combinations(1000, organic_atoms), 0.05
+            )
+        ticking.cancel()
+        return ticks
+
+    # the event loop kept running other tasks during the search
+    assert asyncio.run(scenario()) > 1
@@ -0,0 +1,67 @@
+import pytest
+
+from labelled_numerics import CompositionIndex, LabelledArray, LabelledNumerics
+
+organic_atoms = {"H": 1, "C": 12, "N": 14, "O": 16, "Cl": 35}
+
+
+def _sorted_rows(array: LabelledArray) -> list:
+    return sorted(map(tuple, array.counts.tolist()))
+
+
+def test_build_and_lookup(tmp_path):
+    path = tmp_path / "organic.idx"
+    index = CompositionIndex.build(path, 80, organic_atoms)
+    assert index.max_mass == 80 and index.labels == list(organic_atoms)
+    assert len(index) == sum(
+        LabelledNumerics.count_combinations(mass, organic_atoms) for mass in range(81)
+    )
+    for mass in (0, 1, 18, 44, 80):
+        expected = LabelledArray.from_combinations(
+            LabelledNumerics.get_combinations(mass, organic_atoms), organic_atoms
+        )
+        assert _sorted_rows(index.lookup(mass)) == _sorted_rows(expected)
+        assert index.count(mass) == len(expected)
+    assert "H2O" in index.lookup(18).condensed_names()
+    index.close()
+
+    # reopened by another reader, the ranges are inclusive and sorted by mass
+    with CompositionIndex.open(path) as reopened:
+        window = reopened.lookup_range(17.5, 19.2)
+        assert window.sum_values.tolist() == [18] * reopened.count(18) + [
+            19
+        ] * reopened.count(19)
+        counts = reopened.counts(16, 18)
+        assert not counts.flags.writeable
+        assert reopened.count(20.5, 20.7) == 0
+        with pytest.raises(ValueError):
+            reopened.lookup(81)
+
+
+def test_selected_keys(tmp_path):
+    index = CompositionIndex.build(
+        tmp_path / "ho.idx", 40, organic_atoms, selected_keys=["H", "O"]
+    )
+    assert index.lookup(18).condensed_names() == ["H18", "H2O"]
+    assert (index.counts(0, 40)[:, 1] == 0).all()  # no carbon
+
+
+def test_rebuild_keeps_open_readers(tmp_path):
+    path = tmp_path / "organic.idx"
+    old = CompositionIndex.build(path, 40, organic_atoms)
+    before = old.counts(0, 40).tolist()
+    with CompositionIndex.build(path, 20, organic_atoms) as new:
+        assert new.max_mass == 20
+    # the old mapping still reads the old file
+    assert old.counts(0, 40).tolist() == before
+    old.close()
+    assert [file.name for file in tmp_path.iterdir()] == ["organic.idx"]
+
+
+def test_invalid(tmp_path):
+    path = tmp_path / "not_an_index"
+    path.write_bytes(b"something else")
+    with pytest.raises(ValueError):
+        CompositionIndex.open(path)
+    with pytest.raises(TypeError):
+        CompositionIndex.build(tmp_path / "x.idx", 10.5, organic_atoms)
@@ -0,0 +1,52 @@
+import pytest
+
+from labelled_numerics import LabelledNumerics
+from labelled_numerics.utils.formula import formula_terms, parse_formula
+
+organic_atoms = {"H": 1, "C": 12, "N": 14, "O": 16, "Cl": 35}
+
+
+def test_groups_and_hydrates():
+    assert parse_formula("Ca(OH)2") == {"Ca": 1, "O": 2, "H": 2}
+    assert parse_formula("K4[Fe(CN)6]") == {"K": 4, "Fe": 1, "C": 6, "N": 6}
+    assert parse_formula("((CH2)2O)3") == {"C": 6, "H": 12, "O": 3}
+    assert parse_formula("CuSO4·5H2O") == {"Cu": 1, "S": 1, "O": 9, "H": 10}
+    assert parse_formula("CuSO4.5H2O") == parse_formula("CuSO4*5 H2 O")
+    assert parse_formula("2H2O") == {"H": 4, "O": 2}
+
+
+def test_counts_are_not_expanded():
+    assert formula_terms("C1000H2000") == [("C", 1000), ("H", 2000)]
+    assert parse_formula("CH3CH2OH") == {"C": 2, "H": 6, "O": 1}
+    assert parse_formula("H0O") == {"O": 1}
+    assert parse_formula("") == {}
+
+
+def test_dictionary_labels():
+    assert parse_formula("MeOAc", {"Me": 15, "O": 16, "OAc": 59}) == {"Me": 1, "OAc": 1}
+    assert parse_formula("CCl4", organic_atoms) == {"C": 1, "Cl": 4}
+    with pytest.raises(ValueError, match="position 0"):
+        parse_formula("Xe", organic_atoms)
+
+
+@pytest.mark.parametrize(
+    "formula, message",
+    [
+        ("h2o", "position 0"),
+        ("Ca(OH", "not closed"),
+        ("Ca(OH]2", "unbalanced"),
+        ("H2 3O", "unexpected number"),
+        ("(H2O.H)", "inside a group"),
+    ],
+)
+def test_invalid_formulas(formula, message):
+    with pytest.raises(ValueError, match=message):
+        parse_formula(formula)
+
+
+def test_labelled_numerics_formulas():
+    assert LabelledNumerics.convert_formula("C2H5OH") == "C C H H H H H O H"
+    assert LabelledNumerics.convert_formula("Ca(OH)2") == "Ca O O H H"
+    assert LabelledNumerics.formula_counts("C6H12O6") == {"C": 6, "H": 12, "O": 6}
+    molecule = LabelledNumerics.from_formula("C6H12O6", organic_atoms)
+    assert molecule.sum_values == 180
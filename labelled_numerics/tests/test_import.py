@@ -0,0 +1,31 @@
+import subprocess
+import sys
+
+
+def test_import_is_lightweight():
+    # fresh interpreter, the test session itself has numpy imported already
+    code = (
+        "import logging, sys\n"
+        "import labelled_numerics\n"
+        "print('numpy' in sys.modules, 'concurrent.futures' in sys.modules,"
+        " bool(logging.getLogger().handlers),"
+        " logging.getLogger().level == logging.WARNING)\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.split()
+    assert output == ["False", "False", "False", "True"]
+
+
+def test_scalar_roman_numbers_do_not_import_numpy():
+    code = (
+        "import sys\n"
+        "from labelled_numerics import RomanNumbers\n"
+        "assert RomanNumbers('XIV').arab == 14\n"
+        "assert RomanNumbers.arab2roman(1999) == 'M CM XC IX'\n"
+        "print('numpy' in sys.modules)\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.split()
+    assert output == ["False"]
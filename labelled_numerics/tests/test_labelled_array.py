@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from labelled_numerics import LabelledArray, LabelledNumerics
+
+organic_atoms = {"H": 1, "C": 12, "N": 14, "O": 16, "Cl": 35}
+
+
+def test_from_combinations():
+    combinations = LabelledNumerics.get_combinations(44, organic_atoms)
+    array = LabelledArray.from_combinations(combinations, organic_atoms)
+    assert len(array) == len(combinations)
+    assert (array.sum_values == 44).all()
+    assert (array.n_labels == [len(combination) for combination in combinations]).all()
+    for index in [0, 5, -1]:
+        assert array[index].values == combinations[index]
+    assert "CO2" in array.condensed_names()
+    with pytest.raises(ValueError):
+        LabelledArray.from_combinations([[2]], organic_atoms)
+
+
+def test_operations():
+    names = ["H H O", "C O O", "H Cl", "N N"]
+    array = LabelledArray.from_names(names, organic_atoms)
+    assert array.counts.tolist()[0] == [2, 0, 0, 1, 0]
+    assert array.sum_values.tolist() == [18, 44, 36, 28]
+    assert np.allclose(array.mean, [6, 44 / 3, 18, 14])
+    assert array.names() == names
+    assert array.condensed_names() == ["H2O", "CO2", "HCl", "N2"]
+    light = array.filter(array.sum_values < 40)
+    assert light.condensed_names() == ["H2O", "HCl", "N2"]
+    assert array.sort_by_value().condensed_names() == ["H2O", "N2", "HCl", "CO2"]
+    assert array.sort_by_value(descending=True)[0].condensed_name == "CO2"
+    assert array[1:3].names() == names[1:3]
+    joined = array.append(LabelledNumerics("C H H H H", organic_atoms))
+    assert len(joined) == 5 and joined[-1].condensed_name == "H4C"
+    assert len(LabelledArray.concatenate([array, light])) == 7
+    # round trip through instances
+    instances = array.to_list()
+    assert [instance.name for instance in instances] == names
+    assert (LabelledArray.from_instances(instances).counts == array.counts).all()
+    with pytest.raises(ValueError):
+        array.counts[0, 0] = 5  # read only
+    with pytest.raises(ValueError):
+        LabelledArray.concatenate([array, LabelledArray.from_names(["H"], {"H": 1})])
+    empty = LabelledArray.from_names([], organic_atoms)
+    assert len(empty) == 0 and empty.sum_values.tolist() == []
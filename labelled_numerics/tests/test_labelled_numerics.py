@@ -0,0 +1,60 @@
+import pytest
+
+from labelled_numerics import LabelledNumerics
+
+organic_atoms = {"H": 1, "C": 12, "N": 14, "O": 16, "Cl": 35}
+
+
+def test_condensed_name():
+    molecule = LabelledNumerics("O H H Cl C O", organic_atoms)
+    assert molecule.counts.tolist() == [2, 1, 0, 2, 1]
+    assert molecule.condensed_name == "O2H2ClC"
+    assert molecule.sum_values == 81
+
+
+def test_count_vector():
+    water = LabelledNumerics.from_counts({"H": 2, "O": 1}, organic_atoms)
+    assert water.name == "H H O"
+    assert water.condensed_name == "H2O"
+    assert water.sum_values == 18
+    assert water.values == [1, 1, 16]
+    assert water.mean == 6
+    assert LabelledNumerics("H O H", organic_atoms).counts.tolist() == (
+        water.counts.tolist()
+    )
+    oxygen = LabelledNumerics.from_counts([0, 0, 0, 2, 0], organic_atoms)
+    complex_ = water.append(oxygen)
+    assert complex_.condensed_name == "H2O3"
+    assert complex_.remove(water).condensed_name == "O2"
+    # operators give numbers for every operand, compositions come from counts
+    assert water + oxygen == 50
+    assert water * oxygen == 18 * 32
+    assert 3 * water == water * 3 == 54
+    assert LabelledNumerics("H O H", organic_atoms) * 2 == 36
+    tripled = LabelledNumerics.from_counts(3 * water.counts, organic_atoms)
+    assert tripled.condensed_name == "H6O3"
+    with pytest.raises(ValueError):
+        water.remove(oxygen)
+    with pytest.raises(ValueError):
+        LabelledNumerics.from_counts([1, 2], organic_atoms)
+
+
+def test_large_count_vector():
+    polymer = LabelledNumerics.from_counts([20000, 10000, 300, 5000, 10], organic_atoms)
+    assert polymer.sum_values == 20000 + 120000 + 4200 + 80000 + 350
+    assert polymer.condensed_name == "H20000C10000N300O5000Cl10"
+    assert len(polymer.name.split()) == 35310
+
+
+def test_cached_values_invalidated():
+    molecule = LabelledNumerics("H H O", organic_atoms)
+    assert molecule.sum_values == 18
+    assert molecule.condensed_name == "H2O"
+    molecule.values.append(100)  # returned list is a copy
+    assert molecule.values == [1, 1, 16]
+    molecule.set_name("C O O")
+    assert molecule.sum_values == 44
+    assert molecule.condensed_name == "CO2"
+    molecule.set_dictionary({"C": 13, "O": 16})
+    assert molecule.sum_values == 45
+    assert molecule.mean == 15
@@ -0,0 +1,52 @@
+import json
+
+from labelled_numerics import (
+    LabelledNumerics,
+    RomanNumbers,
+    collect,
+    disable_cache,
+    enable_cache,
+)
+from labelled_numerics.utils import metrics
+
+organic_atoms = {"H": 1, "C": 12, "N": 14, "O": 16, "Cl": 35}
+
+
+def test_collect():
+    assert metrics.active_collector() is None
+    with collect() as collector:
+        combinations = LabelledNumerics.get_combinations(40, organic_atoms)
+        LabelledNumerics.formate_chunky("HClCC", organic_atoms, sorted_inv=False)
+        RomanNumbers.replace_all_arabs("In 1999 there were 3 ships.")
+        with collect() as inner:  # nested blocks collect on their own
+            LabelledNumerics.num2label(1999, RomanNumbers.conversion_dict)
+    assert metrics.active_collector() is None
+    report = collector.as_dict()
+    json.dumps(report)
+    calls = report["calls"]
+    assert calls["LabelledNumerics.get_combinations"]["count"] == 1
+    assert calls["LabelledNumerics._combinations_sum"]["time"] > 0
+    assert calls["RomanNumbers.replace_all_arabs"]["count"] == 1
+    assert "LabelledNumerics.num2label" not in calls
+    assert "LabelledNumerics.num2label" in inner.as_dict()["calls"]
+    counters = report["counters"]
+    assert counters["search.nodes"] >= len(combinations)
+    assert counters["search.pruned"] > 0
+    assert counters["tokenize.tokens"] == 4
+    assert report["cache"] is None
+    # nothing is collected outside of the block
+    LabelledNumerics.get_combinations(40, organic_atoms)
+    assert collector.as_dict()["calls"] == calls
+
+
+def test_collect_cache_statistics():
+    enable_cache()
+    try:
+        with collect() as collector:
+            for _ in range(3):
+                LabelledNumerics.convert_formula("C6H12O6")
+        report = collector.as_dict()
+        assert report["calls"]["LabelledNumerics.convert_formula"]["count"] == 3
+        assert report["cache"]["hits"] == 2
+    finally:
+        disable_cache()
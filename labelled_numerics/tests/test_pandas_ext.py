@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from labelled_numerics import (  # noqa: E402
+    LabelledArray,
+    LabelledNumerics,
+    RomanNumbers,
+)
+from labelled_numerics.pandas_ext import CompositionDtype, RomanArray  # noqa: E402
+
+organic_atoms = {"H": 1, "C": 12, "N": 14, "O": 16, "Cl": 35}
+
+
+def test_roman_dtype():
+    numbers = pd.Series([1999, "IV", None, RomanNumbers("M L")], dtype="roman")
+    assert isinstance(numbers.array, RomanArray)
+    assert numbers[0] == 1999 and numbers.isna().tolist() == [False, False, True, False]
+    assert numbers.astype(str).tolist()[:2] == ["M CM XC IX", "IV"]
+    assert numbers.astype("Int64").tolist() == [1999, 4, pd.NA, 1050]
+    assert numbers.sort_values().astype("Int64").tolist() == [4, 1050, 1999, pd.NA]
+    assert (numbers + 1).astype("Int64").tolist() == [2000, 5, pd.NA, 1051]
+    assert (numbers // 2)[1] == RomanNumbers("II")
+    assert (numbers > 100).tolist() == [True, False, pd.NA, True]
+    assert (numbers == RomanNumbers("IV")).tolist() == [False, True, pd.NA, False]
+    assert numbers.max() == 1999 and numbers.sum() == 3053
+    with pytest.raises(ValueError):
+        numbers * 3
+    with pytest.raises(TypeError):
+        pd.Series([1.5], dtype="roman")
+    frame = pd.DataFrame({"group": [1, 1, 2, 2], "number": numbers})
+    maxima = frame.groupby("group")["number"].max()
+    assert maxima.dtype == "roman" and maxima.tolist() == [1999, 1050]
+    assert frame.groupby("group")["number"].sum().tolist() == [2003, 1050]
+    assert pd.Series(["III", "I", "III"], dtype="roman").value_counts().tolist() == [
+        2,
+        1,
+    ]
+
+
+def test_composition_dtype():
+    dtype = CompositionDtype(organic_atoms)
+    molecules = pd.Series(["H H O", "C O O", None, "O H H"], dtype=dtype)
+    assert molecules.dtype == CompositionDtype(dict(organic_atoms))
+    assert molecules[0].condensed_name == "H2O"
+    assert molecules.astype(str).tolist() == ["H2O", "CO2", np.nan, "H2O"]
+    assert molecules.array.sum_values.tolist() == [18, 44, 0, 18]
+    assert (molecules == LabelledNumerics("H O H", organic_atoms)).tolist() == [
+        True,
+        False,
+        pd.NA,
+        True,
+    ]
+    assert (2 * molecules + molecules)[1].condensed_name == "C3O6"
+    assert molecules.value_counts().tolist() == [2, 1]
+    assert molecules.sort_values().astype(str).tolist()[:3] == ["H2O", "H2O", "CO2"]
+    assert molecules.sum().condensed_name == "H4CO4"
+    sums = pd.DataFrame({"group": [1, 1, 2, 2], "molecule": molecules})
+    assert sums.groupby("group")["molecule"].sum().astype(str).tolist() == [
+        "H2CO3",
+        "H2O",
+    ]
+    array = LabelledArray.from_names(["H Cl"], organic_atoms)
+    assert pd.Series(array, dtype=dtype)[0].condensed_name == "HCl"
+    with pytest.raises(ValueError):
+        molecules - pd.Series(["C"] * 4, dtype=dtype)
+
+
+def test_masked_array_is_abstract():
+    from labelled_numerics.pandas_ext import _MaskedArray
+
+    class Incomplete(_MaskedArray):
+        def _new(self, data, mask):
+            return self
+
+    with pytest.raises(TypeError):
+        Incomplete()
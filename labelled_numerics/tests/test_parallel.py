@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from labelled_numerics import (
+    LabelledNumerics,
+    RomanNumbers,
+    collect,
+    disable_cache,
+    enable_cache,
+    map_convert,
+)
+
+organic_atoms = {"H": 1, "C": 12, "N": 14, "O": 16, "Cl": 35}
+
+
+def test_map_convert():
+    numbers = list(range(0, 4000, 3))
+    labels = map_convert(numbers, "arab2roman", workers=4, chunk_size=50)
+    assert labels == RomanNumbers.arab2roman_batch(numbers).tolist()
+    assert map_convert(labels, "roman2arab", workers=3, chunk_size=7) == numbers
+    assert map_convert([1999], nice=True) == ["M CM XC IX"]
+    assert map_convert(
+        ["H2O", "CH4", "HCl"], "mass", workers=2, conversion_dict=organic_atoms
+    ) == [18, 16, 36]
+    assert map_convert(
+        iter(range(5)), lambda number: number * 2, workers=2, chunk_size=2
+    ) == [0, 2, 4, 6, 8]
+    assert map_convert([], "roman2arab", workers=2) == []
+    with pytest.raises(ValueError):
+        map_convert(numbers, "sqrt")
+    with pytest.raises(ValueError):
+        map_convert(numbers, workers=0)
+    with pytest.raises(KeyError):  # errors of the conversion reach the caller
+        map_convert(["IIII"], "roman2arab", workers=2)
+
+
+def test_map_convert_collect():
+    with collect() as collector:
+        map_convert(["H2O"] * 100, "convert_formula", workers=4, chunk_size=10)
+    assert collector.calls["LabelledNumerics.convert_formula"][0] == 100
+
+
+def test_threads_share_cache():
+    cache = enable_cache(maxsize=16)  # small, entries are evicted all the time
+    numbers = list(range(200))
+    expected = [
+        LabelledNumerics.num2label(number, organic_atoms, sep=" ") for number in numbers
+    ]
+    failures = []
+
+    def convert():
+        try:
+            for _ in range(20):
+                result = [
+                    LabelledNumerics.num2label(number, organic_atoms, sep=" ")
+                    for number in numbers
+                ]
+                if result != expected:
+                    failures.append(result)
+        except Exception as error:
+            failures.append(error)
+
+    threads = [threading.Thread(target=convert) for _ in range(8)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        info = cache.info()
+    finally:
+        disable_cache()
+    assert not failures
+    assert info["size"] <= 16 and info["hits"] + info["misses"] == 8 * 20 * 200 + 200
+
+
+def test_collect_per_thread():
+    seen = []
+
+    def other():
+        LabelledNumerics.count_combinations(50, organic_atoms)
+        with collect() as own:
+            LabelledNumerics.convert_formula("H2O")
+        seen.append(own.calls)
+
+    with collect() as collector:
+        thread = threading.Thread(target=other)
+        thread.start()
+        thread.join()
+    # calls of the other thread are not collected by this block and vice versa
+    assert "LabelledNumerics.count_combinations" not in collector.calls
+    assert list(seen[0]) == ["LabelledNumerics.convert_formula"]
@@ -1,3 +1,6 @@
+import numpy as np
+import pytest
+
 from labelled_numerics.roman_numbers import RomanNumbers
 
 arabs = [1050, 1999, 1, 0, 3, 5.67893, 3999]
@@ -72,6 +75,137 @@ def test_cases_add_to():
         )
 
 
+def test_batch_conversion():
+    numbers = np.arange(0, 4000)
+    labels = RomanNumbers.arab2roman_batch(numbers)
+    assert labels[1999] == RomanNumbers.arab2roman(1999)
+    assert labels[0] == "zero"
+    assert (RomanNumbers.roman2arab_batch(labels) == numbers).all()
+    assert RomanNumbers.arab2roman_batch([3, 1050], nice=True).tolist() == [
+        "III",
+        "M L",
+    ]
+    assert RomanNumbers.roman2arab_batch(romans).tolist() == arabs
+    with pytest.raises(ValueError):
+        RomanNumbers.arab2roman_batch([4000])
+    with pytest.raises(TypeError):
+        RomanNumbers.arab2roman_batch([1.5])
+
+
+def test_lookup_tables():
+    assert RomanNumbers.roman2arab("MCMXCIX") == 1999
+    assert RomanNumbers.roman2arab("M CM XC IX") == 1999
+    assert RomanNumbers.roman2arab("CCC") == 300
+    with_tables = RomanNumbers("MMCCCXLVIII")
+    RomanNumbers.use_tables = False
+    try:
+        without_tables = RomanNumbers("MMCCCXLVIII")
+        assert RomanNumbers.arab2roman(2348) == with_tables.label
+    finally:
+        RomanNumbers.use_tables = True
+    for attribute in ["name", "label", "nice_label", "arab"]:
+        assert getattr(with_tables, attribute) == getattr(without_tables, attribute)
+
+
+@pytest.mark.parametrize("use_tables", [True, False])
+def test_spellings_without_tables(use_tables):
+    # the tables only speed up the conversion, the accepted spellings are the same
+    RomanNumbers.use_tables = use_tables
+    try:
+        for spelling in ["MCMXCIX", "M CM XC IX"]:
+            assert RomanNumbers.roman2arab(spelling) == 1999
+        assert RomanNumbers.roman2arab("CCC") == RomanNumbers.roman2arab("C C C")
+        assert RomanNumbers.roman2arab("M CM XC II") == 1992
+        assert RomanNumbers("MMCCCXLVIII").arab == 2348
+        for invalid in ["hello", "IIII", "MCMXCIX ", ""]:
+            with pytest.raises(KeyError):
+                RomanNumbers.roman2arab(invalid)
+    finally:
+        RomanNumbers.use_tables = True
+
+
+@pytest.mark.parametrize("use_tables", [True, False])
+def test_invalid_labels_fail_at_construction(use_tables):
+    RomanNumbers.use_tables = use_tables
+    try:
+        for invalid in ["hello", ""]:
+            with pytest.raises(KeyError):
+                RomanNumbers(invalid)
+        assert RomanNumbers("MMCCCXLVIII").arab == 2348
+    finally:
+        RomanNumbers.use_tables = True
+
+
+def test_replace_stream():
+    lines = ["In 1999 we paid 3.14 for 42 apples,\n", "not 12345.\n"]
+    romans_out = list(RomanNumbers.replace_stream(iter(lines)))
+    assert romans_out == [
+        "In MCMXCIX we paid 3.14 for XLII apples,\n",
+        "not 12345.\n",
+    ]
+    assert list(RomanNumbers.replace_stream(romans_out, "roman2arab")) == lines
+    nice = list(RomanNumbers.replace_stream(lines, compact=False))
+    assert nice[0] == "In M CM XC IX we paid 3.14 for XL II apples,\n"
+    assert list(RomanNumbers.replace_stream(nice, "roman2arab", compact=False)) == lines
+    assert RomanNumbers.replace_all_arabs("bla 34 bla 56 bla") == (
+        "bla XXX IV bla L V I bla"
+    )
+
+
+def test_arithmetic():
+    total = RomanNumbers("MCMXCIX") + RomanNumbers("I")
+    assert isinstance(total, RomanNumbers)
+    assert total.arab == 2000
+    assert total.name == "M M"
+    assert total.nice_label == "MM"
+    chain = RomanNumbers("X")
+    for _ in range(5):
+        chain = 2 * chain - 1
+    assert chain == 289
+    assert chain._name is None  # nothing rendered in between
+    assert chain.label == "C C L X X X IX"
+    assert RomanNumbers("X") // 3 == RomanNumbers("I I I")
+    assert RomanNumbers("X") % 3 == 1
+    assert RomanNumbers("X") / 4 == 2.5
+    fraction = RomanNumbers("V . VI") + RomanNumbers("I . III")
+    assert fraction.arab == 6.9
+    assert fraction.label == "V I . IX"
+    with pytest.raises(ValueError):
+        RomanNumbers("I") - 2
+    with pytest.raises(ValueError):
+        RomanNumbers("MM") * 2
+    with pytest.raises(TypeError):
+        RomanNumbers("I") + 1.5
+
+
+def test_from_int():
+    number = RomanNumbers.from_int(1999)
+    assert not hasattr(number, "__dict__")
+    assert number._derived is None
+    assert number.arab == 1999
+    assert number.name == "M CM XC IX"
+    assert number.nice_label == "M CM XC IX"
+    assert number._derived is None  # looked up in the tables, nothing cached
+    assert RomanNumbers.from_int(0).label == "zero"
+    assert RomanNumbers.from_int(3) == RomanNumbers("III")
+    with pytest.raises(ValueError):
+        RomanNumbers.from_int(4000)
+    with pytest.raises(TypeError):
+        RomanNumbers.from_int(2.0)
+
+    class Numeral(RomanNumbers):
+        __slots__ = ()
+
+    assert type(Numeral.from_int(4)) is Numeral
+    assert type(Numeral.from_int(4) + 1) is Numeral
+    RomanNumbers.use_tables = False
+    try:
+        assert RomanNumbers.from_int(1999).nice_label == "M CM XC IX"
+        assert RomanNumbers("MCMXCIX").arab == 1999
+    finally:
+        RomanNumbers.use_tables = True
+
+
 if __name__ == "__main__":
     test_cases_add_to()
     print("Everything passed")
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import socket
+
+import pytest
+
+from labelled_numerics.server import ConversionServer, MicroBatcher
+
+
+async def _exchange(reader, writer, requests: list) -> dict:
+    writer.write(b"".join(json.dumps(request).encode() + b"\n" for request in requests))
+    await writer.drain()
+    responses = [json.loads(await reader.readline()) for _ in requests]
+    return {response["id"]: response for response in responses}
+
+
+def test_server_tcp():
+    async def scenario():
+        server = ConversionServer(batch_size=8, max_wait=0.01)
+        await server.start()
+        reader, writer = await asyncio.open_connection(*server.address)
+        requests = [
+            {"id": number, "op": "arab2roman", "value": number} for number in range(20)
+        ]
+        requests += [
+            {"id": "nice", "op": "arab2roman", "value": 1999, "nice": True},
+            {"id": "arab", "op": "roman2arab", "value": "MCMXCIX"},
+            {"id": "mass", "op": "mass", "value": "C6H12O6"},
+            {"id": "count", "op": "count", "value": "18"},
+            {"id": "invalid", "op": "roman2arab", "value": "IIII"},
+            {"id": "unknown", "op": "sqrt", "value": 4},
+            {"id": "empty", "op": "mass", "value": ""},
+        ]
+        responses = await _exchange(reader, writer, requests)
+        writer.write(b"not json\n")
+        broken = json.loads(await reader.readline())
+        stats = (await _exchange(reader, writer, [{"id": 0, "op": "stats"}]))[0][
+            "result"
+        ]
+        writer.close()
+        await server.close()
+        return responses, broken, stats
+
+    responses, broken, stats = asyncio.run(scenario())
+    assert responses[4]["result"] == "IV" and responses[0]["result"] == "zero"
+    assert responses["nice"]["result"] == "M CM XC IX"
+    assert responses["arab"]["result"] == 1999
+    assert responses["mass"]["result"] == 180
+    assert responses["count"]["result"] == 4
+    for key in ("invalid", "unknown", "empty"):
+        assert "error" in responses[key]
+    assert broken == {"id": None, "error": "request must be a json object"}
+    # 21 arab2roman requests in batches of at most 8
+    assert stats["requests"] == 25 and stats["batches"] < stats["requests"]
+
+
+def test_concurrent_clients_share_batches():
+    async def scenario():
+        server = ConversionServer(batch_size=1000, max_wait=0.05)
+        await server.start()
+
+        async def client(number):
+            reader, writer = await asyncio.open_connection(*server.address)
+            request = {"id": number, "op": "arab2roman", "value": number}
+            response = await _exchange(reader, writer, [request])
+            writer.close()
+            return response[number]["result"]
+
+        results = await asyncio.gather(*(client(number) for number in range(1, 11)))
+        stats = server.batcher.stats()
+        await server.close()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+    assert results[:4] == ["I", "II", "III", "IV"]
+    assert stats["batches"] < 10
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="no Unix sockets")
+def test_server_unix(tmp_path):
+    async def scenario():
+        server = ConversionServer()
+        await server.start(path=str(tmp_path / "ln.sock"))
+        reader, writer = await asyncio.open_unix_connection(str(tmp_path / "ln.sock"))
+        response = await _exchange(
+            reader, writer, [{"id": 1, "op": "mass", "value": "H2O"}]
+        )
+        writer.close()
+        await server.close()
+        return response[1]
+
+    assert asyncio.run(scenario()) == {"id": 1, "result": 18}
+
+
+def test_expensive_requests_are_refused():
+    async def scenario():
+        server = ConversionServer(max_count=1000, max_formula_length=10)
+        await server.start()
+        reader, writer = await asyncio.open_connection(*server.address)
+        responses = await _exchange(
+            reader,
+            writer,
+            [
+                {"id": "count", "op": "count", "value": 10**9},
+                {"id": "mass", "op": "mass", "value": "C6H12O6" * 10},
+                {"id": "fine", "op": "count", "value": 1000},
+            ],
+        )
+        writer.close()
+        await server.close()
+        return responses
+
+    responses = asyncio.run(scenario())
+    assert "maximum 1000" in responses["count"]["error"]
+    assert "maximum 10" in responses["mass"]["error"]
+    assert responses["fine"]["result"] > 0
+
+
+def test_oversized_line_is_answered():
+    async def scenario():
+        server = ConversionServer()
+        await server.start()
+        reader, writer = await asyncio.open_connection(*server.address)
+        writer.write(b'{"id": 1, "op": "mass", "value": "' + b"C" * 100_000 + b'"}\n')
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        closed = await reader.read()
+        writer.close()
+        await server.close()
+        return response, closed
+
+    response, closed = asyncio.run(scenario())
+    assert response == {"id": None, "error": "request line is too long"}
+    assert closed == b""
+
+
+def test_micro_batcher_limits():
+    batches = []
+
+    def convert(key, values):
+        batches.append(list(values))
+        return [value.upper() for value in values], []
+
+    async def scenario():
+        batcher = MicroBatcher(convert, batch_size=3, max_wait=0.01)
+        futures = [batcher.submit("key", value) for value in "abcde"]
+        return await asyncio.gather(*futures)
+
+    assert asyncio.run(scenario()) == list("ABCDE")
+    assert batches == [
+        ["a", "b", "c"],
+        ["d", "e"],
+    ]  # full batch at once, the rest after max_wait
+    with pytest.raises(ValueError):
+        MicroBatcher(convert, batch_size=0)
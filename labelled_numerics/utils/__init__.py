@@ -1,3 +1,20 @@
+from ..utils.cache import cache_info, clear_cache, disable_cache, enable_cache
+from ..utils.codec import LabelCodec, compile_dictionary
+from ..utils.composition_index import CompositionIndex
+from ..utils.labelled_array import LabelledArray
 from ..utils.labelled_numerics import LabelledNumerics
+from ..utils.metrics import Collector, collect
 
-__all__ = ["LabelledNumerics"]  # defines API for this package (not considerd as unused)
+__all__ = [
+    "Collector",
+    "CompositionIndex",
+    "LabelCodec",
+    "LabelledArray",
+    "LabelledNumerics",
+    "cache_info",
+    "clear_cache",
+    "collect",
+    "compile_dictionary",
+    "disable_cache",
+    "enable_cache",
+]  # defines API for this package (not considerd as unused)
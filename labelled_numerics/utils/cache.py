@@ -0,0 +1,138 @@
+import functools
+import threading
+from collections import OrderedDict
+
+from labelled_numerics.utils.codec import compile_dictionary
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Size bounded mapping that evicts the least recently used entry, counting hits, misses and evictions.
+    Safe to use from several threads (every operation holds a lock, the cached function itself runs outside of it).
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        if not isinstance(maxsize, int) or maxsize < 1:
+            raise ValueError(f"maxsize must be a positive int, not {maxsize}")
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove all entries and reset the statistics"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+# cache used by the memoized conversions, None while caching is switched off
+_conversion_cache = None
+
+
+def enable_cache(maxsize: int = 4096) -> LRUCache:
+    """Switch on memoization of the conversions (num2label, label2num, formate_chunky, convert_formula,
+    RomanNumbers.formate_nice_roman). A new, empty cache is used, results are keyed per compiled dictionary and arguments.
+    :param maxsize: maximal number of cached results, defaults to 4096
+    :type maxsize: int, optional
+    :return: the cache
+    :rtype: LRUCache
+    """
+    global _conversion_cache
+    _conversion_cache = LRUCache(maxsize)
+    return _conversion_cache
+
+
+def disable_cache():
+    """Switch off memoization of the conversions and drop the cache"""
+    global _conversion_cache
+    _conversion_cache = None
+
+
+def clear_cache():
+    """Remove all cached conversions and reset the statistics (caching stays switched on)"""
+    if _conversion_cache is not None:
+        _conversion_cache.clear()
+
+
+def cache_info() -> dict:
+    """Hits, misses, evictions, size and maxsize of the conversion cache (None if caching is switched off)"""
+    if _conversion_cache is None:
+        return None
+    return _conversion_cache.info()
+
+
+def _key_part(argument):
+    # dictionaries are not hashable, they are represented by their compiled codec
+    if isinstance(argument, dict):
+        return compile_dictionary(argument)
+    return argument
+
+
+def memoize(function):
+    """Decorator looking up results of a conversion in the conversion cache while caching is switched on.
+    Argument types are part of the key, e.g. 1 and 1.0 are cached separately.
+    """
+    name = function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        cache = _conversion_cache
+        if cache is None:
+            return function(*args, **kwargs)
+        try:
+            key = (
+                name,
+                tuple(_key_part(argument) for argument in args),
+                tuple(type(argument) for argument in args),
+                tuple(
+                    (keyword, _key_part(value), type(value))
+                    for keyword, value in sorted(kwargs.items())
+                ),
+            )
+            result = cache.get(key, _MISSING)
+        except TypeError:  # unhashable argument, e.g. a list
+            return function(*args, **kwargs)
+        if result is _MISSING:
+            result = function(*args, **kwargs)
+            cache.put(key, result)
+        return result
+
+    return wrapper
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import re
+from collections import Counter
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from labelled_numerics.utils import metrics
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class LabelCodec(Mapping):
+    """Compiled, read-only form of a conversion_dict (label -> value).
+    All orderings and lookups needed by the conversion methods of LabelledNumerics are computed once here,
+    so that repeated conversions with the same dictionary do not re-sort or re-scan it.
+    A LabelCodec behaves like the dictionary it was built from and can be handed over wherever a conversion_dict is expected.
+    """
+
+    def __init__(self, conversion_dict: dict[str, int]):
+        if isinstance(conversion_dict, LabelCodec):
+            conversion_dict = conversion_dict.conversion_dict
+        if not isinstance(conversion_dict, dict):
+            raise TypeError(
+                f"conversion_dict must be dict[str, int], not {type(conversion_dict)}"
+            )
+        # snapshot, later changes of the original dict do not leak into the compiled orders
+        self.conversion_dict = dict(conversion_dict)
+        items = tuple(self.conversion_dict.items())
+        self._hash = hash(items)
+        self.labels = tuple(self.conversion_dict)
+        self.index = {label: position for position, label in enumerate(self.labels)}
+
+        # validation is done once per dictionary (checked by LabelledNumerics on instantiation)
+        self.unique_values = len(set(self.conversion_dict.values())) == len(items)
+        self.non_negative = all(value >= 0 for _, value in items)
+
+        # largest value first, equal values keep dictionary order
+        self.by_value = tuple(sorted(items, reverse=True, key=lambda item: item[1]))
+        # chunks usable by the greedy decomposition (zeros would never terminate)
+        self.chunks = tuple(item for item in self.by_value if item[1] > 0)
+        # longest label first, equal lengths keep dictionary order
+        self.by_length = tuple(
+            sorted(items, reverse=True, key=lambda item: len(item[0]))
+        )
+        # value -> label, first label in dictionary order wins for duplicated values
+        self.inverse = {}
+        for label, value in items:
+            self.inverse.setdefault(value, label)
+        self.zero_label = self.inverse.get(0)
+        # labels of the tokenization in value order (an empty label would match everywhere)
+        self._value_labels = tuple(label for label, _ in self.by_value if label)
+        self._value_regex = None
+        self._length_regex = None
+        self._value_vector = None
+
+    @property
+    def value_vector(self) -> np.ndarray:
+        """Values in label order, count vectors of compositions are indexed the same way"""
+        if self._value_vector is None:
+            import numpy as np  # numpy is only loaded when count vectors are used
+
+            self._value_vector = np.array(list(self.conversion_dict.values()))
+        return self._value_vector
+
+    @property
+    def _value_pattern(self) -> re.Pattern:
+        """Regular expression of the value ordered tokenization: one group per label (largest value first) matching
+        the run of that label, whitespace between labels is skipped. Compiled on first use.
+        """
+        if self._value_regex is None:
+            self._value_regex = re.compile(
+                r"\s*"
+                + "".join(
+                    rf"((?:{re.escape(label)}\s*)*)" for label in self._value_labels
+                )
+            )
+        return self._value_regex
+
+    @property
+    def _length_pattern(self) -> re.Pattern:
+        """Regular expression of the longest-match tokenization (alternation of all labels, longest first)"""
+        if self._length_regex is None:
+            labels = [re.escape(label) for label, _ in self.by_length if label]
+            self._length_regex = re.compile("|".join(labels) or "(?!)")
+        return self._length_regex
+
+    @metrics.instrument
+    def tokenize(self, text: str, sorted_inv: bool = True) -> list[str]:
+        """Split a string into labels in a single pass of a compiled regular expression.
+        If sorted_inv, labels are read from the start of the string in order of decreasing value (whitespace between
+        labels is skipped) and reading stops at the first part that does not continue this order, e.g. "MCMXCIX" ->
+        ["M", "CM", "XC", "IX"]. Else the string is split with longest-match semantics, unknown characters are
+        skipped and the labels are returned grouped by label length (longest first), e.g. "HClCC" -> ["Cl", "H", "C", "C"].
+        :param text: string to split
+        :type text: str
+        :param sorted_inv: order of labels as described above, defaults to True
+        :type sorted_inv: bool, optional
+        :return: labels
+        :rtype: list[str]
+        """
+        tokens = []
+        if sorted_inv:
+            # every group holds the run of one label, e.g. "M M " for "M", greedy groups never backtrack here
+            runs = self._value_pattern.match(text).groups()
+            for label, run in zip(self._value_labels, runs):
+                if run:
+                    tokens.extend([label] * run.count(label))
+        else:
+            counts = Counter(self._length_pattern.findall(text))
+            for label, _ in self.by_length:
+                if label in counts:
+                    tokens.extend([label] * counts[label])
+        metrics.count("tokenize.tokens", len(tokens))
+        return tokens
+
+    def count_vector(self, labels) -> np.ndarray:
+        """Count vector (number of occurrences of each label, indexed like self.labels) of a sequence of labels"""
+        import numpy as np
+
+        counts = np.zeros(len(self.labels), dtype=np.int64)
+        for label, count in Counter(labels).items():
+            counts[self.index[label]] = count
+        return counts
+
+    def render(self, counts, sep: str = " ") -> str:
+        """Separator-joined labels of a count vector, labels in dictionary order, e.g. [2, 0, 1] -> "H H O" """
+        return sep.join(
+            sep.join([label] * count)
+            for label, count in zip(self.labels, counts.tolist())
+            if count > 0
+        )
+
+    def __getitem__(self, label: str) -> int:
+        return self.conversion_dict[label]
+
+    def __iter__(self):
+        return iter(self.conversion_dict)
+
+    def __len__(self) -> int:
+        return len(self.conversion_dict)
+
+    def __repr__(self):
+        return f"LabelCodec({self.conversion_dict!r})"
+
+    def __eq__(self, other):
+        if isinstance(other, LabelCodec):
+            return self.conversion_dict == other.conversion_dict
+        return self.conversion_dict == other
+
+    def __hash__(self):
+        # computed once, codecs are used as cache keys
+        return self._hash
+
+
+@lru_cache(maxsize=64)
+def _compile_items(items: tuple) -> LabelCodec:
+    return LabelCodec(dict(items))
+
+
+def compile_dictionary(conversion_dict) -> LabelCodec:
+    """Return the compiled LabelCodec of a conversion_dict. Codecs are cached per dictionary content,
+    so calling this repeatedly with the same (or an equal) dictionary only costs a hash lookup.
+    :param conversion_dict: dictionary (label -> value) or an already compiled LabelCodec
+    :type conversion_dict: dict[str, int] | LabelCodec
+    :return: compiled codec
+    :rtype: LabelCodec
+    """
+    if isinstance(conversion_dict, LabelCodec):
+        return conversion_dict
+    if not isinstance(conversion_dict, dict):
+        raise TypeError(
+            f"conversion_dict must be dict[str, int], not {type(conversion_dict)}"
+        )
+    return _compile_items(tuple(conversion_dict.items()))
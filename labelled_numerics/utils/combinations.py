@@ -0,0 +1,451 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from labelled_numerics.utils import metrics
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# numpy (and the process pool) are imported where they are used, the search itself is pure python
+
+
+def positive_candidates(candidates) -> list:
+    """Sorted candidate values usable for compositions. Values <= 0 are dropped, they could be added infinitely often."""
+    return sorted(candidate for candidate in candidates if candidate > 0)
+
+
+def count_table(max_target: int, candidates, dtype="int64") -> np.ndarray:
+    """Number of compositions (multisets of candidates) for every target 0..max_target, computed with dynamic programming.
+    Adding the candidate c to the table is a cumulative sum along every residue class modulo c, which is done for all
+    residue classes at once by reshaping the table to rows of length c.
+    :param max_target: largest target
+    :type max_target: int
+    :param candidates: candidate values (positive integers)
+    :type candidates: list[int]
+    :param dtype: dtype of the counts, use object for exact counts beyond the int64 range, defaults to "int64"
+    :type dtype: np.dtype, optional
+    :return: table with table[target] = number of compositions
+    :rtype: np.ndarray
+    """
+    import numpy as np
+
+    table = np.zeros(max_target + 1, dtype=dtype)
+    table[0] = 1  # the empty composition
+    for candidate in positive_candidates(candidates):
+        if candidate > max_target:
+            break
+        table = _add_candidate(table, candidate)
+    return table
+
+
+def _add_candidate(table: np.ndarray, candidate: int) -> np.ndarray:
+    """Extend a count (or boolean reachability) table by one more candidate that may be used any number of times"""
+    import numpy as np
+
+    size = len(table)
+    if candidate >= size:
+        return table.copy()
+    rows = -(-size // candidate)
+    padded = np.zeros(rows * candidate, dtype=table.dtype)
+    padded[:size] = table
+    if table.dtype == bool:
+        extended = np.logical_or.accumulate(padded.reshape(rows, candidate), axis=0)
+    else:
+        extended = np.cumsum(padded.reshape(rows, candidate), axis=0, dtype=table.dtype)
+        # counts only grow, the first wrap around of a signed integer is always negative
+        if table.dtype.kind == "i" and extended.min() < 0:
+            raise OverflowError(
+                f"Number of combinations exceeds {table.dtype}, use dtype=object for exact counts."
+            )
+    return extended.reshape(-1)[:size]
+
+
+def reachability_table(max_target: int, candidates: list) -> np.ndarray:
+    """Boolean table with table[j, m] = m can be composed of the sorted candidates[j:] (row len(candidates): only 0)"""
+    return _suffix_table(max_target, candidates, bool)
+
+
+def suffix_count_table(
+    max_target: int, candidates: list, dtype="float64"
+) -> np.ndarray:
+    """Table with table[j, m] = number of compositions of m using the sorted candidates[j:], i.e. the number of
+    compositions below a node of the search tree. The default float64 counts never overflow, they are meant for
+    estimating the work of parts of the search.
+    """
+    return _suffix_table(max_target, candidates, dtype)
+
+
+def _suffix_table(max_target: int, candidates: list, dtype) -> np.ndarray:
+    import numpy as np
+
+    table = np.zeros((len(candidates) + 1, max_target + 1), dtype=dtype)
+    table[-1, 0] = 1
+    for index in range(len(candidates) - 1, -1, -1):
+        table[index] = _add_candidate(table[index + 1], candidates[index])
+    return table
+
+
+def _search_reachable(candidates: list, reachable: list, target: int):
+    """Depth first search like _search, but a candidate is only chosen if the remaining target can still be composed
+    of the candidates allowed afterwards (reachable[j][m] as in reachability_table). Every visited node leads to at least
+    one composition, so the work is proportional to the size of the output.
+    """
+    if not reachable[0][target]:
+        return
+    if target == 0:
+        yield []
+        return
+    path = []
+    stack = [[0, target]]
+    while stack:
+        frame = stack[-1]
+        index, remaining = frame
+        while index < len(candidates) and candidates[index] <= remaining:
+            if reachable[index][remaining - candidates[index]]:
+                break
+            index += 1
+        if index < len(candidates) and candidates[index] <= remaining:
+            frame[0] = index + 1
+            candidate = candidates[index]
+            path.append(candidate)
+            if candidate == remaining:
+                yield path.copy()
+                path.pop()
+            else:
+                stack.append([index, remaining - candidate])
+        else:
+            stack.pop()
+            if path:
+                path.pop()
+
+
+def target_windows(targets, tolerance: float = 0):
+    """Integer bounds [low, high] (inclusive) of the windows target +- tolerance, low is clipped at 0"""
+    import numpy as np
+
+    targets = np.asarray(targets, dtype=float)
+    if tolerance < 0:
+        raise ValueError(f"tolerance must be >= 0, not {tolerance}")
+    low = np.maximum(np.ceil(targets - tolerance), 0).astype(np.int64)
+    high = np.floor(targets + tolerance).astype(np.int64)
+    return low, high
+
+
+def batch_counts(targets, candidates, tolerance: float = 0, dtype="int64"):
+    """Number of compositions with a sum inside target +- tolerance for every target, from one shared count table.
+    :return: counts per target
+    :rtype: np.ndarray
+    """
+    import numpy as np
+
+    low, high = target_windows(targets, tolerance)
+    if low.size == 0:
+        return np.zeros(low.shape, dtype=dtype)
+    table = count_table(max(int(high.max()), 0), candidates, dtype=dtype)
+    # window sums from the prefix sums of the table
+    prefix = np.zeros(len(table) + 1, dtype=table.dtype)
+    prefix[1:] = np.cumsum(table, dtype=table.dtype)
+    # the prefix sums grow beyond the largest entry, the first wrap around of a signed integer is always negative
+    exact = table.dtype.kind == "i" and prefix.min() < 0
+    if exact:
+        prefix = np.zeros(len(table) + 1, dtype=object)
+        prefix[1:] = np.cumsum(table.astype(object))
+    empty = high < low
+    high = np.where(empty, low - 1, high)
+    counts = np.where(empty, 0, prefix[high + 1] - prefix[low])
+    if exact and counts.size and counts.max() > np.iinfo(table.dtype).max:
+        raise OverflowError(
+            f"Number of combinations exceeds {table.dtype}, use dtype=object for exact counts."
+        )
+    return counts.astype(dtype)
+
+
+def batch_compositions(targets, candidates, tolerance: float = 0) -> list:
+    """Compositions with a sum inside target +- tolerance for every target, ordered by sum and then as iter_compositions.
+    One reachability table is shared by all targets and the compositions of a sum are only searched once, even if
+    the windows of several targets overlap (those targets then share the same composition lists).
+    :return: list of compositions per target
+    :rtype: list[list[list[int]]]
+    """
+    candidates = positive_candidates(candidates)
+    low, high = target_windows(targets, tolerance)
+    if low.size == 0:
+        return []
+    max_target = max(int(high.max()), 0)
+    reachable = [row.tobytes() for row in reachability_table(max_target, candidates)]
+    found = {}
+    result = []
+    for window_low, window_high in zip(low.tolist(), high.tolist()):
+        compositions = []
+        for target in range(window_low, window_high + 1):
+            if target not in found:
+                found[target] = list(_search_reachable(candidates, reachable, target))
+            compositions.extend(found[target])
+        result.append(compositions)
+    return result
+
+
+def iter_compositions(target: int, candidates):
+    """Yield all compositions (sorted lists of candidates) summing to target, in the order of a depth first search
+    over the sorted candidates. Uses an explicit stack instead of recursion, memory is proportional to the length of
+    the current composition and does not grow with the number of compositions.
+    :param target: target number
+    :type target: int
+    :param candidates: candidate values (positive integers, values <= 0 are ignored)
+    :type candidates: list[int]
+    :yield: composition
+    :rtype: list[int]
+    """
+    candidates = positive_candidates(candidates)
+    if target == 0:
+        yield []
+        return
+    if metrics.active_collector() is not None:
+        yield from _counted_search(candidates, 0, target)
+    else:
+        yield from _search(candidates, 0, target)
+
+
+async def aiter_compositions(target: int, candidates, chunk_size: int = 1000):
+    """Async version of iter_compositions (same compositions, same order) yielding lists of up to chunk_size
+    compositions. Control goes back to the event loop after every chunk. The search runs with reachability pruning
+    (see _search_reachable), so the work between two chunks is bounded by the size of the chunk even if large parts of
+    the search tree lead to no composition. Cancelling the consuming task (e.g. by a timeout) stops the search.
+    :param target: target number
+    :type target: int
+    :param candidates: candidate values (positive integers, values <= 0 are ignored)
+    :type candidates: list[int]
+    :param chunk_size: compositions per chunk, defaults to 1000
+    :type chunk_size: int, optional
+    :yield: chunk of compositions
+    :rtype: list[list[int]]
+    """
+    import asyncio
+
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be >= 1, not {chunk_size}")
+    if target < 0:
+        return
+    candidates = positive_candidates(candidates)
+    reachable = [row.tobytes() for row in reachability_table(target, candidates)]
+    chunk = []
+    for composition in _search_reachable(candidates, reachable, target):
+        chunk.append(composition)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+            # let other tasks run (and a cancellation arrive) even if the consumer awaits nothing else
+            await asyncio.sleep(0)
+    if chunk:
+        yield chunk
+
+
+def _search(candidates: list, start: int, target: int):
+    """Depth first search below one node: compositions of target using sorted candidates[start:]"""
+    path = []
+    # one frame per chosen label: [index of the next candidate to try, remaining target]
+    stack = [[start, target]]
+    while stack:
+        frame = stack[-1]
+        index, remaining = frame
+        if index < len(candidates) and candidates[index] <= remaining:
+            frame[0] = index + 1
+            candidate = candidates[index]
+            path.append(candidate)
+            if candidate == remaining:
+                yield path.copy()
+                path.pop()
+            else:
+                # same candidate may be chosen again
+                stack.append([index, remaining - candidate])
+        else:
+            # candidates are sorted, none of the following fits either
+            stack.pop()
+            if path:
+                path.pop()
+
+
+def _counted_search(candidates: list, start: int, target: int):
+    """_search counting the visited nodes (chosen labels) and the pruned branches (remaining candidates skipped
+    because they exceed the remaining target) for the metrics collector. Kept separate from _search, so the search
+    pays nothing for the counters while no collector is active.
+    """
+    path = []
+    stack = [[start, target]]
+    nodes = pruned = 0
+    try:
+        while stack:
+            frame = stack[-1]
+            index, remaining = frame
+            if index < len(candidates) and candidates[index] <= remaining:
+                frame[0] = index + 1
+                candidate = candidates[index]
+                path.append(candidate)
+                nodes += 1
+                if candidate == remaining:
+                    yield path.copy()
+                    path.pop()
+                else:
+                    # same candidate may be chosen again
+                    stack.append([index, remaining - candidate])
+            else:
+                # candidates are sorted, none of the following fits either
+                if index < len(candidates):
+                    pruned += 1
+                stack.pop()
+                if path:
+                    path.pop()
+    finally:
+        metrics.count("search.nodes", nodes)
+        metrics.count("search.pruned", pruned)
+
+
+def split_search(target: int, candidates, depth: int) -> list:
+    """Split the search tree of iter_compositions into its nodes at the given depth, in depth first order.
+    Each part is a tuple (prefix, start, remaining): the compositions of the part are prefix + c for all compositions c
+    of remaining using candidates[start:]. Compositions shorter than depth are parts with remaining 0.
+    :param target: target number
+    :type target: int
+    :param candidates: candidate values
+    :type candidates: list[int]
+    :param depth: number of labels chosen before splitting (>= 0)
+    :type depth: int
+    :return: parts
+    :rtype: list[tuple[list[int], int, int]]
+    """
+    if not isinstance(depth, int) or depth < 0:
+        raise ValueError(f"depth must be an int >= 0, not {depth}")
+    candidates = positive_candidates(candidates)
+    parts = []
+
+    # depth is small, recursion is fine here
+    def expand(prefix, start, remaining):
+        if remaining == 0 or len(prefix) == depth:
+            parts.append((prefix, start, remaining))
+            return
+        for index in range(start, len(candidates)):
+            if candidates[index] > remaining:
+                break
+            expand(prefix + [candidates[index]], index, remaining - candidates[index])
+
+    if target >= 0:
+        expand([], 0, target)
+    return parts
+
+
+def balanced_split(target: int, candidates, groups: int) -> list:
+    """Split the search tree of iter_compositions into groups of about equal work. Every group is a list of consecutive
+    parts (format of split_search), groups and parts are in depth first order. The work of a part is estimated by its
+    number of compositions (see suffix_count_table).
+    Starting from the whole tree, the largest part is replaced by its children until no part holds more than
+    1 / (8 * groups) of all compositions (at most 256 * groups parts), then the parts are cut into groups at every
+    1 / groups of the compositions. Parts without compositions are dropped.
+    Splitting at a fixed depth instead leaves almost all compositions in the part repeating the smallest candidate.
+    :param target: target number
+    :type target: int
+    :param candidates: candidate values
+    :type candidates: list[int]
+    :param groups: number of groups
+    :type groups: int
+    :return: groups of parts (fewer than groups if there are not enough compositions)
+    :rtype: list[list[tuple[list[int], int, int]]]
+    """
+    import heapq
+
+    if not isinstance(groups, int) or groups < 1:
+        raise ValueError(f"groups must be a positive int, not {groups}")
+    candidates = positive_candidates(candidates)
+    if target < 0:
+        return []
+    sizes = suffix_count_table(target, candidates)
+    total = sizes[0, target]
+    if total == 0:
+        return []
+    limit = total / (8 * groups)
+    # largest part first: (-size, chosen candidate indices, prefix, start, remaining), the indices order the parts
+    # like the depth first search
+    heap = [(-total, (), [], 0, target)]
+    done = []
+    while heap and -heap[0][0] > limit and len(heap) + len(done) < 256 * groups:
+        entry = heapq.heappop(heap)
+        _, indices, prefix, start, remaining = entry
+        if remaining == 0:
+            done.append(entry)
+            continue
+        for index in range(start, len(candidates)):
+            candidate = candidates[index]
+            if candidate > remaining:
+                break
+            size = sizes[index, remaining - candidate]
+            if size:
+                heapq.heappush(
+                    heap,
+                    (
+                        -size,
+                        indices + (index,),
+                        prefix + [candidate],
+                        index,
+                        remaining - candidate,
+                    ),
+                )
+    done.extend(heap)
+    done.sort(key=lambda entry: entry[1])
+    # cut at every total / groups compositions
+    result = [[]]
+    passed = 0
+    for size, _, prefix, start, remaining in done:
+        if passed >= len(result) * total / groups and result[-1]:
+            result.append([])
+        result[-1].append((prefix, start, remaining))
+        passed -= size
+    return result
+
+
+def _search_group(task) -> list:
+    """Worker of parallel_compositions: all compositions of a group of parts"""
+    candidates, group = task
+    result = []
+    for prefix, start, remaining in group:
+        if remaining == 0:
+            result.append(prefix)
+        else:
+            result.extend(
+                prefix + suffix for suffix in _search(candidates, start, remaining)
+            )
+    return result
+
+
+def parallel_compositions(
+    target: int, candidates, workers: int, split_depth: int = None
+) -> list:
+    """All compositions of iter_compositions (same order), searched on a process pool.
+    By default the search tree is split into 4 groups of about equal work per worker (see balanced_split),
+    with split_depth it is split at this depth instead (see split_search). The groups are searched independently.
+    :param target: target number
+    :type target: int
+    :param candidates: candidate values
+    :type candidates: list[int]
+    :param workers: number of worker processes
+    :type workers: int
+    :param split_depth: depth at which the search tree is split, defaults to None (groups of equal work)
+    :type split_depth: int, optional
+    :return: compositions
+    :rtype: list[list[int]]
+    """
+    sorted_candidates = positive_candidates(candidates)
+    if split_depth is None:
+        groups = balanced_split(target, sorted_candidates, 4 * workers)
+    else:
+        groups = [
+            [part] for part in split_search(target, sorted_candidates, split_depth)
+        ]
+    from concurrent.futures import ProcessPoolExecutor
+
+    result = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map keeps the order of the groups, so the result is deterministic
+        tasks = [(sorted_candidates, group) for group in groups]
+        for compositions in executor.map(_search_group, tasks):
+            result.extend(compositions)
+    return result
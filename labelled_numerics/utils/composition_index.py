@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import json
+import math
+import mmap
+import os
+from typing import TYPE_CHECKING
+
+from labelled_numerics.utils.labelled_array import LabelledArray
+from labelled_numerics.utils.labelled_numerics import LabelledNumerics
+from labelled_numerics.utils.metrics import instrument
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# file layout: magic, length of the json header (uint64), json header, padding to _ALIGNMENT,
+# offsets (int64, max_mass + 2 entries, rows of mass m are offsets[m]:offsets[m + 1]), count matrix (row major)
+_MAGIC = b"LNCIDX01"
+_ALIGNMENT = 64
+# rows written at once, bounds the extra memory of writing the sorted matrix
+_WRITE_BLOCK = 1 << 16
+
+
+class CompositionIndex:
+    """All compositions up to a maximal mass of one dictionary, precomputed and stored in a file.
+    The file is memory mapped: opening it reads nothing, lookups of one mass or a mass range are two reads of the
+    offset table and a slice of the count matrix. counts returns that slice as zero-copy view, lookup and lookup_range
+    copy it into a LabelledArray (int64 counts, the file stores the smallest count type). Processes opening the same
+    file share its pages through the page cache, so the search runs once (build) instead of once per process and call.
+
+        CompositionIndex.build("organic_300.idx", 300, organic_atoms)
+        with CompositionIndex.open("organic_300.idx") as index:
+            index.lookup(180)            # LabelledArray of all compositions of mass 180
+            index.lookup_range(178, 182)
+    """
+
+    __slots__ = ("path", "conversion", "max_mass", "_mmap", "_offsets", "_counts")
+
+    def __init__(self, path: str):
+        """Open an index file, see CompositionIndex.open"""
+        import numpy as np
+
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as file:
+            if file.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{self.path} is not a composition index")
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        start = len(_MAGIC) + 8
+        header_size = int.from_bytes(self._mmap[len(_MAGIC) : start], "little")
+        header = json.loads(self._mmap[start : start + header_size])
+        self.conversion = dict(zip(header["labels"], header["values"]))
+        self.max_mass = header["max_mass"]
+        offset = _aligned(start + header_size)
+        # views into the mapping (read only, nothing is copied)
+        self._offsets = np.frombuffer(
+            self._mmap, dtype="<i8", count=self.max_mass + 2, offset=offset
+        )
+        self._counts = np.frombuffer(
+            self._mmap,
+            dtype=np.dtype(header["dtype"]),
+            count=header["rows"] * len(self.conversion),
+            offset=offset + self._offsets.nbytes,
+        ).reshape(header["rows"], len(self.conversion))
+
+    @staticmethod
+    def open(path: str) -> CompositionIndex:
+        """Open an index written by CompositionIndex.build (memory mapped, read only)
+        :param path: path of the index file
+        :type path: str | os.PathLike
+        :return: index
+        :rtype: CompositionIndex
+        """
+        return CompositionIndex(path)
+
+    @staticmethod
+    @instrument
+    def build(
+        path: str,
+        max_mass: int,
+        conversion_dict: dict[str, int],
+        selected_keys: list[str] = None,
+    ) -> CompositionIndex:
+        """Enumerate all compositions with a mass (sum of values) up to max_mass and write them to an index file.
+        The rows are count vectors (one column per label of conversion_dict, in dictionary order) sorted by mass.
+        Labels with value 0 and labels not in selected_keys are not used (their columns are 0).
+        :param path: path of the index file (replaced atomically, readers of the old file are not disturbed)
+        :type path: str | os.PathLike
+        :param max_mass: largest mass
+        :type max_mass: int
+        :param conversion_dict: dictionary of the compositions
+        :type conversion_dict: dict[str, int]
+        :param selected_keys: selected keys, defaults to None (all)
+        :type selected_keys: list[str], optional
+        :return: the opened index
+        :rtype: CompositionIndex
+        """
+        import numpy as np
+
+        if not isinstance(max_mass, int):
+            raise TypeError(f"max_mass must be int, not {type(max_mass)}")
+        if max_mass < 0:
+            raise ValueError(f"max_mass must be >= 0, not {max_mass}")
+        codec = LabelledNumerics._checked_codec(conversion_dict)
+        if selected_keys is not None:
+            # same checks of the keys as the searches
+            LabelledNumerics._candidate_values(conversion_dict, selected_keys)
+        columns = [
+            (codec.index[label], value)
+            for label, value in codec.chunks
+            if selected_keys is None or label in selected_keys
+        ]
+        # smallest count type holding the largest possible count
+        largest = max_mass // min((value for _, value in columns), default=max_mass + 1)
+        dtype = next(
+            np.dtype(name)
+            for name in ("u1", "u2", "u4", "u8")
+            if largest <= np.iinfo(name).max
+        )
+        masses, counts = _enumerate(max_mass, columns, len(codec.labels), dtype)
+
+        sizes = np.bincount(masses, minlength=max_mass + 1)
+        offsets = np.zeros(max_mass + 2, dtype="<i8")
+        np.cumsum(sizes, out=offsets[1:])
+        order = np.argsort(masses, kind="stable")
+        header = json.dumps(
+            {
+                "labels": list(codec.labels),
+                "values": [int(value) for value in codec.conversion_dict.values()],
+                "max_mass": max_mass,
+                "dtype": dtype.newbyteorder("<").str,
+                "rows": len(masses),
+            }
+        ).encode()
+        start = len(_MAGIC) + 8 + len(header)
+        # written next to path and moved over it, processes having the old file mapped keep reading the old file
+        temporary = f"{os.fspath(path)}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, "wb") as file:
+                file.write(_MAGIC)
+                file.write(len(header).to_bytes(8, "little"))
+                file.write(header)
+                file.write(b"\0" * (_aligned(start) - start))
+                file.write(offsets.tobytes())
+                for block in range(0, len(order), _WRITE_BLOCK):
+                    rows = counts[order[block : block + _WRITE_BLOCK]]
+                    file.write(
+                        rows.astype(dtype.newbyteorder("<"), copy=False).tobytes()
+                    )
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+            raise
+        return CompositionIndex(path)
+
+    @property
+    def labels(self) -> list:
+        """Labels of the columns"""
+        return list(self.conversion)
+
+    def _bounds(self, low, high) -> tuple[int, int]:
+        """Rows of all masses in low..high (inclusive, floats are allowed)"""
+        low = max(math.ceil(low), 0)
+        high = math.floor(high)
+        if high > self.max_mass:
+            raise ValueError(
+                f"mass {high} is beyond the maximal mass {self.max_mass} of the index"
+            )
+        if high < low:
+            return 0, 0
+        return int(self._offsets[low]), int(self._offsets[high + 1])
+
+    def counts(self, low, high=None) -> np.ndarray:
+        """Count matrix of the compositions with a mass in low..high (zero-copy, read only view of the file)
+        :param low: smallest mass
+        :type low: int | float
+        :param high: largest mass, defaults to None (only low)
+        :type high: int | float, optional
+        :return: count matrix (rows sorted by mass)
+        :rtype: np.ndarray
+        """
+        start, stop = self._bounds(low, low if high is None else high)
+        return self._counts[start:stop]
+
+    def lookup(self, mass: int, sep: str = " ") -> LabelledArray:
+        """All compositions of mass as LabelledArray (same compositions as get_combinations)"""
+        return self.lookup_range(mass, mass, sep=sep)
+
+    def lookup_range(self, low, high, sep: str = " ") -> LabelledArray:
+        """All compositions with a mass in low..high (inclusive), sorted by mass, e.g. a measured mass +- tolerance.
+        The rows are copied into the LabelledArray, use counts for a view of the file.
+        """
+        return LabelledArray(self.counts(low, high), self.conversion, sep)
+
+    def count(self, low, high=None) -> int:
+        """Number of compositions with a mass in low..high, read from the offset table only"""
+        start, stop = self._bounds(low, low if high is None else high)
+        return stop - start
+
+    def close(self):
+        """Release the mapping (views returned by counts stay valid until they are gone)"""
+        self._offsets = self._counts = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # views are still alive, the mapping is released with the last of them
+
+    def __enter__(self) -> CompositionIndex:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __repr__(self):
+        return f"CompositionIndex({self.path!r}, {len(self)} compositions up to mass {self.max_mass})"
+
+
+def _aligned(position: int) -> int:
+    return -(-position // _ALIGNMENT) * _ALIGNMENT
+
+
+def _enumerate(max_mass: int, columns: list, width: int, dtype) -> tuple:
+    """Masses and count vectors of all compositions up to max_mass of the (column, value) pairs.
+    Adds one label at a time to all compositions found so far: every composition of mass m is repeated
+    for 0..(max_mass - m) // value copies of the label. All steps are array operations.
+    """
+    import numpy as np
+
+    masses = np.zeros(1, dtype=np.int64)
+    counts = np.zeros((1, width), dtype=dtype)
+    # largest values first, the intermediate arrays stay small
+    for column, value in sorted(columns, key=lambda item: -item[1]):
+        repeats = (max_mass - masses) // value + 1
+        rows = np.repeat(np.arange(len(masses)), repeats)
+        # number of copies of the label in each new row, 0..repeats - 1 within each old row
+        copies = np.arange(len(rows)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        counts = counts[rows]
+        counts[:, column] = copies
+        masses = masses[rows] + copies * value
+    return masses, counts
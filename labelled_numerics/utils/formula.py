@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import functools
+import re
+
+from labelled_numerics.utils.codec import LabelCodec, compile_dictionary
+
+# brackets of groups, e.g. Ca(OH)2, K4[Fe(CN)6]
+_BRACKETS = {"(": ")", "[": "]", "{": "}"}
+_OPENING_OF = {closing: opening for opening, closing in _BRACKETS.items()}
+# separators of the parts of hydrates and adducts, e.g. CuSO4·5H2O, CuSO4.5H2O, CuSO4*5H2O
+_SEPARATORS = "·.*•"
+
+
+def _token_pattern(label: str) -> re.Pattern:
+    """Tokens of a formula, label is the regular expression of a label"""
+    return re.compile(
+        rf"(?P<label>{label})(?P<count>\d*)"
+        r"|(?P<space>\s+)"
+        r"|(?P<number>\d+)"
+        r"|(?P<open>[(\[{])"
+        r"|(?P<close>[)\]}])(?P<group_count>\d*)"
+        rf"|(?P<separator>[{re.escape(_SEPARATORS)}])"
+        r"|(?P<other>.)",
+        re.DOTALL,
+    )
+
+
+# element symbols: a capital letter followed by lowercase letters
+_ELEMENT_PATTERN = _token_pattern("[A-Z][a-z]*")
+
+
+@functools.lru_cache(maxsize=64)
+def _label_pattern(codec: LabelCodec) -> re.Pattern:
+    # the first matching alternative wins, longest labels first gives the longest match
+    labels = sorted((label for label in codec.labels if label), key=len, reverse=True)
+    if not labels:
+        return _token_pattern("(?!)")
+    return _token_pattern("|".join(map(re.escape, labels)))
+
+
+def formula_terms(formula: str, conversion_dict=None) -> list[tuple[str, int]]:
+    """Read a chemical formula (or an equivalent string) in a single pass into its terms (label, count), in the order
+    of the formula. Counts of groups and hydrate parts are multiplied into their terms, e.g.
+    "Ca(OH)2" -> [("Ca", 1), ("O", 2), ("H", 2)] and "CuSO4·5H2O" -> [..., ("O", 4), ("H", 10), ("O", 5)].
+    Nothing is expanded, the work is proportional to the length of the formula, not to the counts.
+    Labels are a capital letter followed by lowercase letters, or with conversion_dict the longest label of the
+    dictionary starting at the position (labels of any spelling, e.g. "Me" or "OAc").
+    Whitespace is ignored. A number at the start of a hydrate part (or of the formula) multiplies the whole part.
+    :param formula: formula, e.g. "C6H12O6", "Ca(OH)2", "K4[Fe(CN)6]" or "CuSO4·5H2O"
+    :type formula: str
+    :param conversion_dict: dictionary whose labels are read, defaults to None (element symbols)
+    :type conversion_dict: dict[str, int] | LabelCodec, optional
+    :raises ValueError: for unknown labels, misplaced numbers and unbalanced brackets (with the position)
+    :return: terms
+    :rtype: list[tuple[str, int]]
+    """
+    if not isinstance(formula, str):
+        raise TypeError(f"formula must be str, not {type(formula)}")
+    pattern = (
+        _ELEMENT_PATTERN
+        if conversion_dict is None
+        else _label_pattern(compile_dictionary(conversion_dict))
+    )
+    terms = []  # terms of the finished parts
+    part = []  # terms of the current part (outside of groups)
+    part_multiplier = None
+    groups = []  # open groups: (opening bracket, position, terms before the group)
+    current = part
+    # one match per token, the kind of token is the last group of the pattern taking part in the match
+    for match in pattern.finditer(formula):
+        kind = match.lastgroup
+        if kind == "count":
+            current.append((match.group(1), int(match.group(2) or 1)))
+        elif kind == "space":
+            continue
+        elif kind == "number":
+            if groups or part or part_multiplier is not None:
+                raise ValueError(
+                    f"unexpected number at position {match.start()} of {formula!r}"
+                )
+            part_multiplier = int(match.group(kind))
+        elif kind == "open":
+            groups.append((match.group(kind), match.start(), current))
+            current = []
+        elif kind == "group_count":
+            closing = match.group("close")
+            if not groups or groups[-1][0] != _OPENING_OF[closing]:
+                raise ValueError(
+                    f"unbalanced {closing!r} at position {match.start()} of {formula!r}"
+                )
+            _, _, outer = groups.pop()
+            count = int(match.group(kind) or 1)
+            outer.extend((label, number * count) for label, number in current)
+            current = outer
+        elif kind == "separator":
+            if groups:
+                raise ValueError(
+                    f"{match.group(kind)!r} inside a group at position {match.start()} of {formula!r}"
+                )
+            _add_part(terms, part, part_multiplier)
+            part = current = []
+            part_multiplier = None
+        else:
+            raise ValueError(
+                f"unexpected {match.group(kind)!r} at position {match.start()} of {formula!r}"
+                + (
+                    ", labels start with a capital"
+                    if conversion_dict is None
+                    else ", it does not start a label of the dictionary"
+                )
+            )
+    if groups:
+        opening, opened, _ = groups[-1]
+        raise ValueError(
+            f"{opening!r} at position {opened} of {formula!r} is not closed"
+        )
+    _add_part(terms, part, part_multiplier)
+    return terms
+
+
+def parse_formula(formula: str, conversion_dict=None) -> dict[str, int]:
+    """Count of every label of a formula (labels in order of their first appearance, labels with count 0 are dropped),
+    e.g. "C1000H2000" -> {"C": 1000, "H": 2000} or "CH3CH2OH" -> {"C": 2, "H": 6, "O": 1}. See formula_terms.
+    :param formula: formula
+    :type formula: str
+    :param conversion_dict: dictionary whose labels are read, defaults to None (element symbols)
+    :type conversion_dict: dict[str, int] | LabelCodec, optional
+    :return: label -> count
+    :rtype: dict[str, int]
+    """
+    counts = {}
+    for label, count in formula_terms(formula, conversion_dict):
+        counts[label] = counts.get(label, 0) + count
+    return {label: count for label, count in counts.items() if count}
+
+
+def _add_part(terms: list, part: list, multiplier: int):
+    if multiplier is None:
+        terms.extend(part)
+    else:
+        terms.extend((label, count * multiplier) for label, count in part)
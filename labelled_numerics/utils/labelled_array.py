@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import itertools
+import numbers
+from typing import TYPE_CHECKING
+
+from labelled_numerics.utils.codec import LabelCodec
+from labelled_numerics.utils.labelled_numerics import LabelledNumerics
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# numpy is imported where it is used, importing labelled_numerics stays light
+
+
+class LabelledArray:
+    """Columnar container of many compositions sharing one dictionary: a count matrix with one row per composition
+    and one column per label (in the order of the dictionary keys), e.g. H2O and CO2 with {"H": 1, "C": 12, "O": 16}
+    are [[2, 0, 1], [0, 1, 2]]. Values, sums and means are computed for all rows at once, names are only rendered
+    for the rows asked for.
+    """
+
+    __slots__ = ("conversion", "sep", "_codec", "_counts")
+
+    def __init__(
+        self, counts, conversion_dict: dict[str, int] | LabelCodec, sep: str = " "
+    ):
+        """
+        :param counts: count matrix (one row per composition, one column per label)
+        :type counts: np.ndarray, list[list[int]]
+        :param conversion_dict: dictionary to convert
+        :type conversion_dict: dict[str, int] | LabelCodec
+        :param sep: separator of the names, defaults to " "
+        :type sep: str, optional
+        """
+        import numpy as np
+
+        codec = LabelledNumerics._checked_codec(conversion_dict)
+        counts = np.array(counts, dtype=np.int64)
+        if counts.size == 0:
+            counts = counts.reshape(0, len(codec.labels))
+        if counts.ndim != 2 or counts.shape[1] != len(codec.labels):
+            raise ValueError(
+                f"counts must have one column per label ({len(codec.labels)}), not shape {counts.shape}"
+            )
+        if (counts < 0).any():
+            raise ValueError("counts must be >= 0")
+        self.conversion = conversion_dict
+        self.sep = sep
+        self._codec = codec
+        self._counts = counts
+
+    def _new(self, counts: np.ndarray) -> LabelledArray:
+        # same dictionary, counts are already checked
+        array = LabelledArray.__new__(LabelledArray)
+        array.conversion = self.conversion
+        array.sep = self.sep
+        array._codec = self._codec
+        array._counts = counts
+        return array
+
+    @staticmethod
+    def from_combinations(
+        combinations: list, conversion_dict: dict[str, int], sep: str = " "
+    ) -> LabelledArray:
+        """Create the array of the compositions found by LabelledNumerics.get_combinations (lists of values)
+        :param combinations: compositions as lists of values, e.g. [[1, 1, 16], [16, 16]]
+        :type combinations: list[list[int]]
+        :param conversion_dict: dictionary to convert
+        :type conversion_dict: dict[str, int]
+        :param sep: separator of the names, defaults to " "
+        :type sep: str, optional
+        :return: array with one row per composition
+        :rtype: LabelledArray
+        """
+        import numpy as np
+
+        codec = LabelledNumerics._checked_codec(conversion_dict)
+        lengths = np.fromiter(
+            map(len, combinations), dtype=np.int64, count=len(combinations)
+        )
+        values = codec.value_vector
+        flat = np.fromiter(
+            itertools.chain.from_iterable(combinations),
+            dtype=values.dtype,
+            count=int(lengths.sum()),
+        )
+        # column of each value by binary search in the sorted values (values are unique)
+        order = np.argsort(values, kind="stable")
+        positions = np.searchsorted(values[order], flat).clip(max=len(values) - 1)
+        unknown = values[order][positions] != flat
+        if unknown.any():
+            raise ValueError(f"{flat[unknown][0]} is not a value of the dictionary")
+        return LabelledArray._from_columns(
+            lengths, order[positions], codec, conversion_dict, sep
+        )
+
+    @staticmethod
+    def from_names(
+        names: list, conversion_dict: dict[str, int], sep: str = " "
+    ) -> LabelledArray:
+        """Create the array of separator-joined names, e.g. ["H H O", "C O O"]
+        :param names: names of the compositions
+        :type names: list[str]
+        :param conversion_dict: dictionary to convert
+        :type conversion_dict: dict[str, int]
+        :param sep: separator of the names, defaults to " "
+        :type sep: str, optional
+        :return: array with one row per name
+        :rtype: LabelledArray
+        """
+        import numpy as np
+
+        codec = LabelledNumerics._checked_codec(conversion_dict)
+        rows = [name.split(sep) if name else [] for name in names]
+        lengths = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+        try:
+            columns = np.fromiter(
+                map(codec.index.__getitem__, itertools.chain.from_iterable(rows)),
+                dtype=np.int64,
+                count=int(lengths.sum()),
+            )
+        except KeyError as error:
+            raise ValueError(f"{error.args[0]!r} is not in the dictionary") from None
+        return LabelledArray._from_columns(
+            lengths, columns, codec, conversion_dict, sep
+        )
+
+    @staticmethod
+    def _from_columns(lengths, columns, codec, conversion_dict, sep) -> LabelledArray:
+        """Count matrix from the number of labels of each row and the columns of all labels (row after row)"""
+        import numpy as np
+
+        width = len(codec.labels)
+        # one bincount over (row, column) pairs counts all rows at once
+        row_ids = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+        counts = np.bincount(row_ids * width + columns, minlength=len(lengths) * width)
+        return LabelledArray(counts.reshape(len(lengths), width), conversion_dict, sep)
+
+    @staticmethod
+    def from_instances(
+        instances: list, conversion_dict: dict[str, int] = None, sep: str = None
+    ) -> LabelledArray:
+        """Create the array of a list of labelled numerics
+        :param instances: labelled numerics
+        :type instances: list[LabelledNumerics]
+        :param conversion_dict: dictionary of the array, defaults to None (dictionary of the first instance)
+        :type conversion_dict: dict[str, int], optional
+        :param sep: separator of the names, defaults to None (separator of the first instance or " ")
+        :type sep: str, optional
+        :return: array with one row per instance
+        :rtype: LabelledArray
+        """
+        import numpy as np
+
+        if conversion_dict is None:
+            if not instances:
+                raise ValueError("conversion_dict is needed for an empty list")
+            conversion_dict = instances[0].conversion
+        if sep is None:
+            sep = instances[0].sep if instances else " "
+        codec = LabelledNumerics._checked_codec(conversion_dict)
+        rows = [
+            (
+                instance.counts
+                if instance._codec is codec
+                else codec.count_vector(instance._tolist())
+            )
+            for instance in instances
+        ]
+        counts = np.array(rows, dtype=np.int64).reshape(len(rows), len(codec.labels))
+        return LabelledArray(counts, conversion_dict, sep)
+
+    @staticmethod
+    def concatenate(arrays: list) -> LabelledArray:
+        """Join arrays with the same dictionary into one
+        :param arrays: arrays to join
+        :type arrays: list[LabelledArray]
+        :return: array with the rows of all arrays
+        :rtype: LabelledArray
+        """
+        import numpy as np
+
+        if not arrays:
+            raise ValueError("need at least one array to concatenate")
+        first = arrays[0]
+        for array in arrays[1:]:
+            if array._codec != first._codec:
+                raise ValueError("arrays with different dictionaries can not be joined")
+        return first._new(np.concatenate([array._counts for array in arrays]))
+
+    def append(self, other) -> LabelledArray:
+        """Array with the rows of other (LabelledArray, LabelledNumerics or list of them) added at the end"""
+        if isinstance(other, LabelledNumerics):
+            other = [other]
+        if not isinstance(other, LabelledArray):
+            other = LabelledArray.from_instances(other, self.conversion, self.sep)
+        return LabelledArray.concatenate([self, other])
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Count matrix (read only view)"""
+        view = self._counts.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def labels(self) -> list:
+        """Labels of the columns"""
+        return list(self._codec.labels)
+
+    @property
+    def sum_values(self) -> np.ndarray:
+        """Sum of the values of each composition"""
+        return self._counts @ self._codec.value_vector
+
+    @property
+    def n_labels(self) -> np.ndarray:
+        """Number of labels of each composition"""
+        return self._counts.sum(axis=1)
+
+    @property
+    def mean(self) -> np.ndarray:
+        """Mean value of the labels of each composition (nan for empty compositions)"""
+        import numpy as np
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.sum_values / self.n_labels
+
+    def filter(self, mask) -> LabelledArray:
+        """Rows where mask is True, e.g. array.filter(array.sum_values < 100)"""
+        import numpy as np
+
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape != (len(self),):
+            raise ValueError(f"mask must have one entry per row ({len(self)})")
+        return self._new(self._counts[mask])
+
+    def sort_by_value(self, descending: bool = False) -> LabelledArray:
+        """Rows sorted by their sum of values (stable, rows with equal sums keep their order)"""
+        import numpy as np
+
+        values = self.sum_values
+        order = np.argsort(-values if descending else values, kind="stable")
+        return self._new(self._counts[order])
+
+    def names(self) -> list:
+        """Separator-joined names of all rows (labels in dictionary order)"""
+        return [self._codec.render(row, self.sep) for row in self._counts]
+
+    def condensed_names(self) -> list:
+        """Condensed names of all rows, e.g. "H2O" (labels in dictionary order)"""
+        labels = self._codec.labels
+        return [
+            "".join(
+                label + str(count) if count > 1 else label
+                for label, count in zip(labels, row)
+                if count > 0
+            )
+            for row in self._counts.tolist()
+        ]
+
+    def to_list(self) -> list:
+        """Labelled numerics of all rows (backed by their count vectors, nothing is parsed)"""
+        return [self[index] for index in range(len(self))]
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __getitem__(self, key):
+        """A single row as LabelledNumerics, slices, index arrays and boolean masks as LabelledArray"""
+        if isinstance(key, numbers.Integral):
+            return LabelledNumerics.from_counts(
+                self._counts[key], self.conversion, sep=self.sep
+            )
+        return self._new(self._counts[key])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self):
+        return f"LabelledArray({len(self)} compositions of {self.labels})"
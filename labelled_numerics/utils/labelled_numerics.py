@@ -1,13 +1,42 @@
-from typing import Tuple
+from __future__ import annotations
 
-import numpy as np
+import itertools
+import logging
+from collections import Counter
+from typing import TYPE_CHECKING, Tuple
 
 from labelled_numerics import setup_logger
+from labelled_numerics.utils import combinations
+from labelled_numerics.utils.cache import memoize
+from labelled_numerics.utils.codec import LabelCodec, compile_dictionary
+from labelled_numerics.utils.formula import formula_terms, parse_formula
+from labelled_numerics.utils.metrics import instrument
+
+if TYPE_CHECKING:
+    import numpy as np
 
 # get logger from setup_logger.py
 logger = setup_logger.logger
 
 
+def _cached(method):
+    """Property whose value is computed once per instance and kept until the name or the dictionary changes"""
+    key = method.__name__
+
+    def getter(self):
+        derived = self._derived
+        if derived is None:  # the dictionary is only created for the first cached value
+            derived = self._derived = {}
+        try:
+            return derived[key]
+        except KeyError:
+            value = derived[key] = method(self)
+            return value
+
+    getter.__doc__ = method.__doc__
+    return property(getter)
+
+
 class LabelledNumerics:
     """A class representing labelled numerics:
     A labelled numeric is a string of labels, e.g. "H H O".
@@ -22,18 +51,98 @@ class LabelledNumerics:
     - append two labelled numerics (e. g. clustering molecules)
     - calculate the sum of two labelled numerics (e. g. mass of cluster)
     - convert a chunked string to a chemical formula (e.g. H H H O O O -> H3O3)
+    A labelled numeric is either stored as its string or as count vector (number of each label, see from_counts),
+    the other representation is only built when it is needed.
+    Arithmetic operators work on the sums of the values and return numbers (water + oxygen, 3 * water), compositions
+    are combined with append and remove or built from counts, e.g. from_counts(3 * water.counts, ...) for H6O3.
+    Threads: the static conversions (num2label, label2num, get_combinations, ...) can be called from any thread.
+    Instances are not locked, share them between threads for reading only (set_name and set_dictionary change them).
     """
 
+    __slots__ = ("conversion", "sep", "_codec", "_name", "_counts", "_derived")
+
     def __init__(self, label_str: str, conversion_dict: dict[str, int], sep: str = " "):
         self.conversion = conversion_dict
         self.name = label_str
         self.sep = sep
+        self._codec = LabelledNumerics._checked_codec(conversion_dict)
+
+    @staticmethod
+    def _checked_codec(conversion_dict) -> LabelCodec:
+        # compiled once per dictionary, validation results are cached with it
+        codec = compile_dictionary(conversion_dict)
         # error if dict values are not unique
-        if len(set(self.conversion.values())) != len(self.conversion.values()):
+        if not codec.unique_values:
             raise ValueError()  # "values not unique"
         # error if values are smaller than zero
-        if any(value < 0 for value in self.conversion.values()):
+        if not codec.non_negative:
             raise ValueError()  # "value < 0"
+        return codec
+
+    @classmethod
+    def from_counts(cls, counts, conversion_dict: dict[str, int], sep: str = " "):
+        """Create a labelled numeric from its count vector, e.g. [2, 0, 1] with {"H": 1, "C": 12, "O": 16} for "H H O".
+        Sums, appending and removing are vector operations then, the string is only built on request (labels in dictionary order).
+        :param counts: number of each label, indexed in the order of the dictionary keys, or dict label -> number
+        :type counts: np.ndarray, list[int], dict[str, int]
+        :param conversion_dict: dictionary to convert
+        :type conversion_dict: dict[str, int] | LabelCodec
+        :param sep: separator, defaults to " "
+        :type sep: str, optional
+        :return: labelled numeric
+        :rtype: LabelledNumerics
+        """
+        import numpy as np
+
+        codec = LabelledNumerics._checked_codec(conversion_dict)
+        if isinstance(counts, dict):
+            vector = np.zeros(len(codec.labels), dtype=np.int64)
+            for label, count in counts.items():
+                vector[codec.index[label]] = count
+        else:
+            vector = np.array(counts, dtype=np.int64)
+        if vector.shape != (len(codec.labels),):
+            raise ValueError(
+                f"counts must have one entry per label ({len(codec.labels)}), not shape {vector.shape}"
+            )
+        if (vector < 0).any():
+            raise ValueError("counts must be >= 0")
+        instance = cls.__new__(cls)
+        instance.conversion = conversion_dict
+        instance.sep = sep
+        instance._codec = codec
+        instance._name = None
+        instance._counts = vector
+        instance._derived = None
+        return instance
+
+    @property
+    def name(self) -> str:
+        if self._name is None:
+            return self._rendered_name
+        return self._name
+
+    @name.setter
+    def name(self, name: str):
+        self._name = name
+        self._counts = None
+        # derived values (sum_values, condensed_name, ...) are cached until the name changes
+        self._derived = None
+
+    @_cached
+    def _rendered_name(self) -> str:
+        return self._codec.render(self._counts, self.sep)
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Count vector: number of each label, indexed in the order of the dictionary keys"""
+        if self._counts is None:
+            return self._count_vector.copy()
+        return self._counts.copy()
+
+    @_cached
+    def _count_vector(self) -> np.ndarray:
+        return self._codec.count_vector(self._tolist())
 
     def get_dictionary(self):
         return self.conversion
@@ -45,7 +154,15 @@ class LabelledNumerics:
         self.name = name
 
     def set_dictionary(self, conversion_dict: dict[str, int]):
+        # compiled first, an invalid dictionary leaves the instance unchanged
+        codec = compile_dictionary(conversion_dict)
+        # count vectors are indexed by the dictionary, keep the composition as string (this also clears cached values)
+        self.name = self.name
         self.conversion = conversion_dict
+        self._codec = codec
+
+    def _count_backed(self) -> bool:
+        return self._counts is not None
 
     def __repr__(self):
         return f"{self.name} object"
@@ -60,8 +177,15 @@ class LabelledNumerics:
         return self.sum_values - other.sum_values
 
     def __mul__(self, other):
+        if isinstance(other, int) and not isinstance(other, bool):
+            return self.sum_values * other
         return self.sum_values * other.sum_values
 
+    def __rmul__(self, other):
+        if isinstance(other, int) and not isinstance(other, bool):
+            return self * other
+        return NotImplemented
+
     def __truediv__(self, other):
         return self.sum_values / other.sum_values
 
@@ -79,50 +203,93 @@ class LabelledNumerics:
         return num_list
 
     def append(self, other, sort: bool = False):
+        if not sort and self._count_backed() and other._count_backed():
+            if other._codec is self._codec:
+                return LabelledNumerics.from_counts(
+                    self._counts + other._counts, self.conversion, sep=self.sep
+                )
         if sort:
             # sort by value
             new_name = self.sep.join(
-                sorted(
-                    self._tolist() + other._tolist(), key=lambda x: self.conversion[x]
-                )
+                sorted(self._tolist() + other._tolist(), key=self._codec.__getitem__)
             )
         else:
             new_name = self.sep.join(self._tolist() + other._tolist())
-        return LabelledNumerics(new_name, self.conversion)
-
-    @property
+        return LabelledNumerics(new_name, self.conversion, sep=self.sep)
+
+    def remove(self, other):
+        """Remove the labels of other from this labelled numeric (e.g. loss of a fragment), as subtraction of count vectors
+        :param other: labelled numeric to remove
+        :type other: LabelledNumerics
+        :return: remaining labelled numeric
+        :rtype: LabelledNumerics
+        """
+        if other._codec is self._codec:
+            other_counts = (
+                other._counts if other._count_backed() else other._count_vector
+            )
+        else:
+            other_counts = self._codec.count_vector(other._tolist())
+        own_counts = self._counts if self._count_backed() else self._count_vector
+        remaining = own_counts - other_counts
+        if (remaining < 0).any():
+            raise ValueError(f"{other.name} is not contained in {self.name}")
+        return LabelledNumerics.from_counts(remaining, self.conversion, sep=self.sep)
+
+    @_cached
     def condensed_name(self):  # will give H3O2 instead of HHHOO
-        # count occurences of each label
-        labels = self._tolist()
-        label_count = {label: labels.count(label) for label in labels}
+        # count occurences of each label (labels in order of first occurence, dictionary order for count vectors)
+        if self._count_backed():
+            label_count = {
+                label: count
+                for label, count in zip(self._codec.labels, self._counts.tolist())
+                if count > 0
+            }
+        else:
+            label_count = Counter(self._tolist())
         # condensed name
-        condensed_name = ""
-        for label in label_count.keys():
-            if label_count[label] > 1:
-                condensed_name += label + str(label_count[label])
-            else:
-                condensed_name += label
-        return condensed_name
+        return "".join(
+            label + str(count) if count > 1 else label
+            for label, count in label_count.items()
+        )
 
     @property
     def values(self):
+        # copy, the cached list must not be changed by the caller
+        return list(self._value_list)
+
+    @_cached
+    def _value_list(self):
+        if self._count_backed():
+            import numpy as np
+
+            return np.repeat(self._codec.value_vector, self._counts).tolist()
         return self._convert()
 
-    @property
+    @_cached
     def sum_values(self):
-        return sum(self._convert())
+        if self._count_backed():
+            return (self._counts @ self._codec.value_vector).item()
+        return sum(self._value_list)
 
-    @property
+    @_cached
     def mean(self):
-        return np.mean(self._convert())
+        import numpy as np  # numpy is only loaded when it is needed
+
+        if self._count_backed():
+            return np.float64(self.sum_values) / self._counts.sum()
+        return np.mean(self._value_list)
 
     @staticmethod
+    @instrument
     def _to_chunks(
-        number: int | float, conversion_dict: dict[str, int]
+        number: int | float, conversion_dict: dict[str, int] | LabelCodec
     ) -> Tuple[list, list, str]:
         """Split a number into chunks of a given size, starting with the largest chunk and working down to the smallest
         :num: number to split
         :type num: int
+        :param conversion_dict: dictionary (or its compiled codec) providing the chunks
+        :type conversion_dict: dict[str, int] | LabelCodec
         :return: list of chunks
         :rtype: list
         """
@@ -130,48 +297,37 @@ class LabelledNumerics:
         if not isinstance(number, int):
             raise TypeError(f"num must be int, not {type(number)}")
 
+        codec = compile_dictionary(conversion_dict)
+
         # initialize lists
         values = []
         labels = []
-        result_string = ""
 
         # special zero case relevant for single digit numbers
-        # check if num is zero
-        if str(number).startswith("0"):
+        if number == 0:
             values.append(0)
             # corresponding key
-            if 0 in conversion_dict.values():
-                labels.append(
-                    [key for key, value in conversion_dict.items() if value == 0][0]
-                )
-            else:
-                labels.append("0")
-
-        # remove zeros from conversion_dict as algorithm does not work with zeros
-        if 0 in conversion_dict.values():
-            conversion_dict = {
-                key: value for key, value in conversion_dict.items() if value != 0
-            }
-
-        for chunklabel, chunksize in sorted(
-            conversion_dict.items(), reverse=True, key=lambda item: item[1]
-        ):
-            # print(chunklabel, chunksize, number)
-            while number >= chunksize and chunksize > 0:
-                # if number is greater than chunksize, add chunk to outputlist
-                values.append(chunksize)
-                labels.append(chunklabel)
-                result_string += chunklabel + " "
-                number -= chunksize
-        return values, labels, result_string.strip()
+            labels.append(codec.zero_label if codec.zero_label is not None else "0")
+
+        # greedy decomposition, zeros are excluded from the chunks as algorithm does not work with zeros
+        chunk_labels = []
+        for chunklabel, chunksize in codec.chunks:
+            if number >= chunksize:
+                # take the chunk as often as it fits at once
+                count, number = divmod(number, chunksize)
+                values.extend([chunksize] * count)
+                chunk_labels.extend([chunklabel] * count)
+        labels.extend(chunk_labels)
+        return values, labels, " ".join(chunk_labels)
 
     @staticmethod
+    @instrument
     def _combinations_sum(target, candidates):
         """Given a set of candidate numbers (candidates) (without duplicates) and a target number (target),
         find all unique combinations in candidates where the candidate numbers sum to target.
         The same repeated number may be chosen from candidates unlimited number of times.
         Note:
-        All numbers (including target) will be positive integers.
+        All numbers (including target) will be positive integers, candidates <= 0 are ignored.
         The solution set must not contain duplicate combinations.
         Parameters:
         :target: target number
@@ -179,96 +335,276 @@ class LabelledNumerics:
         :Returns:
         :result: list of lists of the unique combinations, where each inner list is a combination that sums to target
         """
-
-        def backtrack(start, target, path):
-            if target == 0:
-                result.append(path)
-                return
-            for i in range(start, len(candidates)):
-                if candidates[i] > target:
-                    break
-                backtrack(i, target - candidates[i], path + [candidates[i]])
-
-        result = []
         candidates.sort()
-        backtrack(0, target, [])
-        return result
+        return list(combinations.iter_compositions(target, candidates))
 
     @staticmethod
+    @instrument
     def get_combinations(
-        target_number: int, conversion_dict, selected_keys: list[str] = None
+        target_number: int,
+        conversion_dict,
+        selected_keys: list[str] = None,
+        workers: int = None,
+        split_depth: int = None,
     ) -> list:
         """Get all combinations of a target number
         :param target_number: target number
         :type target_number: int
         :param selected_keys: selected keys, defaults to None
         :type selected_keys: list[str], optional
-        :return: list of combinations
+        :param workers: number of processes to search in parallel, defaults to None (serial search in this process)
+        :type workers: int, optional
+        :param split_depth: number of first choices defining the parallel subproblems, defaults to None (subproblems of about equal size)
+        :type split_depth: int, optional
+        :return: list of combinations (same order for serial and parallel search)
         :rtype: list
         """
         # test type
         if not isinstance(target_number, int):
             raise TypeError(f"target_number must be int, not {type(target_number)}")
-        if selected_keys is not None:
-            if not isinstance(selected_keys, list):
-                raise TypeError(
-                    f"selected_keys must be list, not {type(selected_keys)}"
-                )
-            if not all(isinstance(key, str) for key in selected_keys):
-                raise TypeError(
-                    f"selected_keys must be list[str], not {type(selected_keys)}"
-                )
+        if workers is not None and (not isinstance(workers, int) or workers < 1):
+            raise ValueError(f"workers must be a positive int, not {workers}")
+        candidates = LabelledNumerics._candidate_values(conversion_dict, selected_keys)
         # get combinations
-        if selected_keys is None:
-            return LabelledNumerics._combinations_sum(
-                target_number, list(conversion_dict.values())
+        if workers is not None and workers > 1:
+            return combinations.parallel_compositions(
+                target_number, candidates, workers, split_depth=split_depth
             )
-        else:
-            return LabelledNumerics._combinations_sum(
-                target_number,
-                [
-                    conversion_dict[key]
-                    for key in selected_keys
-                    if key in conversion_dict
-                ],
+        return LabelledNumerics._combinations_sum(target_number, candidates)
+
+    @staticmethod
+    def iter_combinations(
+        target_number: int,
+        conversion_dict,
+        selected_keys: list[str] = None,
+        limit: int = None,
+        offset: int = 0,
+    ):
+        """Iterate over the combinations of a target number one at a time (same order as get_combinations).
+        Memory use does not grow with the number of combinations and iteration can be stopped at any time.
+        :param target_number: target number
+        :type target_number: int
+        :param selected_keys: selected keys, defaults to None
+        :type selected_keys: list[str], optional
+        :param limit: maximal number of combinations to yield, defaults to None (all)
+        :type limit: int, optional
+        :param offset: number of combinations to skip first, defaults to 0
+        :type offset: int, optional
+        :yield: combination
+        :rtype: list[int]
+        """
+        if not isinstance(target_number, int):
+            raise TypeError(f"target_number must be int, not {type(target_number)}")
+        if limit is not None and limit < 0:
+            raise ValueError(f"limit must be >= 0, not {limit}")
+        if offset < 0:
+            raise ValueError(f"offset must be >= 0, not {offset}")
+        candidates = LabelledNumerics._candidate_values(conversion_dict, selected_keys)
+        stop = None if limit is None else offset + limit
+        return itertools.islice(
+            combinations.iter_compositions(target_number, candidates), offset, stop
+        )
+
+    @staticmethod
+    async def aiter_combinations(
+        target_number: int,
+        conversion_dict,
+        selected_keys: list[str] = None,
+        chunk_size: int = 1000,
+    ):
+        """Iterate asynchronously over chunks of the combinations of a target number (same order as get_combinations),
+        e.g. in asyncio web handlers. The event loop gets control back after every chunk, cancelling the consuming
+        task or a timeout (asyncio.wait_for, asyncio.timeout) stops the search.
+
+            async for chunk in LabelledNumerics.aiter_combinations(200, organic_atoms):
+                ...
+
+        :param target_number: target number
+        :type target_number: int
+        :param selected_keys: selected keys, defaults to None
+        :type selected_keys: list[str], optional
+        :param chunk_size: combinations per chunk, defaults to 1000
+        :type chunk_size: int, optional
+        :yield: chunk of combinations
+        :rtype: list[list[int]]
+        """
+        if not isinstance(target_number, int):
+            raise TypeError(f"target_number must be int, not {type(target_number)}")
+        candidates = LabelledNumerics._candidate_values(conversion_dict, selected_keys)
+        async for chunk in combinations.aiter_compositions(
+            target_number, candidates, chunk_size
+        ):
+            yield chunk
+
+    @staticmethod
+    async def aget_combinations(
+        target_number: int,
+        conversion_dict,
+        selected_keys: list[str] = None,
+        chunk_size: int = 1000,
+    ) -> list:
+        """Awaitable get_combinations, searched in chunks by aiter_combinations (cancellable, e.g.
+        await asyncio.wait_for(LabelledNumerics.aget_combinations(200, organic_atoms), timeout=1))
+        :return: list of combinations
+        :rtype: list
+        """
+        result = []
+        async for chunk in LabelledNumerics.aiter_combinations(
+            target_number, conversion_dict, selected_keys, chunk_size
+        ):
+            result.extend(chunk)
+        return result
+
+    @staticmethod
+    @instrument
+    def get_combinations_batch(
+        target_numbers,
+        conversion_dict,
+        tolerance: float = 0,
+        selected_keys: list[str] = None,
+        counts_only: bool = False,
+        dtype="int64",
+    ):
+        """Get the combinations (or only their number) of many target numbers at once, e.g. for a peak list.
+        All combinations with a sum inside target +- tolerance are returned for each target. The dynamic programming
+        tables are computed once for all targets and no sum is searched twice.
+        Labels with value 0 are not used.
+        :param target_numbers: target numbers (may be floats, e.g. measured masses)
+        :type target_numbers: np.ndarray, list
+        :param tolerance: half width of the window around each target, defaults to 0
+        :type tolerance: float, optional
+        :param selected_keys: selected keys, defaults to None
+        :type selected_keys: list[str], optional
+        :param counts_only: if True only count the combinations, defaults to False
+        :type counts_only: bool, optional
+        :param dtype: dtype of the counts (see count_combinations_range), defaults to "int64"
+        :type dtype: np.dtype, optional
+        :return: counts per target (counts_only) or list of combinations per target, sorted by their sum
+        :rtype: np.ndarray | list[list[list[int]]]
+        """
+        candidates = LabelledNumerics._candidate_values(conversion_dict, selected_keys)
+        if counts_only:
+            return combinations.batch_counts(
+                target_numbers, candidates, tolerance=tolerance, dtype=dtype
+            )
+        return combinations.batch_compositions(
+            target_numbers, candidates, tolerance=tolerance
+        )
+
+    @staticmethod
+    def _candidate_values(conversion_dict, selected_keys: list[str] = None) -> list:
+        """Values of the (selected) keys of conversion_dict used as candidates for combinations"""
+        if selected_keys is None:
+            return list(conversion_dict.values())
+        if not isinstance(selected_keys, list):
+            raise TypeError(f"selected_keys must be list, not {type(selected_keys)}")
+        if not all(isinstance(key, str) for key in selected_keys):
+            raise TypeError(
+                f"selected_keys must be list[str], not {type(selected_keys)}"
             )
+        return [conversion_dict[key] for key in selected_keys if key in conversion_dict]
 
     @staticmethod
+    @instrument
+    def count_combinations(
+        target_number: int, conversion_dict, selected_keys: list[str] = None
+    ) -> int:
+        """Count all combinations of a target number without enumerating them (same combinations as get_combinations).
+        Labels with value 0 are not used.
+        :param target_number: target number
+        :type target_number: int
+        :param selected_keys: selected keys, defaults to None
+        :type selected_keys: list[str], optional
+        :return: number of combinations
+        :rtype: int
+        """
+        if not isinstance(target_number, int):
+            raise TypeError(f"target_number must be int, not {type(target_number)}")
+        if target_number < 0:
+            return 0
+        candidates = LabelledNumerics._candidate_values(conversion_dict, selected_keys)
+        # exact python integers, counts grow exponentially with the target
+        return int(
+            combinations.count_table(target_number, candidates, dtype=object)[-1]
+        )
+
+    @staticmethod
+    @instrument
+    def count_combinations_range(
+        max_number: int,
+        conversion_dict,
+        selected_keys: list[str] = None,
+        dtype="int64",
+    ) -> np.ndarray:
+        """Count the combinations of every number from 0 to max_number in one pass (e.g. composition density of a spectrum).
+        Labels with value 0 are not used.
+        :param max_number: largest number
+        :type max_number: int
+        :param selected_keys: selected keys, defaults to None
+        :type selected_keys: list[str], optional
+        :param dtype: dtype of the counts, raises OverflowError if int64 is too small, use object for exact counts, defaults to "int64"
+        :type dtype: np.dtype, optional
+        :return: array with counts[number] = number of combinations
+        :rtype: np.ndarray
+        """
+        if not isinstance(max_number, int):
+            raise TypeError(f"max_number must be int, not {type(max_number)}")
+        if max_number < 0:
+            raise ValueError(f"max_number must be >= 0, not {max_number}")
+        candidates = LabelledNumerics._candidate_values(conversion_dict, selected_keys)
+        return combinations.count_table(max_number, candidates, dtype=dtype)
+
+    @staticmethod
+    @instrument
+    @memoize
     def convert_formula(formula: str) -> str:
-        """Replaces chemical formula or equivalent string to labelled numerics compatible format, e.g. H20 to HHO or C6H12O6 to CCCCCCOOOOOOHHHHHHHHHHHH"""
-        # test type
-        if not isinstance(formula, str):
-            raise TypeError(f"formula must be str, not {type(formula)}")
-        # initialize output
-        output = ""
-        # loop over formula
-        # break into parts at each capital letter
-        list_of_parts = []
-        for char in formula:
-            if char.isupper():
-                list_of_parts.append(char)
-            else:
-                list_of_parts[-1] += char
-
-        for part in list_of_parts:
-            # split into letters and numbers if number is present
-            # multiply letters by number
-            if any(char.isdigit() for char in part):
-                # split into letters and numbers
-                letters = ""
-                numbers = ""
-                for char in part:
-                    if char.isalpha():
-                        letters += char
-                    else:
-                        numbers += char
-                # multiply letters by numbers
-                output += (letters + " ") * int(numbers)
-            else:
-                output += part + " "
-        return output.strip()
+        """Replaces chemical formula or equivalent string to labelled numerics compatible format, e.g. H2O to "H H O" or C6H12O6 to "C C C C C C H H H H H H H H H H H H O O O O O O".
+        Groups (Ca(OH)2) and hydrates (CuSO4·5H2O) are expanded as well, see formula_terms.
+        To get the counts without expanding them use formula_counts or from_formula.
+        """
+        # parsed to terms in one pass, only the output string is expanded
+        return "".join(
+            (label + " ") * count for label, count in formula_terms(formula)
+        )[:-1]
+
+    @staticmethod
+    @instrument
+    def formula_counts(formula: str, conversion_dict=None) -> dict[str, int]:
+        """Count of each label of a chemical formula (or an equivalent string) without expanding it, e.g.
+        "C1000H2000" -> {"C": 1000, "H": 2000}, "Ca(OH)2" -> {"Ca": 1, "O": 2, "H": 2}. Nested groups with multipliers
+        and hydrates (CuSO4·5H2O) are supported.
+        :param formula: formula
+        :type formula: str
+        :param conversion_dict: dictionary whose labels are read (longest label first, also multi-letter labels),
+            defaults to None (element symbols: capital letter followed by lowercase letters)
+        :type conversion_dict: dict[str, int] | LabelCodec, optional
+        :return: label -> count, labels in order of their first appearance
+        :rtype: dict[str, int]
+        """
+        return parse_formula(formula, conversion_dict)
+
+    @classmethod
+    def from_formula(
+        cls, formula: str, conversion_dict: dict[str, int], sep: str = " "
+    ):
+        """Create a labelled numeric of a chemical formula, e.g. from_formula("Ca(OH)2", atoms).
+        The formula is read into counts directly (see formula_counts), the labelled numeric is backed by its count vector.
+        :param formula: formula
+        :type formula: str
+        :param conversion_dict: dictionary to convert
+        :type conversion_dict: dict[str, int] | LabelCodec
+        :param sep: separator, defaults to " "
+        :type sep: str, optional
+        :return: labelled numeric
+        :rtype: LabelledNumerics
+        """
+        return cls.from_counts(
+            parse_formula(formula, conversion_dict), conversion_dict, sep=sep
+        )
 
     @staticmethod
+    @instrument
+    @memoize
     def formate_chunky(
         string_repr: str, conversion_dict: dict, sep: str = " ", sorted_inv: bool = True
     ) -> str:
@@ -277,7 +613,7 @@ class LabelledNumerics:
         :param string_repr: string to break into chunks
         :type string_repr: str
         :param conversion_dict: dictionary to convert
-        :type conversion_dict: dict[str, int]
+        :type conversion_dict: dict[str, int] | LabelCodec
         :param sep: separator, defaults to " "
         :type sep: str, optional
         :param sorted_inv: if True, string will be sorted by chunk size (e.g. for numbers), else return string might be permutation of input string (e.g. for chemical formulas)
@@ -292,46 +628,14 @@ class LabelledNumerics:
         if (
             "." in string_repr
         ):  # chunk will end at dot, relevant for number representations
-            logger.warning(msg="formate chunky ignores everything after dot")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("formate chunky ignores everything after dot")
             string_repr = string_repr.split(".")[0]
 
-        result_string = ""
-
-        if sorted_inv:
-            for chunklabel, _ in sorted(
-                conversion_dict.items(), reverse=True, key=lambda item: item[1]
-            ):
-                while len(string_repr) > 0:
-                    # if number is greater than chunksize, add chunk to outputlist
-                    if string_repr.strip().startswith(chunklabel):
-                        result_string += chunklabel + sep
-                        string_repr = string_repr.strip()[len(chunklabel) :]
-                    else:
-                        break
-            return result_string.strip(sep)
-        else:
-            # sort dictionary by longest key first (otherwise substrings maybe will be replaced first)
-            # conversion_dict_sorted = {
-            #     k: v
-            #     for k, v in sorted(
-            #         conversion_dict.items(), key=lambda item: len(item[0]), reverse=True
-            #     )
-            # }
-            conversion_dict_sorted = dict(
-                sorted(
-                    conversion_dict.items(), key=lambda item: len(item[0]), reverse=True
-                )
-            )
-
-            for chunklabel, _ in conversion_dict_sorted.items():
-                while len(string_repr) > 0:
-                    # if number is somewhere in word, remove word from string and add chunk to outputlist
-                    if chunklabel in string_repr:
-                        result_string += chunklabel + sep
-                        string_repr = string_repr.replace(chunklabel, "", 1)
-                    else:
-                        break
-            return result_string.strip(sep)
+        # one pass of the compiled regular expressions of the dictionary (see LabelCodec.tokenize)
+        return sep.join(
+            compile_dictionary(conversion_dict).tokenize(string_repr, sorted_inv)
+        )
 
     @staticmethod
     def _convert_to_str_digitwise(
@@ -341,7 +645,7 @@ class LabelledNumerics:
         :param num: number to convert
         :type num: int
         :param conversion_dict: dictionary to convert
-        :type conversion_dict: dict[str, int]
+        :type conversion_dict: dict[str, int] | LabelCodec
         :return: string
         :rtype: str
         """
@@ -349,7 +653,7 @@ class LabelledNumerics:
         if not isinstance(num, int):
             raise TypeError(f"num must be int, not {type(num)}")
         # test type of conversion_dict
-        if not isinstance(conversion_dict, dict):
+        if not isinstance(conversion_dict, (dict, LabelCodec)):
             raise TypeError(
                 f"conversion_dict must be dict[str, int], not {type(conversion_dict)}"
             )
@@ -368,13 +672,13 @@ class LabelledNumerics:
         :param num: number to convert
         :type num: int
         :param conversion_dict: dictionary to convert
-        :type conversion_dict: dict[str, int]
+        :type conversion_dict: dict[str, int] | LabelCodec
         :return: string
         :rtype: str
         """
         if not isinstance(num, int):
             raise TypeError(f"num must be int, not {type(num)}")
-        if not isinstance(conversion_dict, dict):
+        if not isinstance(conversion_dict, (dict, LabelCodec)):
             raise TypeError(
                 f"conversion_dict must be dict[str, int], not {type(conversion_dict)}"
             )
@@ -390,13 +694,13 @@ class LabelledNumerics:
         :param num: number to convert
         :type num: int
         :param conversion_dict: dictionary to convert
-        :type conversion_dict: dict[str, int]
+        :type conversion_dict: dict[str, int] | LabelCodec
         :return: string
         :rtype: str
         """
         if not isinstance(num, float):
             raise TypeError(f"num must be float, not {type(num)}")
-        if not isinstance(conversion_dict, dict):
+        if not isinstance(conversion_dict, (dict, LabelCodec)):
             raise TypeError(
                 f"conversion_dict must be dict[str, int], not {type(conversion_dict)}"
             )
@@ -411,6 +715,8 @@ class LabelledNumerics:
         )
 
     @staticmethod
+    @instrument
+    @memoize
     def num2label(
         num: int | float,
         conversion_dict: dict[str, int],
@@ -421,14 +727,14 @@ class LabelledNumerics:
         :param num: number to convert
         :type num: int
         :param conversion_dict: dictionary to convert
-        :type conversion_dict: dict[str, int]
+        :type conversion_dict: dict[str, int] | LabelCodec
         :return: string
         :rtype: str
         """
         # test input
         if not isinstance(num, (int, float)):
             raise TypeError(f"num must be int or float, not {type(num)}")
-        if not isinstance(conversion_dict, dict):
+        if not isinstance(conversion_dict, (dict, LabelCodec)):
             raise TypeError(
                 f"conversion_dict must be dict[str, int], not {type(conversion_dict)}"
             )
@@ -443,6 +749,8 @@ class LabelledNumerics:
                 f"method must be 'decimal', 'digitwise' or 'decimal_float', not {method}"
             )
 
+        conversion_dict = compile_dictionary(conversion_dict)
+
         # convert num to string
         if method == "decimal":
             return LabelledNumerics._convert_to_str_decimal(
@@ -460,30 +768,31 @@ class LabelledNumerics:
             raise ValueError(f"method {method} not implemented")
 
     @staticmethod
+    @instrument
+    @memoize
     def label2num(label: str, conversion_dict: dict[str, int], sep: str = " ") -> int:
         """Convert a string to a number
         :param label: string to convert
         :type label: str
         :param conversion_dict: dictionary to convert
-        :type conversion_dict: dict[str, int]
+        :type conversion_dict: dict[str, int] | LabelCodec
         :return: number
         :rtype: int
         """
         # test type
         if not isinstance(label, str):
             raise TypeError(f"label must be str, not {type(label)}")
-        if not isinstance(conversion_dict, dict):
+        if not isinstance(conversion_dict, (dict, LabelCodec)):
             raise TypeError(
                 f"conversion_dict must be dict[str, int], not {type(conversion_dict)}"
             )
         if not isinstance(sep, str):
             raise TypeError(f"sep must be str, not {type(sep)}")
 
+        if isinstance(conversion_dict, LabelCodec):
+            conversion_dict = conversion_dict.conversion_dict
         # convert each chunk of label to number
-        num_list = []
-        for chunk in label.split(sep):
-            num_list.append(conversion_dict[chunk])
-        return sum(num_list)
+        return sum([conversion_dict[chunk] for chunk in label.split(sep)])
 
 
 if __name__ == "__main__":
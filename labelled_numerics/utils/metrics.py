@@ -0,0 +1,119 @@
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+
+# collector of the running collect() block, None while instrumentation is switched off.
+# A context variable: every thread (and asyncio task) has its own, collect() in one thread does not see the others
+_collector = contextvars.ContextVar("labelled_numerics_collector", default=None)
+
+
+class Collector:
+    """Call counts and cumulative time per instrumented function, plus named counters (e.g. nodes of the
+    combination search). Filled while it is the active collector, see collect().
+    """
+
+    def __init__(self):
+        self.calls = {}  # name -> [number of calls, cumulative time in s]
+        self.counters = {}
+        # a collector can be shared by threads, e.g. passed to collect() in each of them or by map_convert
+        self._lock = threading.Lock()
+
+    def record(self, name: str, elapsed: float):
+        with self._lock:
+            entry = self.calls.get(name)
+            if entry is None:
+                self.calls[name] = [1, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+
+    def increment(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def clear(self):
+        with self._lock:
+            self.calls.clear()
+            self.counters.clear()
+
+    def as_dict(self) -> dict:
+        """Plain dict (json serializable) of the collected metrics:
+        {"calls": {name: {"count": int, "time": float}}, "counters": {name: int}, "cache": cache_info()}
+        """
+        from labelled_numerics.utils.cache import cache_info
+
+        with self._lock:
+            calls = {
+                name: {"count": count, "time": elapsed}
+                for name, (count, elapsed) in self.calls.items()
+            }
+            counters = dict(self.counters)
+        return {"calls": calls, "counters": counters, "cache": cache_info()}
+
+
+@contextlib.contextmanager
+def collect(collector: Collector = None):
+    """Collect metrics of all instrumented calls inside the with block, e.g.
+
+        with collect() as metrics:
+            LabelledNumerics.get_combinations(100, organic_atoms)
+        metrics.as_dict()["counters"]["search.nodes"]
+
+    Blocks can be nested, the inner block collects on its own. Only calls of the current thread (or asyncio task)
+    are collected, except for the worker threads of map_convert. Searches running in worker processes
+    (get_combinations with workers) are not counted.
+    :param collector: collector to add to, defaults to None (a new one)
+    :type collector: Collector, optional
+    :yield: the collector
+    :rtype: Collector
+    """
+    collector = Collector() if collector is None else collector
+    token = _collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _collector.reset(token)
+
+
+@contextlib.contextmanager
+def suspend():
+    """Collect nothing inside the with block, for internal work that is not a call of the user (e.g. lookup tables)"""
+    token = _collector.set(None)
+    try:
+        yield
+    finally:
+        _collector.reset(token)
+
+
+def active_collector() -> Collector:
+    """The collector of the running collect() block (None if there is none)"""
+    return _collector.get()
+
+
+def count(name: str, amount: int = 1):
+    """Add amount to the counter name of the active collector (nothing happens while none is active)"""
+    collector = _collector.get()
+    if collector is not None:
+        collector.increment(name, amount)
+
+
+def instrument(function):
+    """Decorator counting calls and cumulative time of function while a collector is active.
+    Switched off it costs one extra call, so it is only used on functions doing real work, not on single lookups.
+    """
+    name = function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        collector = _collector.get()
+        if collector is None:
+            return function(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            collector.record(name, time.perf_counter() - start)
+
+    return wrapper